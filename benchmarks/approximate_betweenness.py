@@ -0,0 +1,85 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Benchmark iterative attacks with sampled betweenness against exact ones.
+
+For each number of pivots, the attack curves (lcc and efficiency) are compared
+with those of the exact iterative betweenness attack, and the wall-clock time
+of both is reported.
+
+Example:
+    python benchmarks/approximate_betweenness.py --nodes 2000 --nattacks 50
+"""
+
+import argparse
+import time
+import numpy as np
+import networkx as nx
+import pandas as pd
+import network_analysis.analysis as network
+from network_analysis.dismantling import NetworkDismantling
+
+
+def run_attack(dismantling, edges, nattacks, **kwargs):
+    if edges:
+        attack = dismantling.edge_iterative_centrality_attack
+        method = network.approximate_edge_betweenness_centrality
+    else:
+        attack = dismantling.node_iterative_centrality_attack
+        method = network.approximate_betweenness_centrality
+    if kwargs.get("centrality_kwargs"):
+        kwargs["centrality_method"] = method
+    start = time.perf_counter()
+    _, _, lcc, _, eff, _ = attack(nattacks, backend="csr", **kwargs)
+    return np.array(lcc), np.array(eff), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--degree", type=int, default=2, help="Barabasi-Albert m")
+    parser.add_argument("--nattacks", type=int, default=20)
+    parser.add_argument("--pivots", type=int, nargs="+", default=[10, 50, 100, 500])
+    parser.add_argument("--stable-top", type=int, default=None)
+    parser.add_argument("--edges", action="store_true", help="attack edges")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    G = nx.barabasi_albert_graph(args.nodes, args.degree, seed=args.seed)
+    dismantling = NetworkDismantling(G)
+
+    lcc_exact, eff_exact, t_exact = run_attack(dismantling, args.edges, args.nattacks)
+    rows = [
+        {
+            "pivots": args.nodes,
+            "time": t_exact,
+            "speedup": 1.0,
+            "lcc_max_dev": 0.0,
+            "eff_max_dev": 0.0,
+        }
+    ]
+    for k in args.pivots:
+        lcc, eff, t = run_attack(
+            dismantling,
+            args.edges,
+            args.nattacks,
+            centrality_kwargs={"k": k, "seed": args.seed},
+            stable_top=args.stable_top,
+        )
+        rows.append(
+            {
+                "pivots": k,
+                "time": t,
+                "speedup": t_exact / t,
+                "lcc_max_dev": np.max(np.abs(lcc - lcc_exact)) / args.nodes,
+                "eff_max_dev": np.max(np.abs(eff - eff_exact)),
+            }
+        )
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Benchmark batched iterative attacks against one-at-a-time ones.
+
+For each batch size and recompute interval, the attack curves (lcc and
+efficiency) are compared with those of the iterative attack that recomputes
+the centrality and the metrics after every removal, and the wall-clock time
+of both and the number of interpolated steps are reported. The network is
+read from a GraphML file if given, and is a Barabasi-Albert graph otherwise.
+
+Example:
+    python benchmarks/batched_attack.py --nodes 2000 --nattacks 100 \
+        --batch-sizes 1 5 10 --recompute-every 1 5
+"""
+
+import argparse
+import time
+import numpy as np
+import networkx as nx
+import pandas as pd
+from network_analysis.dismantling import NetworkDismantling
+
+
+def run_attack(dismantling, edges, nattacks, **kwargs):
+    if edges:
+        attack = dismantling.edge_iterative_centrality_attack
+    else:
+        attack = dismantling.node_iterative_centrality_attack
+    start = time.perf_counter()
+    _, _, lcc, _, eff, _, interpolated = attack(
+        nattacks, backend="csr", return_interpolated=True, **kwargs
+    )
+    elapsed = time.perf_counter() - start
+    return np.array(lcc), np.array(eff), sum(interpolated), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--graphml", default=None, help="network to be attacked")
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--degree", type=int, default=2, help="Barabasi-Albert m")
+    parser.add_argument("--nattacks", type=int, default=50)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 5, 10])
+    parser.add_argument("--recompute-every", type=int, nargs="+", default=[1, 5])
+    parser.add_argument("--weight", default=None)
+    parser.add_argument("--edges", action="store_true", help="attack edges")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.graphml is not None:
+        G = nx.read_graphml(args.graphml)
+    else:
+        G = nx.barabasi_albert_graph(args.nodes, args.degree, seed=args.seed)
+    dismantling = NetworkDismantling(G)
+    n = G.number_of_nodes()
+
+    lcc_exact, eff_exact, _, t_exact = run_attack(
+        dismantling, args.edges, args.nattacks, weight=args.weight
+    )
+    rows = []
+    for batch_size in args.batch_sizes:
+        for recompute_every in args.recompute_every:
+            if batch_size == 1 and recompute_every == 1:
+                lcc, eff, ninterpolated, t = lcc_exact, eff_exact, 0, t_exact
+            else:
+                lcc, eff, ninterpolated, t = run_attack(
+                    dismantling,
+                    args.edges,
+                    args.nattacks,
+                    weight=args.weight,
+                    batch_size=batch_size,
+                    recompute_every=recompute_every,
+                )
+            rows.append(
+                {
+                    "batch_size": batch_size,
+                    "recompute_every": recompute_every,
+                    "time": t,
+                    "speedup": t_exact / t,
+                    "interpolated": ninterpolated,
+                    "lcc_max_dev": np.max(np.abs(lcc - lcc_exact)) / n,
+                    "eff_max_dev": np.max(np.abs(eff - eff_exact)),
+                }
+            )
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
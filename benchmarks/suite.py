@@ -0,0 +1,468 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Benchmark suite for the analysis and dismantling hot paths.
+
+Every public function of network_analysis.analysis and every attack of
+NetworkDismantling is timed on seeded synthetic networks: Barabasi-Albert
+graphs, random geometric graphs, road-like grids (jittered lattices with
+missing streets) and square lattices. Each case is run on the sizes up to
+its own limit, since e.g. exact betweenness is quadratic. The wall-clock
+time (best of the repeats) and the peak memory traced by tracemalloc (in a
+separate run, as tracing slows Python down) are appended to a JSON Lines
+history together with the commit and package versions, and each case can
+be compared with its previous run in the history.
+
+Example:
+    python benchmarks/suite.py --sizes 1000 10000 --compare
+    python benchmarks/suite.py --cases "attack.*" --generators lattice
+"""
+
+import argparse
+import datetime
+import fnmatch
+import json
+import math
+import pathlib
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+import numpy as np
+import networkx as nx
+import pandas as pd
+import shapely
+import network_analysis.analysis as network
+from network_analysis.dismantling import NetworkDismantling
+
+# Benchmark case; function(G, seed) runs the code to be measured, on
+# networks of at most max_nodes nodes (and with coordinates if geographic)
+# made by the given generators (default: all)
+Case = namedtuple(
+    "Case",
+    ["name", "function", "max_nodes", "geographic", "generators"],
+    defaults=[None],
+)
+
+# number of attacks carried out in the attack benchmarks
+NATTACKS = 10
+
+# number of pivots of the sampled betweenness benchmarks
+PIVOTS = 50
+
+# default history file
+HISTORY = pathlib.Path(__file__).parent / "results" / "history.jsonl"
+
+
+def barabasi_albert(n, seed):
+    """Return scale-free network with random edge weights."""
+    G = nx.barabasi_albert_graph(n, 2, seed=seed)
+    rng = np.random.default_rng(seed)
+    for (u, v), w in zip(G.edges(), rng.uniform(0.5, 1.5, G.number_of_edges())):
+        G[u][v]["weight"] = w
+    return G
+
+
+def random_geometric(n, seed):
+    """Return random geometric network in the unit square of mean degree ~6."""
+    radius = math.sqrt(6.0 / (math.pi * n))
+    G = nx.random_geometric_graph(n, radius, seed=seed)
+    return _geographic(G, nx.get_node_attributes(G, "pos"))
+
+
+def road_grid(n, seed):
+    """Return road-like network: a jittered lattice with 10% of streets missing."""
+    side = max(2, int(round(math.sqrt(n))))
+    rng = np.random.default_rng(seed)
+    G = nx.convert_node_labels_to_integers(nx.grid_2d_graph(side, side))
+    xy = np.indices((side, side)).reshape(2, -1).T
+    xy = xy + rng.uniform(-0.3, 0.3, xy.shape)
+    G = G.subgraph(range(min(n, side * side))).copy()
+    edges = list(G.edges())
+    missing = rng.random(len(edges)) < 0.1
+    G.remove_edges_from(e for e, m in zip(edges, missing) if m)
+    return _geographic(G, {i: xy[i] for i in G})
+
+
+def lattice(n, seed):
+    """Return square lattice of unit edge weights."""
+    side = max(2, int(round(math.sqrt(n))))
+    G = nx.convert_node_labels_to_integers(nx.grid_2d_graph(side, side))
+    xy = np.indices((side, side)).reshape(2, -1).T.astype(float)
+    return _geographic(G, {i: xy[i] for i in G})
+
+
+def _geographic(G, pos):
+    """Set x and y node attributes and length edge weights from positions."""
+    for n, (x, y) in pos.items():
+        G.nodes[n]["x"] = float(x)
+        G.nodes[n]["y"] = float(y)
+    for u, v, data in G.edges(data=True):
+        data["weight"] = math.dist(pos[u], pos[v])
+    G.graph["geographic"] = True
+    return G
+
+
+# synthetic network generators, called as generator(n, seed)
+GENERATORS = {
+    "barabasi_albert": barabasi_albert,
+    "random_geometric": random_geometric,
+    "road_grid": road_grid,
+    "lattice": lattice,
+}
+
+
+def _hazards(G, seed, count=20):
+    """Return disks of radius 2% of the extent around random nodes of G."""
+    xy = np.array([(d["x"], d["y"]) for _, d in G.nodes(data=True)])
+    rng = np.random.default_rng(seed)
+    centers = xy[rng.choice(len(xy), size=min(count, len(xy)), replace=False)]
+    return shapely.points(centers), 0.02 * np.ptp(xy, axis=0).max()
+
+
+def _attack(method, **kwargs):
+    def run(G, seed):
+        getattr(NetworkDismantling(G), method)(NATTACKS, **kwargs)
+
+    return run
+
+
+def _hazard(method):
+    def run(G, seed):
+        hazards, radius = _hazards(G, seed)
+        getattr(NetworkDismantling(G), method)(hazards, radius, backend="csr")
+
+    return run
+
+
+CASES = [
+    Case(
+        "analysis.degree_centrality",
+        lambda G, s: network.degree_centrality(G),
+        10**6,
+        False,
+    ),
+    Case(
+        "analysis.eigenvector_centrality",
+        lambda G, s: network.eigenvector_centrality(G),
+        10**5,
+        False,
+        ["barabasi_albert"],  # power iteration is too slow on lattices
+    ),
+    Case(
+        "analysis.betweenness_centrality",
+        lambda G, s: network.betweenness_centrality(G),
+        2000,
+        False,
+    ),
+    Case(
+        "analysis.edge_betweenness_centrality",
+        lambda G, s: network.edge_betweenness_centrality(G),
+        2000,
+        False,
+    ),
+    Case(
+        "analysis.approximate_betweenness_centrality",
+        lambda G, s: network.approximate_betweenness_centrality(G, k=PIVOTS, seed=s),
+        10**5,
+        False,
+    ),
+    Case(
+        "analysis.approximate_edge_betweenness_centrality",
+        lambda G, s: network.approximate_edge_betweenness_centrality(
+            G, k=PIVOTS, seed=s
+        ),
+        10**5,
+        False,
+    ),
+    Case(
+        "analysis.closeness_centrality",
+        lambda G, s: network.closeness_centrality(G),
+        2000,
+        False,
+    ),
+    Case("analysis.pagerank", lambda G, s: network.pagerank(G, "weight"), 10**6, False),
+    Case(
+        "analysis.articulation_points",
+        lambda G, s: network.articulation_points(G),
+        10**6,
+        False,
+    ),
+    Case(
+        "analysis.largest_connected_component",
+        lambda G, s: network.largest_connected_component(G),
+        10**6,
+        False,
+    ),
+    Case(
+        "analysis.largest_connected_component_subgraph",
+        lambda G, s: network.largest_connected_component_subgraph(G),
+        10**6,
+        False,
+    ),
+    Case(
+        "analysis.second_largest_connected_component",
+        lambda G, s: network.second_largest_connected_component(G),
+        10**6,
+        False,
+    ),
+    Case(
+        "analysis.global_efficiency",
+        lambda G, s: network.global_efficiency(G),
+        2000,
+        False,
+    ),
+    Case(
+        "analysis.global_efficiency.csr",
+        lambda G, s: network.global_efficiency(G, backend="csr"),
+        20000,
+        False,
+    ),
+    Case(
+        "analysis.global_efficiency.weighted.csr",
+        lambda G, s: network.global_efficiency(G, "weight", backend="csr"),
+        10000,
+        False,
+    ),
+    Case(
+        "analysis.approximate_global_efficiency",
+        lambda G, s: network.approximate_global_efficiency(G, seed=s),
+        10**5,
+        False,
+    ),
+    Case("analysis.path_metrics", lambda G, s: network.path_metrics(G), 2000, False),
+    Case(
+        "attack.node_iterative_centrality_attack",
+        _attack("node_iterative_centrality_attack", backend="csr"),
+        1000,
+        False,
+    ),
+    Case(
+        "attack.node_iterative_centrality_attack.sampled",
+        _attack(
+            "node_iterative_centrality_attack",
+            backend="csr",
+            centrality_method=network.approximate_betweenness_centrality,
+            centrality_kwargs=dict(k=PIVOTS, seed=1),
+        ),
+        10000,
+        False,
+    ),
+    Case(
+        "attack.edge_iterative_centrality_attack",
+        _attack("edge_iterative_centrality_attack", backend="csr"),
+        1000,
+        False,
+    ),
+    Case(
+        "attack.edge_initial_centrality_attack.percolation",
+        _attack(
+            "edge_initial_centrality_attack",
+            percolation=True,
+            reverse_efficiency=True,
+        ),
+        5000,
+        False,
+    ),
+    Case(
+        "attack.articulation_point_targeted_attack",
+        _attack("articulation_point_targeted_attack", backend="csr", adaptive=True),
+        20000,
+        False,
+    ),
+    Case(
+        "attack.random_attack",
+        _attack("random_attack", backend="csr", seed=1),
+        20000,
+        False,
+    ),
+    Case(
+        "attack.edge_random_attack",
+        _attack("edge_random_attack", backend="csr", seed=1),
+        20000,
+        False,
+    ),
+    Case(
+        "attack.random_attack.percolation",
+        _attack("random_attack", percolation=True, seed=1),
+        10**6,
+        False,
+    ),
+    Case(
+        "attack.adaptive_degree_attack",
+        _attack("adaptive_degree_attack", efficiency=False),
+        10**6,
+        False,
+    ),
+    Case(
+        "attack.collective_influence_attack",
+        _attack("collective_influence_attack", efficiency=False),
+        10**5,
+        False,
+    ),
+    Case(
+        "attack.random_attack_ensemble",
+        lambda G, s: NetworkDismantling(G).random_attack_ensemble(
+            10, NATTACKS, seed=s, nworkers=1, backend="csr"
+        ),
+        5000,
+        False,
+    ),
+    Case("attack.hazard_attack", _hazard("hazard_attack"), 20000, True),
+    Case("attack.hazard_sweep", _hazard("hazard_sweep"), 10**5, True),
+]
+
+
+def measure(case, G, seed, repeat=1, memory=True):
+    """Return best time, all times and peak traced memory of a case on G."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case.function(G, seed)
+        times.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            case.function(G, seed)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return min(times), times, peak
+
+
+def environment():
+    """Return description of the code and machine the suite runs on."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=pathlib.Path(__file__).parent,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "networkx": nx.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "node": platform.node(),
+    }
+
+
+def read_history(filename):
+    """Return the records of a history file as a DataFrame."""
+    filename = pathlib.Path(filename)
+    if not filename.exists():
+        return pd.DataFrame()
+    with open(filename, "r") as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+
+def compare(results, history, threshold):
+    """Return table of the results against the previous run of each case."""
+    key = ["case", "generator", "nodes"]
+    previous = history[history["status"] == "ok"].groupby(key).last()["time"]
+    table = results[results["status"] == "ok"].set_index(key)[["time"]]
+    table["previous"] = previous.reindex(table.index)
+    table["ratio"] = table["time"] / table["previous"]
+    table["regression"] = table["ratio"] > threshold
+    return table.reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--generators", nargs="+", default=list(GENERATORS))
+    parser.add_argument("--cases", nargs="+", default=["*"], help="glob patterns")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="skip peak memory")
+    parser.add_argument("--history", default=str(HISTORY))
+    parser.add_argument("--compare", action="store_true", help="compare with history")
+    parser.add_argument("--threshold", type=float, default=1.2, help="regression ratio")
+    parser.add_argument("--list", action="store_true", help="list the cases")
+    args = parser.parse_args()
+
+    cases = [
+        case
+        for case in CASES
+        if any(fnmatch.fnmatch(case.name, pattern) for pattern in args.cases)
+    ]
+    if args.list:
+        for case in cases:
+            print("{:55s} max_nodes={}".format(case.name, case.max_nodes))
+        return 0
+
+    history = read_history(args.history)
+    run = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+    env = environment()
+    records = []
+    for generator in args.generators:
+        for n in args.sizes:
+            if not any(case.max_nodes >= n for case in cases):
+                continue
+            G = GENERATORS[generator](n, args.seed)
+            for case in cases:
+                if (
+                    n > case.max_nodes
+                    or (case.geographic and not G.graph.get("geographic"))
+                    or (case.generators and generator not in case.generators)
+                ):
+                    continue
+                record = {
+                    "run": run,
+                    **env,
+                    "case": case.name,
+                    "generator": generator,
+                    "nodes": G.number_of_nodes(),
+                    "edges": G.number_of_edges(),
+                    "seed": args.seed,
+                }
+                try:
+                    best, times, peak = measure(
+                        case, G, args.seed, args.repeat, not args.no_memory
+                    )
+                    record.update(time=best, times=times, peak_memory=peak, status="ok")
+                except Exception as err:  # record failures instead of stopping
+                    record.update(time=None, times=[], peak_memory=None)
+                    record["status"] = "error: {}".format(err)
+                records.append(record)
+                print(
+                    "{:55s} {:16s} {:8d} {}".format(
+                        case.name,
+                        generator,
+                        record["nodes"],
+                        (
+                            "{:.4f} s".format(record["time"])
+                            if record["status"] == "ok"
+                            else record["status"]
+                        ),
+                    ),
+                    flush=True,
+                )
+
+    history_file = pathlib.Path(args.history)
+    history_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(history_file, "a") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+    if args.compare and len(history) > 0 and len(records) > 0:
+        table = compare(pd.DataFrame(records), history, args.threshold)
+        print(table.to_string(index=False))
+        if table["regression"].any():
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
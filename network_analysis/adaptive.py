@@ -0,0 +1,207 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Provides adaptive attack orders computed with an indexed priority queue.
+
+Removing a node only changes the scores of the nodes in its neighbourhood.
+The scores are therefore kept in an indexed priority queue and only the
+affected entries are updated after each removal, so that the complete
+attack order is obtained in O(N log N) time for the adaptive degree attack.
+The graph itself is never modified.
+"""
+
+import heapq
+import itertools
+
+
+class IndexedHeap:
+    """Max-priority queue with update and removal of arbitrary items.
+
+    The current priority of each item is indexed in a dict. Updates push a
+    new heap entry and leave the old one behind, and stale entries are
+    skipped when popped, which is faster in Python than sifting entries in
+    place. Ties are broken by the order in which items were first pushed.
+    """
+    def __init__(self):
+        self.__heap = []  # ((-priority, order), item), possibly stale
+        self.__key = {}  # item -> current (-priority, order)
+        self.__order = {}  # item -> tie-breaking order
+
+    def __len__(self):
+        return len(self.__key)
+
+    def __contains__(self, item):
+        return item in self.__key
+
+    def push(self, item, priority):
+        """Insert item, or change its priority if already present."""
+        order = self.__order.setdefault(item, len(self.__order))
+        key = (-priority, order)
+        if self.__key.get(item) != key:
+            self.__key[item] = key
+            heapq.heappush(self.__heap, (key, item))
+
+    def peek(self):
+        """Return the (item, priority) pair with the highest priority."""
+        heap = self.__heap
+        while heap[0][0] != self.__key.get(heap[0][1]):
+            heapq.heappop(heap)
+        key, item = heap[0]
+        return item, -key[0]
+
+    def pop(self):
+        """Remove and return the (item, priority) pair with the highest priority."""
+        item, priority = self.peek()
+        heapq.heappop(self.__heap)
+        del self.__key[item]
+        return item, priority
+
+    def remove(self, item):
+        """Remove item from the queue."""
+        del self.__key[item]
+
+
+def _adjacency(G):
+    """Return nodes and integer neighbour and edge multiplicity lists.
+
+    Self-loops are left out and directed graphs are treated as undirected.
+    """
+    nodes = list(G)
+    index = {n: i for i, n in enumerate(nodes)}
+    counts = [{} for _ in nodes]
+    adjacencies = [G.adj]
+    if G.is_directed():
+        adjacencies.append(G.pred)
+    for adjacency in adjacencies:
+        for u, nbrs in adjacency.items():
+            i = index[u]
+            for v, data in nbrs.items():
+                if v != u:
+                    k = len(data) if G.is_multigraph() else 1
+                    j = index[v]
+                    counts[i][j] = counts[i].get(j, 0) + k
+    return nodes, [list(c) for c in counts], [list(c.values()) for c in counts]
+
+
+def adaptive_degree_order(G, nattacks=None):
+    """Return the removal order of an adaptive (recalculated) degree attack.
+
+    The node of highest degree in the remaining graph is removed at each
+    step, ties being broken by the node order of G as in an iterative attack
+    with analysis.degree_centrality.
+
+    Arguments:
+        G: NetworkX graph (not modified)
+        nattacks: Number of nodes to be removed (default: all)
+
+    Returns:
+        List of (node, degree) pairs, the degree being that of the node in
+        the remaining graph when it is removed.
+    """
+    if nattacks is None:
+        nattacks = G.number_of_nodes()
+    nodes, nbrs, mult = _adjacency(G)
+    degree = [d for _, d in G.degree()]
+    queue = IndexedHeap()
+    for i in range(len(nodes)):
+        queue.push(i, degree[i])
+
+    order = []
+    while queue and len(order) < nattacks:
+        i, score = queue.pop()
+        order.append((nodes[i], score))
+        for j, k in zip(nbrs[i], mult[i]):
+            if j in queue:
+                degree[j] -= k
+                queue.push(j, degree[j])
+    return order
+
+
+def _ball(nbrs, source, radius, removed):
+    """Return dict mapping the remaining nodes within radius to their distance."""
+    dist = {source: 0}
+    frontier = [source]
+    for d in range(1, radius + 1):
+        nxt = []
+        for i in frontier:
+            for j in nbrs[i]:
+                if j not in dist and not removed[j]:
+                    dist[j] = d
+                    nxt.append(j)
+        frontier = nxt
+    return dist
+
+
+def collective_influence_order(G, nattacks=None, radius=2):
+    """Return the removal order of an adaptive collective influence attack.
+
+    The collective influence of node i is
+
+        CI(i) = (k_i - 1) * sum((k_j - 1) for j at distance radius from i),
+
+    and the node with the highest CI in the remaining graph is removed at
+    each step. Only the nodes within distance radius + 1 of the removed node
+    are rescored. Ties are broken by the node order of G.
+
+    Arguments:
+        G: NetworkX graph (not modified), directed graphs are treated as
+            undirected
+        nattacks: Number of nodes to be removed (default: all)
+        radius: Radius of the ball, radius = 0 gives (k_i - 1)^2
+
+    Returns:
+        List of (node, CI) pairs, CI being that of the node in the remaining
+        graph when it is removed.
+
+    Reference:
+        Morone, F., Makse, H. Influence maximization in complex networks
+        through optimal percolation. Nature 524, 65-68 (2015).
+        https://doi.org/10.1038/nature14604
+    """
+    if nattacks is None:
+        nattacks = G.number_of_nodes()
+    nodes, nbrs, mult = _adjacency(G)
+    degree = [d for _, d in G.degree()]
+    removed = [False] * len(nodes)
+
+    visited = [0] * len(nodes)  # number of the last ball that visited each node
+    balls = itertools.count(1)
+
+    def influence(i):
+        if radius > 0 and degree[i] <= 1:
+            return 0  # leaves and isolated nodes
+        ball = next(balls)
+        frontier = [i]
+        visited[i] = ball
+        for _ in range(radius):
+            nxt = []
+            for u in frontier:
+                for v in nbrs[u]:
+                    if visited[v] != ball and not removed[v]:
+                        visited[v] = ball
+                        nxt.append(v)
+            frontier = nxt
+        total = 0
+        for j in frontier:
+            total += degree[j] - 1
+        return (degree[i] - 1) * total
+
+    queue = IndexedHeap()
+    for i in range(len(nodes)):
+        queue.push(i, influence(i))
+
+    order = []
+    while queue and len(order) < nattacks:
+        i, score = queue.pop()
+        order.append((nodes[i], score))
+        affected = _ball(nbrs, i, radius + 1, removed)
+        removed[i] = True
+        for j, k in zip(nbrs[i], mult[i]):
+            degree[j] -= k
+        for j in affected:
+            if j != i:
+                queue.push(j, influence(j))
+    return order
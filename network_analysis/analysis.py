@@ -8,9 +8,18 @@
 
 import networkx as nx
 import pandas as pd
+import functools
+import heapq
+import itertools
+import math
 import operator
 import pathlib
+from collections import namedtuple
 import matplotlib.pyplot as plt
+import network_analysis.csr as csr
+import network_analysis.rendering as rendering
+import network_analysis.storage as storage
+from network_analysis.cache import ResultCache, memoized_fingerprint
 
 
 def degree_centrality(G, weight=None):
@@ -53,6 +62,65 @@ def edge_betweenness_centrality(G, weight=None):
     return centrality
 
 
+def pivot_count(G, k=None, epsilon=None, delta=0.1):
+    """Return number of pivots needed for sampled betweenness centrality.
+
+    If epsilon is given, the number of pivots is chosen from a Hoeffding bound
+    with a union bound over all nodes, such that every normalised betweenness
+    value is within epsilon of the exact value with probability 1 - delta.
+
+    Reference:
+        Brandes, U., and Pich, C. (2007). Centrality estimation in large
+        networks. Int. J. Bifurcation and Chaos 17, 2303-2318.
+    """
+    n = G.number_of_nodes()
+    if k is None:
+        if epsilon is None:
+            raise ValueError("either k or epsilon must be given")
+        k = math.ceil(math.log(2 * n / delta) / (2 * epsilon**2))
+    return max(1, min(k, n))
+
+
+def approximate_betweenness_centrality(
+    G, weight=None, k=None, epsilon=None, delta=0.1, seed=None
+):
+    """Compute approximate betweenness centrality for the nodes.
+
+    Shortest paths are only accumulated from k randomly sampled pivot
+    sources. Give either the number of pivots k or the error bound epsilon
+    (see pivot_count).
+    """
+    k = pivot_count(G, k, epsilon, delta)
+    centrality = list(
+        nx.betweenness_centrality(G, k=k, weight=weight, seed=seed).values()
+    )
+    centrality = {n: d for n, d in zip(G.nodes, centrality)}
+    centrality = dict(
+        sorted(centrality.items(), key=operator.itemgetter(1), reverse=True)
+    )
+    return centrality
+
+
+def approximate_edge_betweenness_centrality(
+    G, weight=None, k=None, epsilon=None, delta=0.1, seed=None
+):
+    """Compute approximate betweenness centrality for the edges.
+
+    Shortest paths are only accumulated from k randomly sampled pivot
+    sources. Give either the number of pivots k or the error bound epsilon
+    (see pivot_count).
+    """
+    k = pivot_count(G, k, epsilon, delta)
+    centrality = list(
+        nx.edge_betweenness_centrality(G, k=k, weight=weight, seed=seed).values()
+    )
+    centrality = {n: d for n, d in zip(G.edges, centrality)}
+    centrality = dict(
+        sorted(centrality.items(), key=operator.itemgetter(1), reverse=True)
+    )
+    return centrality
+
+
 def closeness_centrality(G, weight=None):
     """Compute closeness centrality for the nodes."""
     centrality = list(nx.closeness_centrality(G, distance=weight).values())
@@ -80,8 +148,8 @@ def articulation_points(G):
 
 
 def largest_connected_component(G):
-    """Return size of largest connected component of the network."""
-    return len(max(nx.connected_components(G), key=len))
+    """Return size of largest connected component of the network (0 if empty)."""
+    return max((len(c) for c in nx.connected_components(G)), default=0)
 
 
 def largest_connected_component_subgraph(G):
@@ -99,9 +167,45 @@ def second_largest_connected_component(G):
         return 0
 
 
-def global_efficiency(G, weight=None):
+def efficiency_sum(G, weight=None, backend="networkx"):
+    """Return sum of reciprocal shortest path lengths over all node pairs.
+
+    Pairs of nodes in different components contribute zero, so the sum of a
+    network is the sum over its connected components.
+    """
+    if backend == "csr":
+        return csr.efficiency_sum(csr.CSRGraph.from_networkx(G, weight))
+    estimator = efficiency_estimator(backend)
+    if estimator is not None:
+        n = G.number_of_nodes()
+        return estimator(csr.CSRGraph.from_networkx(G, weight)) * n * (n - 1)
+    if backend != "networkx":
+        raise ValueError("unknown backend: {}".format(backend))
+
+    inv_d = 0
+    for node in G:
+        if weight is None:
+            dij = nx.single_source_shortest_path_length(G, node)
+        else:
+            dij = nx.single_source_dijkstra_path_length(G, node, weight=weight)
+        for d in dij.values():
+            if d != 0:
+                inv_d += 1 / d
+    return inv_d
+
+
+def global_efficiency(G, weight=None, backend="networkx"):
     """Return global efficiency of the network.
 
+    Arguments:
+        G: NetworkX graph
+        weight: If weight is not none, use weighted shortest path lengths
+        backend: Either "networkx" (pure Python traversal), "csr" (batched
+            shortest paths over a compact sparse adjacency, recommended for
+            large networks), or "sampled" or a SampledEfficiency estimator
+            (estimate from a sample of sources, see
+            approximate_global_efficiency)
+
     Reference:
         - Latora, V., and Marchiori, M. (2001). Efficient behavior of
           small-world networks. Physical Review Letters 87.
@@ -115,21 +219,223 @@ def global_efficiency(G, weight=None):
     if n < 2:
         eff = 0
     else:
-        inv_d = []
-        for node in G:
-            if weight is None:
-                dij = nx.single_source_shortest_path_length(G, node)
-            else:
-                dij = nx.single_source_dijkstra_path_length(G, node, weight=weight)
-            inv_dij = [1 / d for d in dij.values() if d != 0]
-            inv_d.extend(inv_dij)
-        eff = sum(inv_d) / (n * (n - 1))
+        eff = efficiency_sum(G, weight, backend) / (n * (n - 1))
     return eff
 
 
+# Estimate of the global efficiency with its confidence interval
+EfficiencyEstimate = namedtuple(
+    "EfficiencyEstimate", ["eff", "low", "high", "sources"]
+)
+
+
+def approximate_global_efficiency(
+    G, weight=None, epsilon=0.05, confidence=0.95, seed=None, max_sources=None
+):
+    """Return estimate of the global efficiency from a sample of sources.
+
+    Sources are sampled without replacement until the confidence interval of
+    the estimate is within a relative error epsilon, so that only a fraction
+    of the O(N (N + E)) work of global_efficiency is done on large networks.
+
+    Arguments:
+        G: NetworkX graph
+        weight: If weight is not none, use weighted shortest path lengths
+        epsilon: Relative half-width of the confidence interval to be reached
+        confidence: Confidence level of the interval
+        seed: Seed of the random sample of sources
+        max_sources: Maximum number of sources sampled (default: all)
+
+    Returns:
+        EfficiencyEstimate with the estimate eff, the bounds low and high of
+        the confidence interval and the number of sources sampled.
+    """
+    return EfficiencyEstimate(
+        *csr.sampled_efficiency(
+            csr.CSRGraph.from_networkx(G, weight),
+            epsilon,
+            confidence,
+            seed,
+            max_sources,
+        )
+    )
+
+
+class SampledEfficiency:
+    """Class for estimating global efficiency, usable as efficiency backend.
+
+    Every estimate draws its sources with a new RNG from the seed, so that
+    results are reproducible and the attack steps share the same random
+    numbers, which smooths the efficiency curves.
+    """
+    def __init__(self, epsilon=0.05, confidence=0.95, seed=None, max_sources=None):
+        """Initialise estimator.
+
+        Arguments: see approximate_global_efficiency
+        """
+        self.epsilon = epsilon
+        self.confidence = confidence
+        self.seed = seed
+        self.max_sources = max_sources
+
+    def __call__(self, graph):
+        """Return estimated global efficiency of a CSRGraph."""
+        return csr.sampled_efficiency(
+            graph, self.epsilon, self.confidence, self.seed, self.max_sources
+        )[0]
+
+
+def efficiency_estimator(backend):
+    """Return the SampledEfficiency estimator of a backend, or None if exact.
+
+    The backend "sampled" gives an estimator with the default settings.
+    """
+    if isinstance(backend, SampledEfficiency):
+        return backend
+    if backend == "sampled":
+        return SampledEfficiency()
+    return None
+
+
+def _weight_function(G, weight):
+    """Return function giving the length of an edge, as used by NetworkX."""
+    if G.is_multigraph():
+        return lambda u, v, d: min(attr.get(weight, 1) for attr in d.values())
+    return lambda u, v, data: data.get(weight, 1)
+
+
+def _shortest_path_dag(G, s, weight):
+    """Return stack, predecessors, path counts and distances from source s."""
+    S = []
+    P = {s: []}
+    sigma = {s: 1.0}
+    D = {}
+    if weight is None:  # breadth-first search
+        D[s] = 0
+        queue = [s]
+        for v in queue:
+            S.append(v)
+            dv = D[v] + 1
+            for w in G[v]:
+                if w not in D:
+                    queue.append(w)
+                    D[w] = dv
+                    sigma[w] = 0.0
+                    P[w] = []
+                if D[w] == dv:
+                    sigma[w] += sigma[v]
+                    P[w].append(v)
+    else:  # Dijkstra
+        length = _weight_function(G, weight)
+        seen = {s: 0}
+        c = itertools.count()
+        Q = [(0, next(c), s, s)]
+        while Q:
+            dist, _, pred, v = heapq.heappop(Q)
+            if v in D:
+                continue
+            sigma[v] += sigma[pred] if pred != v else 0.0
+            S.append(v)
+            D[v] = dist
+            for w, edgedata in G[v].items():
+                vw_dist = dist + length(v, w, edgedata)
+                if w not in D and (w not in seen or vw_dist < seen[w]):
+                    seen[w] = vw_dist
+                    heapq.heappush(Q, (vw_dist, next(c), v, w))
+                    sigma[w] = 0.0
+                    P[w] = [v]
+                elif vw_dist == seen[w]:
+                    sigma[w] += sigma[v]
+                    P[w].append(v)
+    return S, P, sigma, D
+
+
+def path_metrics(G, weight=None, eccentricity=False):
+    """Compute shortest path based metrics in a single traversal per source.
+
+    Betweenness, closeness and harmonic centrality, nodal efficiency and
+    optionally eccentricity are accumulated together from one Brandes-style
+    BFS (unweighted) or Dijkstra (weighted) sweep per source, instead of one
+    all-pairs sweep per metric. Betweenness and closeness are normalised as in
+    NetworkX, and closeness and harmonic centrality use incoming distances for
+    directed graphs.
+
+    Returns:
+        DataFrame indexed by node with columns "betweenness", "closeness",
+        "harmonic", "efficiency" (harmonic / (N - 1), such that its mean is
+        the global efficiency) and, if requested, "eccentricity" (largest
+        distance to a reachable node).
+
+    Reference:
+        Brandes, U. (2001). A faster algorithm for betweenness centrality.
+        J. Math. Sociol. 25, 163-177.
+    """
+    nodes = list(G)
+    n = len(nodes)
+    betweenness = dict.fromkeys(nodes, 0.0)
+    totsp = dict.fromkeys(nodes, 0.0)
+    reach = dict.fromkeys(nodes, 0)
+    harmonic = dict.fromkeys(nodes, 0.0)
+    ecc = dict.fromkeys(nodes, 0)
+
+    for s in nodes:
+        S, P, sigma, D = _shortest_path_dag(G, s, weight)
+        for t, d in D.items():
+            if t != s:
+                totsp[t] += d
+                reach[t] += 1
+                if d != 0:
+                    harmonic[t] += 1 / d
+        if eccentricity:
+            ecc[s] = max(D.values())
+        delta = dict.fromkeys(S, 0.0)
+        while S:
+            w = S.pop()
+            coeff = (1 + delta[w]) / sigma[w]
+            for v in P[w]:
+                delta[v] += sigma[v] * coeff
+            if w != s:
+                betweenness[w] += delta[w]
+
+    scale = 1 / ((n - 1) * (n - 2)) if n > 2 else 1.0
+    metrics = {
+        "betweenness": [betweenness[v] * scale for v in nodes],
+        "closeness": [
+            reach[v] ** 2 / (totsp[v] * (n - 1)) if totsp[v] > 0 else 0.0 for v in nodes
+        ],
+        "harmonic": [harmonic[v] for v in nodes],
+        "efficiency": [harmonic[v] / (n - 1) if n > 1 else 0.0 for v in nodes],
+    }
+    if eccentricity:
+        metrics["eccentricity"] = [ecc[v] for v in nodes]
+    return pd.DataFrame(metrics, index=pd.Index(nodes, tupleize_cols=False))
+
+
 class NetworkAnalysis:
-    """Class for doing network analysis on graphs."""
-    def __init__(self, G=None):
+    """Class for doing network analysis on graphs.
+
+    If a cache is given, results are stored keyed by the fingerprint of the
+    graph and the weight attribute used, and repeated calls on an unchanged
+    graph return the stored result. The fingerprint is memoized on the graph
+    and recomputed whenever the graph is changed (see
+    cache.memoized_fingerprint). Measures computed in linear time
+    (components, degree centrality and articulation points) are never
+    cached, since looking them up would not be faster.
+
+    A network loaded with read_binary stays in its memory-mapped CSR form:
+    the global efficiency with a CSR-based backend and its approximation are
+    computed from the arrays (without caching), and the NetworkX graph is
+    only built when another measure, or the graph attribute, is used.
+    """
+    def __init__(self, G=None, cache=None):
+        """Initialise analysis.
+
+        Arguments:
+            G: NetworkX graph to be analysed
+            cache: ResultCache, or true for an in-memory ResultCache with the
+                default size (default: no caching)
+        """
+        self.binary = None  # storage.BinaryGraph loaded by read_binary
         self.graph = None
         if G:
             if (
@@ -138,6 +444,11 @@ class NetworkAnalysis:
                 or isinstance(G, nx.MultiGraph)
             ):
                 self.graph = G
+        if cache is True:
+            cache = ResultCache()
+        elif cache is False:
+            cache = None
+        self.cache = cache
 
     def read_edgelist(
         self,
@@ -160,34 +471,105 @@ class NetworkAnalysis:
             encoding=encoding,
         )
 
-    def read_adjacency(self, filename, index_col=0, create_using=nx.Graph):
-        """Load network from CSV file with interdependency matrix."""
+    def read_adjacency(
+        self, filename, index_col=0, create_using=nx.Graph, chunksize=None
+    ):
+        """Load network from CSV file with interdependency matrix.
+
+        The matrix is read in chunks of rows, keeping only the nonzero
+        entries (see storage.read_adjacency_csv).
+        """
         if pathlib.Path(filename).suffix == ".csv":
-            df = pd.read_csv(filename, index_col=index_col)
             # need to make sure dependency is interpreted as j --> i
-            self.graph = nx.from_pandas_adjacency(
-                df.transpose(), create_using=create_using
+            self.graph = storage.read_adjacency_csv(
+                filename, index_col, create_using, chunksize
             )
         else:
             self.graph = None
 
+    def read_binary(self, path, mmap_mode="r"):
+        """Load network from a directory in binary CSR format.
+
+        The arrays are memory-mapped (see storage.read_binary), so that the
+        network opens without reading them, and the NetworkX graph is only
+        built from them on first use of the graph attribute.
+
+        Arguments:
+            path: Directory written by write_binary
+            mmap_mode: Memory-map mode of the arrays (None to read them into memory)
+        """
+        self.graph = None
+        self.binary = storage.read_binary(path, mmap_mode)
+
+    def write_binary(self, path, weights=()):
+        """Write network to a directory in binary CSR format.
+
+        Arguments:
+            path: Directory (created if missing)
+            weights: Edge weight attributes to be stored; other edge
+                attributes and multiedge keys are not stored
+        """
+        storage.write_binary(self.graph, path, weights)
+
+    @property
+    def graph(self):
+        """NetworkX graph analysed, built from the binary graph on first use."""
+        if self.__graph is None and self.binary is not None:
+            self.__graph = storage.to_networkx(self.binary)
+        return self.__graph
+
+    @graph.setter
+    def graph(self, graph):
+        self.__graph = graph
+        self.binary = None
+
     def degree_centrality(self):
         return degree_centrality(self.graph)
 
     def eigenvector_centrality(self, weight=None):
-        return eigenvector_centrality(self.graph, weight=weight)
+        return self.__cached("eigenvector_centrality", weight, eigenvector_centrality)
 
     def betweenness_centrality(self, weight=None):
-        return betweenness_centrality(self.graph, weight=weight)
+        return self.__cached("betweenness_centrality", weight, betweenness_centrality)
 
     def edge_betweenness_centrality(self, weight=None):
-        return edge_betweenness_centrality(self.graph, weight=weight)
+        return self.__cached(
+            "edge_betweenness_centrality", weight, edge_betweenness_centrality
+        )
+
+    def approximate_betweenness_centrality(
+        self, weight=None, k=None, epsilon=None, delta=0.1, seed=None
+    ):
+        return self.__cached(
+            "approximate_betweenness_centrality",
+            weight,
+            approximate_betweenness_centrality,
+            seed is not None,  # results are only reproducible with a seed
+            k=k,
+            epsilon=epsilon,
+            delta=delta,
+            seed=seed,
+        )
+
+    def approximate_edge_betweenness_centrality(
+        self, weight=None, k=None, epsilon=None, delta=0.1, seed=None
+    ):
+        return self.__cached(
+            "approximate_edge_betweenness_centrality",
+            weight,
+            approximate_edge_betweenness_centrality,
+            seed is not None,
+            k=k,
+            epsilon=epsilon,
+            delta=delta,
+            seed=seed,
+        )
 
     def closeness_centrality(self, distance=None):
-        return closeness_centrality(self.graph, weight=distance)
+        return self.__cached("closeness_centrality", distance, closeness_centrality)
 
     def pagerank(self, weight=None):
-        return pagerank(self.graph, weight=None)
+        return self.__cached("pagerank", weight, pagerank)
 
     def articulation_points(self):
         return articulation_points(self.graph)
@@ -201,14 +583,98 @@ class NetworkAnalysis:
     def second_largest_connected_component(self):
         return second_largest_connected_component(self.graph)
 
-    def global_efficiency(self, weight=None):
-        return global_efficiency(self.graph, weight=weight)
+    def global_efficiency(self, weight=None, backend="networkx"):
+        if self.binary is not None and backend != "networkx":
+            graph = storage.to_csr(self.binary, weight)
+            estimator = efficiency_estimator(backend)
+            if estimator is not None:
+                return estimator(graph)
+            if backend != "csr":
+                raise ValueError("unknown backend: {}".format(backend))
+            return csr.global_efficiency(graph)
+        # the exact backends give the same result, so they share the cache entry
+        return self.__cached(
+            "global_efficiency",
+            weight,
+            functools.partial(global_efficiency, backend=backend),
+            efficiency_estimator(backend) is None,
+        )
+
+    def approximate_global_efficiency(
+        self, weight=None, epsilon=0.05, confidence=0.95, seed=None, max_sources=None
+    ):
+        if self.binary is not None:
+            return EfficiencyEstimate(
+                *csr.sampled_efficiency(
+                    storage.to_csr(self.binary, weight),
+                    epsilon,
+                    confidence,
+                    seed,
+                    max_sources,
+                )
+            )
+        return self.__cached(
+            "approximate_global_efficiency",
+            weight,
+            approximate_global_efficiency,
+            seed is not None,
+            epsilon=epsilon,
+            confidence=confidence,
+            seed=seed,
+            max_sources=max_sources,
+        )
+
+    def path_metrics(self, weight=None, eccentricity=False):
+        return self.__cached(
+            "path_metrics", weight, path_metrics, eccentricity=eccentricity
+        )
+
+    def __cached(self, method, weight, function, cacheable=True, **params):
+        """Return function(graph, weight, **params), cached if enabled."""
+        if weight is None:
+            compute = functools.partial(function, self.graph, **params)
+        else:
+            compute = functools.partial(function, self.graph, weight, **params)
+        if self.cache is None or not cacheable:
+            return compute()
+        fingerprint = memoized_fingerprint(self.graph, weight)
+        return self.cache.cached(
+            method, self.graph, compute, weight, fingerprint, **params
+        )
 
     def draw(
-        self, layout=None, node_size=300, with_labels=True, figsize=(12, 12), dpi=300
+        self,
+        layout=None,
+        node_size=300,
+        with_labels=True,
+        figsize=(12, 12),
+        dpi=300,
+        lod=False,
+        rasterized=False,
     ):
+        """Draw network with the edges in one path collection.
+
+        Arguments:
+            layout: Function returning node positions, e.g. nx.spring_layout
+                (default: node coordinates, see rendering.node_positions)
+            lod: If true, thin the edges and nodes to the output resolution
+            rasterized: If true, rasterize the edges and nodes in vector output
+        """
         _, ax = plt.subplots(figsize=figsize, dpi=dpi)
-        pos = layout(self.graph)
-        nx.draw_networkx(
-            self.graph, pos=pos, ax=ax, node_size=node_size, with_labels=with_labels
+        pos = None if layout is None else layout(self.graph)
+        rendering.draw_network(
+            self.graph,
+            pos,
+            ax=ax,
+            node_size=node_size,
+            figsize=figsize,
+            dpi=dpi,
+            lod=lod,
+            rasterized=rasterized,
         )
+        if with_labels:
+            if pos is None:
+                xy = rendering.node_positions(self.graph)
+                pos = dict(zip(self.graph, xy))
+            nx.draw_networkx_labels(self.graph, pos=pos, ax=ax)
+        return ax
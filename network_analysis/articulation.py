@@ -0,0 +1,146 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Provides articulation points ranked by damage for adaptive attacks.
+
+Removing a node only changes the block-cut tree of the connected component
+that contained it. The ArticulationPointQueue keeps, for every component,
+its articulation points and the sizes of the parts each of them splits off,
+found in a single depth-first search, and repeats the search only in the
+pieces of the component that was attacked.
+"""
+
+import heapq
+import itertools
+import networkx as nx
+from network_analysis.adaptive import IndexedHeap
+
+
+def component_articulation_points(G, root):
+    """Return the component of root and the damage of its articulation points.
+
+    The damage of an articulation point is the number of nodes separated
+    from the largest remaining part of the component when it is removed.
+
+    Arguments:
+        G: Undirected NetworkX graph
+        root: Node of the component to be searched
+
+    Returns:
+        members, damage: set of nodes in the component and dict mapping each
+            articulation point to its damage
+    """
+    disc = {root: 0}
+    low = {root: 0}
+    size = {root: 1}
+    pieces = {}  # node -> sizes of the child subtrees split off by it
+    stack = [(root, None, iter(G[root]))]
+    while stack:
+        v, parent, nbrs = stack[-1]
+        for w in nbrs:
+            if w == v or w == parent:
+                continue
+            if w in disc:
+                low[v] = min(low[v], disc[w])
+                continue
+            disc[w] = low[w] = len(disc)
+            size[w] = 1
+            stack.append((w, v, iter(G[w])))
+            break
+        else:
+            stack.pop()
+            if parent is not None:
+                low[parent] = min(low[parent], low[v])
+                size[parent] += size[v]
+                if low[v] >= disc[parent]:
+                    pieces.setdefault(parent, []).append(size[v])
+
+    n = size[root]
+    damage = {}
+    for v, sizes in pieces.items():
+        if v == root and len(sizes) < 2:
+            continue  # the root is only an articulation point with two subtrees
+        rest = n - 1 - sum(sizes)  # part containing the parent of v
+        damage[v] = n - 1 - max(max(sizes), rest)
+    return set(disc), damage
+
+
+class ArticulationPointQueue:
+    """Class for ranking the articulation points of a network under attack."""
+    def __init__(self, G):
+        """Initialise queue.
+
+        Arguments:
+            G: MaskedGraph of an undirected network, attacked through the queue
+        """
+        if G.graph.is_directed():
+            raise nx.NetworkXNotImplemented("not implemented for directed type")
+        self.masked = G
+        self.graph = G.graph
+        self.__n = len(G.node_list)
+        self.__queue = IndexedHeap()
+        self.__ids = itertools.count()
+        self.__members = {}  # component id -> set of nodes
+        self.__points = {}  # component id -> articulation points
+        self.__component = {}  # node -> component id
+        self.__add_components(set(self.graph))
+
+    def __bool__(self):
+        return len(self.__queue) > 0
+
+    def pop(self):
+        """Return the (node, damage) pair of the most damaging articulation point.
+
+        Ties are broken by the node order of the original graph.
+        """
+        node, priority = self.__queue.pop()
+        return node, priority // self.__n
+
+    def remove_node(self, node):
+        """Remove node from the graph and update its component."""
+        cid = self.__component.pop(node)
+        members = self.__members.pop(cid)
+        for point in self.__points.pop(cid):
+            if point in self.__queue:
+                self.__queue.remove(point)
+        members.discard(node)
+        self.masked.remove_node(node)
+        self.__add_components(members)
+
+    def largest_connected_component(self):
+        sizes = heapq.nlargest(1, map(len, self.__members.values()))
+        return sizes[0] if sizes else 0
+
+    def second_largest_connected_component(self):
+        sizes = heapq.nlargest(2, map(len, self.__members.values()))
+        return sizes[1] if len(sizes) > 1 else 0
+
+    def __add_components(self, nodes):
+        index = self.masked.node_index
+        while nodes:
+            members, damage = component_articulation_points(
+                self.graph, next(iter(nodes))
+            )
+            nodes -= members
+            cid = next(self.__ids)
+            self.__members[cid] = members
+            self.__points[cid] = list(damage)
+            for node in members:
+                self.__component[node] = cid
+            for point, value in damage.items():
+                # encode the node order in the priority to break ties
+                rank = self.__n - 1 - index[point]
+                self.__queue.push(point, value * self.__n + rank)
+
+
+def articulation_point_damage(G):
+    """Return dict mapping the articulation points of G to their damage."""
+    if G.is_directed():
+        raise nx.NetworkXNotImplemented("not implemented for directed type")
+    damage = {}
+    for members in nx.connected_components(G):
+        damage.update(component_articulation_points(G, next(iter(members)))[1])
+    return damage
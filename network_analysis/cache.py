@@ -0,0 +1,165 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Provides caching of analysis results keyed by graph fingerprints.
+
+A fingerprint is a hash of the graph type, the nodes and edges in iteration
+order and the values of the weight attribute, so it changes whenever the
+structure or the weights relevant to a result change. Computing it takes a
+pass over the graph, so callers looking up results repeatedly for the same
+graph pass a memoized fingerprint (see memoized_fingerprint). Results
+are kept in memory with LRU eviction and, optionally, in a directory on
+disk shared between processes and sessions.
+"""
+
+import collections
+import copy
+import hashlib
+import os
+import pathlib
+import pickle
+
+# Key of the fingerprints memoized in the __networkx_cache__ dict of a graph
+FINGERPRINT_CACHE_KEY = "network_analysis_fingerprints"
+
+
+def graph_fingerprint(G, weight=None):
+    """Return hex digest identifying the structure of G and its weights.
+
+    Arguments:
+        G: NetworkX graph
+        weight: Edge attribute included in the fingerprint, if any
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((type(G).__name__, G.is_directed(), G.is_multigraph())).encode())
+    for n in G:
+        h.update(repr(n).encode())
+        h.update(b"\0")
+    h.update(b"\1")
+    if weight is None:
+        edges = G.edges()
+    else:
+        edges = G.edges(data=weight)
+    for edge in edges:
+        h.update(repr(edge).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def memoized_fingerprint(G, weight=None):
+    """Return graph_fingerprint(G, weight), reusing it while G is unchanged.
+
+    NetworkX (3.3 and later) clears the __networkx_cache__ dict of a graph on
+    every change made through the graph methods, so a fingerprint stored
+    there is recomputed after nodes or edges are added or removed. Edge
+    attributes assigned in place do not clear it, so the weights are compared
+    with the stored ones on every call. The fingerprint is computed every
+    time for graphs without __networkx_cache__ and for frozen graphs, such as
+    views, whose base graph may change underneath them.
+
+    Arguments:
+        G: NetworkX graph
+        weight: Edge attribute included in the fingerprint, if any
+    """
+    memo = getattr(G, "__networkx_cache__", None)
+    if memo is None or getattr(G, "frozen", False):
+        return graph_fingerprint(G, weight)
+    weights = None if weight is None else [w for *_, w in G.edges(data=weight)]
+    fingerprints = memo.setdefault(FINGERPRINT_CACHE_KEY, {})
+    entry = fingerprints.get(weight)
+    if entry is None or entry[0] != weights:
+        entry = (weights, graph_fingerprint(G, weight))
+        fingerprints[weight] = entry
+    return entry[1]
+
+
+class ResultCache:
+    """Class for caching analysis results in memory and optionally on disk."""
+    def __init__(self, maxsize=128, path=None):
+        """Initialise cache.
+
+        Arguments:
+            maxsize: Maximum number of results kept in memory
+            path: Directory for storing results on disk (created if missing),
+                or None for an in-memory cache
+        """
+        self.maxsize = max(1, maxsize)
+        self.path = None if path is None else pathlib.Path(path)
+        self.hits = 0
+        self.misses = 0
+        self.__results = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self.__results)
+
+    def key(self, method, G, weight=None, fingerprint=None, **params):
+        """Return the cache key of a method applied to G with params.
+
+        The fingerprint of G with weight is computed unless it is given.
+        """
+        if fingerprint is None:
+            fingerprint = graph_fingerprint(G, weight)
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((method, sorted(params.items()))).encode())
+        h.update(fingerprint.encode())
+        return h.hexdigest()
+
+    def get(self, key):
+        """Return the result stored under key, or None if there is none."""
+        if key in self.__results:
+            self.__results.move_to_end(key)
+            return self.__results[key]
+        if self.path is not None:
+            filename = self.path / (key + ".pkl")
+            if filename.exists():
+                with open(filename, "rb") as f:
+                    result = pickle.load(f)
+                self.__store(key, result)
+                return result
+        return None
+
+    def put(self, key, result):
+        """Store result under key."""
+        self.__store(key, result)
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            tmp = self.path / (key + ".pkl.tmp")
+            with open(tmp, "wb") as f:
+                pickle.dump(result, f)
+            os.replace(tmp, self.path / (key + ".pkl"))
+
+    def clear(self):
+        """Remove all results from memory (results on disk are kept)."""
+        self.__results.clear()
+
+    def cached(self, method, G, compute, weight=None, fingerprint=None, **params):
+        """Return the result of compute(), reusing a cached one if G is unchanged.
+
+        Arguments:
+            method: Name of the method, part of the key
+            G: NetworkX graph the result is computed for
+            compute: Function computing the result
+            weight: Edge attribute the result depends on, if any
+            fingerprint: Fingerprint of G with weight, if already known
+            params: Other parameters the result depends on
+        """
+        key = self.key(method, G, weight, fingerprint, **params)
+        result = self.get(key)
+        if result is None:
+            self.misses += 1
+            result = compute()
+            self.put(key, result)
+        else:
+            self.hits += 1
+        # copy the container, so that callers adding, removing or replacing
+        # entries do not alter the cache (the entries are numbers or labels)
+        return copy.copy(result)
+
+    def __store(self, key, result):
+        self.__results[key] = result
+        self.__results.move_to_end(key)
+        while len(self.__results) > self.maxsize:
+            self.__results.popitem(last=False)
@@ -0,0 +1,299 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Provides campaigns of attack scenarios run on a process pool.
+
+A campaign is a list of scenarios, each running one NetworkDismantling
+attack on one network. The networks are placed once in shared memory as
+CSR arrays (see storage.graph_arrays, with one weight array per edge
+attribute used), from which every worker builds its own graph once. The
+attacks run on NetworkX graphs, so a worker holds a full graph per network,
+about as large as an unpickled copy. What the shared arrays save is sending
+a pickled graph to every worker, which is about 40 times larger than the
+node labels and array names sent instead. Scenarios are submitted in order
+of decreasing estimated cost, so that slow attacks start first and the
+cheap ones fill the pool around them, and the results are collected into
+one tidy table.
+
+Example:
+    python -m network_analysis.campaign campaign.json
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import pathlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+import networkx as nx
+import pandas as pd
+import network_analysis.analysis as network
+import network_analysis.storage as storage
+from network_analysis.dismantling import NetworkDismantling
+
+# Attack scenario; kwargs are passed on to the iter_* method of the attack
+Scenario = namedtuple(
+    "Scenario", ["name", "network", "method", "weight", "seed", "kwargs"]
+)
+
+# columns of the campaign results
+COLUMNS = [
+    "scenario",
+    "network",
+    "method",
+    "weight",
+    "seed",
+    "step",
+    "metric",
+    "value",
+]
+
+# attacks drawing their removal order from a random seed
+RANDOM_METHODS = {"random_attack", "edge_random_attack"}
+
+# cost of ranking the targets of an attack step relative to one
+# single-source shortest path search (m operations)
+RANKING_COST = {
+    "node_iterative_centrality_attack": lambda n, m: n,
+    "edge_iterative_centrality_attack": lambda n, m: n,
+    "edge_initial_centrality_attack": lambda n, m: 0,  # ranked once up front
+    "articulation_point_targeted_attack": lambda n, m: 1,
+    "adaptive_degree_attack": lambda n, m: 0,
+    "collective_influence_attack": lambda n, m: 0,
+    "random_attack": lambda n, m: 0,
+    "edge_random_attack": lambda n, m: 0,
+}
+
+
+def scenario_matrix(networks, methods, weights=(None,), seeds=(None,), **kwargs):
+    """Return the scenarios of every combination of network, method and weight.
+
+    Random attacks are repeated for every seed, the other attacks are run
+    once per combination.
+
+    Arguments:
+        networks: Names of the networks
+        methods: Names of NetworkDismantling attacks, e.g. "random_attack",
+            or (method, kwargs) pairs with options for the attack
+        weights: Edge weight attributes (None for unweighted)
+        seeds: Seeds of the random attacks
+        kwargs: Options passed to every attack, e.g. nattacks=100
+    """
+    scenarios = []
+    for net, method, weight in itertools.product(networks, methods, weights):
+        options = dict(kwargs)
+        if not isinstance(method, str):
+            method, extra = method
+            options.update(extra)
+        for seed in seeds if method in RANDOM_METHODS else [None]:
+            name = "{}/{}/{}".format(net, method, weight or "unweighted")
+            if seed is not None:
+                name += "/{}".format(seed)
+            scenarios.append(Scenario(name, net, method, weight, seed, options))
+    return scenarios
+
+
+def estimated_cost(scenario, n, m):
+    """Return the estimated cost of a scenario on a network of n nodes and m edges.
+
+    The cost is counted in single-source shortest path searches over the
+    steps of the attack: n per step for the global efficiency (unless it is
+    disabled) and, for the iterative centrality attacks, n per recomputed
+    ranking. Weighted searches are counted log(n) times as expensive.
+    """
+    kwargs = scenario.kwargs
+    steps = max(1, kwargs.get("nattacks", 1)) + 1
+    ranking = RANKING_COST.get(scenario.method, lambda n, m: n)(n, m)
+    ranking /= max(1, kwargs.get("batch_size", 1))
+    if kwargs.get("incremental"):
+        ranking /= 2  # only the touched component is recomputed
+    measure = n if kwargs.get("efficiency", True) else 0
+    measure /= max(1, kwargs.get("recompute_every", 1))
+    cost = steps * (ranking + measure + 1) * (m + n)
+    if scenario.weight is not None:
+        cost *= math.log(max(n, 2))
+    return cost
+
+
+class SharedGraph:
+    """Class for placing a network in shared memory as CSR arrays."""
+    def __init__(self, G, weights=()):
+        """Initialise shared graph.
+
+        Arguments:
+            G: NetworkX graph (node and edge attributes other than the
+                weights are not shared)
+            weights: Edge weight attributes to be shared
+        """
+        nodes, arrays = storage.graph_arrays(G, weights)
+        self.blocks = []
+        self.spec = {
+            "nodes": nodes,
+            "directed": G.is_directed(),
+            "multigraph": G.is_multigraph(),
+            "arrays": {},
+        }
+        for key, array in arrays.items():
+            block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+            self.blocks.append(block)
+            self.spec["arrays"][key] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        """Release the shared memory."""
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+def attach_graph(spec):
+    """Return the NetworkX graph of a shared graph specification.
+
+    The graph is built straight from the shared arrays, which are not copied.
+    """
+    blocks = []
+    arrays = {}
+    try:
+        for key, (name, shape, dtype) in spec["arrays"].items():
+            blocks.append(shared_memory.SharedMemory(name=name))
+            arrays[key] = np.ndarray(shape, dtype, buffer=blocks[-1].buf)
+        return storage.graph_from_arrays(
+            spec["nodes"], arrays, spec["directed"], spec["multigraph"]
+        )
+    finally:
+        arrays.clear()  # release the buffers before closing the blocks
+        for block in blocks:
+            block.close()
+
+
+def run_scenario(dismantling, scenario):
+    """Run a scenario and return its results as a tidy DataFrame."""
+    kwargs = dict(scenario.kwargs)
+    if isinstance(kwargs.get("centrality_method"), str):
+        kwargs["centrality_method"] = getattr(network, kwargs["centrality_method"])
+    if scenario.method in RANDOM_METHODS:
+        kwargs["seed"] = scenario.seed
+    attack = getattr(dismantling, "iter_" + scenario.method)
+    rows = []
+    for record in attack(weight=scenario.weight, **kwargs):
+        for metric in ["lcc", "slcc", "eff"]:
+            rows.append(scenario[:5] + (record.step, metric, getattr(record, metric)))
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+# Networks of the campaign workers, attached once per process
+_campaign_specs = None
+_campaign_networks = {}
+
+
+def _init_campaign_worker(specs):
+    global _campaign_specs
+    _campaign_specs = specs
+    _campaign_networks.clear()
+
+
+def _run_campaign_scenario(scenario):
+    if scenario.network not in _campaign_networks:
+        G = attach_graph(_campaign_specs[scenario.network])
+        _campaign_networks[scenario.network] = NetworkDismantling(G)
+    return run_scenario(_campaign_networks[scenario.network], scenario)
+
+
+def run_campaign(networks, scenarios, nworkers=None):
+    """Run a campaign of attack scenarios.
+
+    Arguments:
+        networks: Dictionary mapping network names to NetworkX graphs
+        scenarios: List of Scenario, e.g. from scenario_matrix
+        nworkers: Number of worker processes (default: number of CPUs)
+
+    Returns:
+        DataFrame with columns scenario, network, method, weight, seed, step,
+        metric ("lcc", "slcc" or "eff") and value, in scenario order.
+    """
+    if nworkers is None:
+        nworkers = os.cpu_count() or 1
+    nworkers = max(1, min(nworkers, len(scenarios)))
+    tables = [None] * len(scenarios)
+    if nworkers == 1:
+        dismantling = {name: NetworkDismantling(G) for name, G in networks.items()}
+        for i, scenario in enumerate(scenarios):
+            tables[i] = run_scenario(dismantling[scenario.network], scenario)
+        return pd.concat(tables, ignore_index=True)
+
+    shared = {}
+    try:
+        for name in {s.network for s in scenarios}:
+            weights = {s.weight for s in scenarios if s.network == name}
+            shared[name] = SharedGraph(networks[name], weights)
+        specs = {name: graph.spec for name, graph in shared.items()}
+
+        def cost(i):
+            G = networks[scenarios[i].network]
+            return estimated_cost(scenarios[i], len(G), G.number_of_edges())
+
+        order = sorted(range(len(scenarios)), key=cost, reverse=True)
+        with ProcessPoolExecutor(
+            max_workers=nworkers,
+            initializer=_init_campaign_worker,
+            initargs=(specs,),
+        ) as pool:
+            futures = {
+                pool.submit(_run_campaign_scenario, scenarios[i]): i for i in order
+            }
+            for future in as_completed(futures):
+                tables[futures[future]] = future.result()
+    finally:
+        for graph in shared.values():
+            graph.close()
+    return pd.concat(tables, ignore_index=True)
+
+
+def read_network(filename):
+    """Read a network from a GraphML or GML file."""
+    if pathlib.Path(filename).suffix == ".gml":
+        return nx.read_gml(filename)
+    return nx.read_graphml(filename)
+
+
+def main(argv=None):
+    """Run a campaign described by a JSON file.
+
+    The file holds "networks" (mapping names to GraphML or GML files),
+    "methods" (attack names, or [name, options] pairs), and optionally
+    "weights", "seeds", "options" (passed to every attack), "nworkers" and
+    "output" (CSV file, default campaign.csv).
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("config", help="JSON file describing the campaign")
+    parser.add_argument("--nworkers", type=int, default=None)
+    parser.add_argument("--output", default=None, help="CSV file for the results")
+    args = parser.parse_args(argv)
+
+    with open(args.config, "r") as f:
+        config = json.load(f)
+    networks = {
+        name: read_network(filename) for name, filename in config["networks"].items()
+    }
+    scenarios = scenario_matrix(
+        list(networks),
+        config["methods"],
+        config.get("weights", [None]),
+        config.get("seeds", [None]),
+        **config.get("options", {}),
+    )
+    nworkers = args.nworkers or config.get("nworkers")
+    results = run_campaign(networks, scenarios, nworkers)
+    results.to_csv(args.output or config.get("output", "campaign.csv"), index=False)
+
+
+if __name__ == "__main__":
+    main()
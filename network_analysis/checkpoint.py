@@ -0,0 +1,111 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Provides checkpointing of attack runs.
+
+A checkpoint is a directory holding the state needed to resume an attack
+(state.pkl: the step records including the removal sequence, the RNG state
+and the pending centrality ranking) and the step results so far
+(results.npz: one array per metric). Both files are replaced atomically, so
+a run killed at any point leaves the last complete checkpoint behind, and
+the results of partial runs can be read with read_attack_results.
+"""
+
+import os
+import pathlib
+import pickle
+import numpy as np
+
+STATE_FILE = "state.pkl"
+RESULTS_FILE = "results.npz"
+
+# step record fields stored in the results file
+RESULTS_INT = ["step", "lcc", "slcc", "number_of_nodes", "number_of_edges"]
+RESULTS_FLOAT = ["eff", "centrality", "elapsed"]
+RESULTS_BOOL = ["interpolated"]
+
+
+class AttackCheckpoint:
+    """Class for saving and loading the state of an attack run."""
+    def __init__(self, path, every=100):
+        """Initialise checkpoint.
+
+        Arguments:
+            path: Directory for the checkpoint files (created if missing)
+            every: Number of attack steps between checkpoints
+        """
+        self.path = pathlib.Path(path)
+        self.every = max(1, every)
+
+    def load(self, method):
+        """Return the saved state of an attack, or None if there is none.
+
+        Raises ValueError if the checkpoint was written by another method.
+        """
+        filename = self.path / STATE_FILE
+        if not filename.exists():
+            return None
+        with open(filename, "rb") as f:
+            state = pickle.load(f)
+        if state["method"] != method:
+            raise ValueError(
+                "checkpoint {} belongs to {}, not {}".format(
+                    self.path, state["method"], method
+                )
+            )
+        return state
+
+    def save(self, state):
+        """Save the state of an attack and its step results."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        records = state["records"]
+        results = {}
+        for name in RESULTS_INT:
+            results[name] = np.array([getattr(r, name) for r in records], dtype=int)
+        for name in RESULTS_FLOAT:
+            values = [getattr(r, name) for r in records]
+            results[name] = np.array(
+                [np.nan if v is None else v for v in values], dtype=float
+            )
+        for name in RESULTS_BOOL:
+            results[name] = np.array([getattr(r, name) for r in records], dtype=bool)
+        results["nattacks"] = results.pop("step")
+        self.__replace(RESULTS_FILE, lambda f: np.savez(f, **results))
+        self.__replace(STATE_FILE, lambda f: pickle.dump(state, f))
+
+    def __replace(self, name, write):
+        tmp = self.path / (name + ".tmp")
+        with open(tmp, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path / name)
+
+
+def read_attack_results(path):
+    """Return the step results of a (possibly partial) attack run.
+
+    Arguments:
+        path: Checkpoint directory or results file
+
+    Returns:
+        Dictionary with arrays "nattacks", "lcc", "slcc", "eff", "centrality"
+        (NaN where undefined), "number_of_nodes", "number_of_edges",
+        "elapsed" and "interpolated" (true where lcc, slcc and eff were
+        interpolated), with one entry per step completed.
+    """
+    path = pathlib.Path(path)
+    if path.is_dir():
+        path = path / RESULTS_FILE
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def as_checkpoint(checkpoint):
+    """Return checkpoint as an AttackCheckpoint (paths use the defaults)."""
+    if checkpoint is None or isinstance(checkpoint, AttackCheckpoint):
+        return checkpoint
+    return AttackCheckpoint(checkpoint)
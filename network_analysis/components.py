@@ -0,0 +1,185 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Provides component-local caching of centrality and efficiency.
+
+Removing a node or an edge only changes the connected component that
+contained it. The ComponentCache keeps unnormalised centrality scores and
+efficiency sums for every component of an undirected graph, recomputes them
+only for the pieces of the component that was touched, and assembles the
+network-wide results from the cached parts.
+"""
+
+import heapq
+import itertools
+import operator
+import networkx as nx
+import network_analysis.analysis as network
+
+
+def _betweenness(G, weight):
+    return nx.betweenness_centrality(G, normalized=False, weight=weight)
+
+
+def _betweenness_scale(n, m):
+    # undirected raw values are halved by NetworkX when not normalised
+    return 2 / ((n - 1) * (n - 2)) if n > 2 else 1.0
+
+
+def _edge_betweenness(G, weight):
+    return nx.edge_betweenness_centrality(G, normalized=False, weight=weight)
+
+
+def _edge_betweenness_scale(n, m):
+    return 2 / (n * (n - 1)) if n > 1 else 1.0
+
+
+def _degree(G, weight):
+    return dict(G.degree())
+
+
+def _degree_scale(n, m):
+    return 1 / (n - 1) if n > 1 else 1.0
+
+
+def _closeness(G, weight):
+    return nx.closeness_centrality(G, distance=weight)
+
+
+def _closeness_scale(n, m):
+    # Wasserman-Faust scaling with the size of the whole network
+    return (m - 1) / (n - 1) if n > 1 else 0.0
+
+
+# centrality methods with component-local raw scores and the factor that
+# turns a raw score into the network-wide value, given the number of nodes
+# in the network (n) and in the component (m)
+LOCAL_CENTRALITY = {
+    network.betweenness_centrality: (_betweenness, _betweenness_scale),
+    network.edge_betweenness_centrality: (_edge_betweenness, _edge_betweenness_scale),
+    network.degree_centrality: (_degree, _degree_scale),
+    network.closeness_centrality: (_closeness, _closeness_scale),
+}
+
+
+class ComponentCache:
+    """Class for caching per-component results during an attack."""
+    def __init__(
+        self,
+        G,
+        weight=None,
+        centrality_method=None,
+        edges=False,
+        backend="networkx",
+    ):
+        """Initialise cache.
+
+        Arguments:
+            G: MaskedGraph of an undirected network, attacked through the cache
+            weight: If weight is not none, use weighted measures
+            centrality_method: One of the methods in LOCAL_CENTRALITY, or None
+                if no centrality is needed
+            edges: True if centrality_method ranks edges
+            backend: Backend used for efficiency (see analysis.efficiency_sum)
+        """
+        if G.graph.is_directed():
+            raise ValueError("component cache requires an undirected graph")
+        if centrality_method is not None and centrality_method not in LOCAL_CENTRALITY:
+            raise ValueError(
+                "centrality method cannot be computed per component: {}".format(
+                    getattr(centrality_method, "__name__", centrality_method)
+                )
+            )
+        self.masked = G
+        self.graph = G.graph
+        self.weight = weight
+        self.edges = edges
+        self.backend = backend
+        self.__local = LOCAL_CENTRALITY.get(centrality_method)
+        self.__ids = itertools.count()
+        self.__members = {}  # component id -> set of nodes
+        self.__scores = {}  # component id -> raw centrality scores
+        self.__eff = {}  # component id -> efficiency sum
+        self.__component = {}  # node -> component id
+        self.__add_components(self.graph)
+
+    def remove_node(self, node):
+        """Remove node from the graph and update the touched component."""
+        cid = self.__component.pop(node)
+        members = self.__drop(cid)
+        members.discard(node)
+        self.masked.remove_node(node)
+        self.__add_components(self.graph.subgraph(members))
+
+    def remove_edge(self, *edge):
+        """Remove edge (u, v[, key]) from the graph and update its component."""
+        members = self.__drop(self.__component[edge[0]])
+        self.masked.remove_edge(*edge)
+        self.__add_components(self.graph.subgraph(members))
+
+    def largest_connected_component(self):
+        sizes = heapq.nlargest(1, map(len, self.__members.values()))
+        return sizes[0] if sizes else 0
+
+    def second_largest_connected_component(self):
+        sizes = heapq.nlargest(2, map(len, self.__members.values()))
+        return sizes[1] if len(sizes) > 1 else 0
+
+    def global_efficiency(self):
+        n = self.graph.number_of_nodes()
+        if n < 2:
+            return 0
+        return sum(self.__eff.values()) / (n * (n - 1))
+
+    def centrality(self):
+        """Return network-wide centrality sorted in descending order."""
+        n = self.graph.number_of_nodes()
+        _, scale = self.__local
+        factor = {
+            cid: scale(n, len(members)) for cid, members in self.__members.items()
+        }
+        centrality = {}
+        if self.edges:
+            if self.graph.is_multigraph():
+                keys = self.graph.edges(keys=True)
+            else:
+                keys = self.graph.edges()
+            for edge in keys:
+                cid = self.__component[edge[0]]
+                scores = self.__scores[cid]
+                if edge in scores:
+                    value = scores[edge]
+                else:  # same edge, opposite orientation
+                    value = scores[(edge[1], edge[0]) + tuple(edge[2:])]
+                centrality[edge] = factor[cid] * value
+        else:
+            for node in self.graph:
+                cid = self.__component[node]
+                centrality[node] = factor[cid] * self.__scores[cid][node]
+        return dict(
+            sorted(centrality.items(), key=operator.itemgetter(1), reverse=True)
+        )
+
+    def __drop(self, cid):
+        self.__scores.pop(cid, None)
+        self.__eff.pop(cid)
+        return self.__members.pop(cid)
+
+    def __add_components(self, G):
+        for members in nx.connected_components(G):
+            cid = next(self.__ids)
+            self.__members[cid] = members
+            for node in members:
+                self.__component[node] = cid
+            # a plain copy is much faster to traverse than a subgraph view
+            sub = self.graph.subgraph(members).copy()
+            if len(members) == 1:
+                self.__eff[cid] = 0.0
+            else:
+                self.__eff[cid] = network.efficiency_sum(sub, self.weight, self.backend)
+            if self.__local is not None:
+                raw, _ = self.__local
+                self.__scores[cid] = raw(sub, self.weight)
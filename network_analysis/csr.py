@@ -0,0 +1,297 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Provides compressed sparse row (CSR) representation of networks."""
+
+import statistics
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse import csgraph
+
+# Upper bound on the number of distances held in memory per block of sources
+BLOCK_ELEMENTS = 2**22
+
+
+class CSRGraph:
+    """Class for representing a network as a compact CSR adjacency.
+
+    Nodes are mapped to contiguous integer ids in the iteration order of the
+    original graph. Parallel edges are merged, keeping the smallest weight,
+    and self-loops are dropped since they never lie on a shortest path.
+    """
+    def __init__(self, nodes, indptr, indices, weights=None, directed=False):
+        """Initialise CSR graph.
+
+        Arguments:
+            nodes: list of node labels, the position gives the integer id
+            indptr: row offsets into indices (length N + 1)
+            indices: column indices (target node ids)
+            weights: edge weights aligned with indices, or None if unweighted
+            directed: true if the adjacency is directed
+        """
+        self.nodes = list(nodes)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.weights = None if weights is None else np.asarray(weights, dtype=float)
+        self.directed = directed
+
+    @classmethod
+    def from_networkx(cls, G, weight=None):
+        """Convert a NetworkX graph into CSR form.
+
+        Missing weights default to 1 as in the NetworkX shortest path
+        algorithms.
+        """
+        nodes, src, dst, wgt = edge_arrays(G, weight)
+        return cls.from_edges(nodes, src, dst, wgt, G.is_directed())
+
+    @classmethod
+    def from_edges(cls, nodes, src, dst, weights=None, directed=False):
+        """Build CSR graph from arrays of source and target node ids.
+
+        For undirected graphs each edge is given once and stored in both
+        directions.
+        """
+        n = len(nodes)
+        if weights is None:
+            wgt = np.ones(len(src), dtype=float)
+        else:
+            wgt = np.asarray(weights, dtype=float)
+        if not directed:
+            src, dst = np.concatenate((src, dst)), np.concatenate((dst, src))
+            wgt = np.concatenate((wgt, wgt))
+
+        keep = src != dst
+        src, dst, wgt = src[keep], dst[keep], wgt[keep]
+
+        # sort by (source, target, weight) and keep the lightest parallel edge
+        order = np.lexsort((wgt, dst, src))
+        src, dst, wgt = src[order], dst[order], wgt[order]
+        if len(src) > 0:
+            first = np.ones(len(src), dtype=bool)
+            first[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+            src, dst, wgt = src[first], dst[first], wgt[first]
+
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+        return cls(nodes, indptr, dst, None if weights is None else wgt, directed)
+
+    def number_of_nodes(self):
+        return len(self.nodes)
+
+    def number_of_edges(self):
+        nnz = len(self.indices)
+        return nnz if self.directed else nnz // 2
+
+    def to_scipy(self):
+        """Return the adjacency as a SciPy sparse array."""
+        n = self.number_of_nodes()
+        if self.weights is None:
+            data = np.ones(len(self.indices), dtype=float)
+        else:
+            data = self.weights
+        return sp.csr_array((data, self.indices, self.indptr), shape=(n, n))
+
+
+class EdgeSet:
+    """Class for building CSR graphs of subsets of a fixed set of edges.
+
+    The edges are sorted once as in CSRGraph.from_edges, so that the CSR
+    graph left after removing any nodes and edges is built in linear time,
+    giving the same result as from_edges on the remaining edges.
+    """
+    def __init__(self, n, src, dst, weights=None, directed=False):
+        """Initialise edge set.
+
+        Arguments:
+            n: Number of nodes
+            src, dst: Arrays of source and target node ids of the edges
+            weights: Edge weights, or None if unweighted
+            directed: true if the edges are directed
+        """
+        self.n = n
+        self.directed = directed
+        self.weighted = weights is not None
+        eid = np.arange(len(src))
+        if weights is None:
+            wgt = np.ones(len(src), dtype=float)
+        else:
+            wgt = np.asarray(weights, dtype=float)
+        if not directed:
+            src, dst = np.concatenate((src, dst)), np.concatenate((dst, src))
+            wgt = np.concatenate((wgt, wgt))
+            eid = np.concatenate((eid, eid))
+        keep = src != dst
+        order = np.lexsort((wgt[keep], dst[keep], src[keep]))
+        self.src = src[keep][order]
+        self.dst = dst[keep][order]
+        self.wgt = wgt[keep][order]
+        self.eid = eid[keep][order]
+
+    def subgraph(self, node_alive, edge_alive=None, nodes=None):
+        """Return CSRGraph of the alive nodes and the alive edges between them.
+
+        Arguments:
+            node_alive: Boolean mask of the nodes
+            edge_alive: Boolean mask of the edges (default: all alive)
+            nodes: Labels of all nodes (default: node ids)
+        """
+        keep = node_alive[self.src] & node_alive[self.dst]
+        if edge_alive is not None:
+            keep &= edge_alive[self.eid]
+        src, dst, wgt = self.src[keep], self.dst[keep], self.wgt[keep]
+        if len(src) > 0:
+            first = np.ones(len(src), dtype=bool)
+            first[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+            src, dst, wgt = src[first], dst[first], wgt[first]
+        ids = np.cumsum(node_alive) - 1
+        alive = np.flatnonzero(node_alive)
+        labels = alive.tolist() if nodes is None else [nodes[i] for i in alive]
+        indptr = np.zeros(len(labels) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ids[src], minlength=len(labels)), out=indptr[1:])
+        return CSRGraph(
+            labels, indptr, ids[dst], wgt if self.weighted else None, self.directed
+        )
+
+
+def edge_arrays(G, weight=None):
+    """Return nodes and arrays of source ids, target ids and edge weights.
+
+    The arrays follow the edge order of G.edges(). The weights are None if
+    weight is None.
+    """
+    nodes = list(G)
+    index = {n: i for i, n in enumerate(nodes)}
+    m = G.number_of_edges()
+    src = np.empty(m, dtype=np.int64)
+    dst = np.empty(m, dtype=np.int64)
+    if weight is None:
+        wgt = None
+        for i, (u, v) in enumerate(G.edges()):
+            src[i] = index[u]
+            dst[i] = index[v]
+    else:
+        wgt = np.empty(m, dtype=float)
+        for i, (u, v, w) in enumerate(G.edges(data=weight, default=1)):
+            src[i] = index[u]
+            dst[i] = index[v]
+            wgt[i] = w
+    return nodes, src, dst, wgt
+
+
+def _reciprocal_distances(csr, block_size=None):
+    """Yield blocks of sources and their reciprocal shortest path lengths.
+
+    Shortest paths are computed with batched BFS (unweighted) or Dijkstra
+    (weighted) over blocks of sources, so that memory stays bounded.
+    """
+    n = csr.number_of_nodes()
+    if block_size is None:
+        block_size = max(1, min(n, BLOCK_ELEMENTS // max(1, n)))
+
+    adjacency = csr.to_scipy()
+    for start in range(0, n, block_size):
+        sources = np.arange(start, min(start + block_size, n))
+        dist = csgraph.shortest_path(
+            adjacency,
+            method="D",
+            directed=csr.directed,
+            unweighted=csr.weights is None,
+            indices=sources,
+        )
+        # unreachable pairs (inf) give zero, zero distances are excluded
+        with np.errstate(divide="ignore"):
+            np.reciprocal(dist, out=dist)
+        dist[np.isinf(dist)] = 0.0
+        yield sources, dist
+
+
+def efficiency_sum(csr, block_size=None):
+    """Return the sum of reciprocal shortest path lengths over all node pairs.
+
+    Each block of sources is reduced with NumPy before the next one is
+    started (see _reciprocal_distances).
+    """
+    if csr.number_of_nodes() < 2:
+        return 0.0
+    total = 0.0
+    for _, inverse in _reciprocal_distances(csr, block_size):
+        total += inverse.sum()
+    return float(total)
+
+
+def nodal_efficiency_sums(csr, block_size=None):
+    """Return array of the sums of reciprocal shortest path lengths per source.
+
+    The sum over the sources of a connected component (weakly, for directed
+    graphs) is the contribution of the component to efficiency_sum.
+    """
+    sums = np.zeros(csr.number_of_nodes())
+    if len(sums) < 2:
+        return sums
+    for sources, inverse in _reciprocal_distances(csr, block_size):
+        sums[sources] = inverse.sum(axis=1)
+    return sums
+
+
+def global_efficiency(csr, block_size=None):
+    """Return global efficiency of a network in CSR form."""
+    n = csr.number_of_nodes()
+    if n < 2:
+        return 0
+    return efficiency_sum(csr, block_size) / (n * (n - 1))
+
+
+def sampled_efficiency(
+    csr, epsilon=0.05, confidence=0.95, seed=None, max_sources=None, block_size=None
+):
+    """Return sampled estimate of the global efficiency and its confidence interval.
+
+    Sources are drawn without replacement in blocks of growing size, and the
+    efficiency is estimated by the mean nodal efficiency of the sources. After
+    each block a normal confidence interval (with finite population
+    correction) is computed, and sampling stops once its half-width is within
+    epsilon times the estimate. The estimate is exact once all nodes have been
+    sampled.
+
+    Returns:
+        eff, low, high, number of sources sampled
+    """
+    n = csr.number_of_nodes()
+    if n < 2:
+        return 0.0, 0.0, 0.0, 0
+    if max_sources is None:
+        max_sources = n
+    max_sources = max(2, min(max_sources, n))
+    if block_size is None:
+        block_size = max(1, BLOCK_ELEMENTS // n)
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    adjacency = csr.to_scipy()
+    sources = np.random.default_rng(seed).permutation(n)[:max_sources]
+    values = np.empty(0)
+    while True:
+        k = len(values)
+        batch = sources[k : k + min(max(16, k), block_size)]
+        dist = csgraph.shortest_path(
+            adjacency,
+            method="D",
+            directed=csr.directed,
+            unweighted=csr.weights is None,
+            indices=batch,
+        )
+        with np.errstate(divide="ignore"):
+            np.reciprocal(dist, out=dist)
+        dist[np.isinf(dist)] = 0.0
+        values = np.concatenate((values, dist.sum(axis=1) / (n - 1)))
+
+        k = len(values)
+        eff = float(values.mean())
+        half = 0.0
+        if k < n:
+            half = float(z * values.std(ddof=1) * np.sqrt((n - k) / (k * (n - 1))))
+        if half <= epsilon * eff or k >= max_sources:
+            return eff, eff - half, eff + half, k
@@ -6,11 +6,73 @@
 
 """Provides methods for network dismantling."""
 
-import copy
+import functools
+import itertools
+import os
+import time
 import numpy as np
-import random as rd
 import matplotlib.pyplot as plt
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 import network_analysis.analysis as network
+from network_analysis.articulation import ArticulationPointQueue
+from network_analysis.adaptive import adaptive_degree_order, collective_influence_order
+from network_analysis.percolation import (
+    node_percolation,
+    edge_percolation,
+    edge_percolation_efficiency,
+)
+from network_analysis.profiling import profiled
+from network_analysis.components import ComponentCache
+from network_analysis.graphview import MaskedGraph
+from network_analysis.hazard import SpatialIndex, hazard_sweep
+from network_analysis.checkpoint import as_checkpoint, read_attack_results
+
+
+# Record of one attack step, step 0 being the intact network
+AttackStep = namedtuple(
+    "AttackStep",
+    [
+        "step",  # number of attacks carried out
+        "removed",  # node or edge removed in this step (None at step 0)
+        "centrality",  # centrality of the removed element, if ranked
+        "lcc",  # size of largest connected component
+        "slcc",  # size of second-largest connected component
+        "eff",  # global efficiency
+        "number_of_nodes",
+        "number_of_edges",
+        "elapsed",  # wall-clock seconds since the start of the attack
+        "interpolated",  # true if lcc, slcc and eff were interpolated
+    ],
+    defaults=[False],
+)
+
+
+# maximum number of markers per curve in plot_attack_results
+MAX_MARKERS = 100
+
+
+def lcc_fraction_below(fraction):
+    """Return stop criterion met once lcc / N drops below fraction."""
+
+    def criterion(step, initial):
+        return step.lcc < fraction * initial.number_of_nodes
+
+    return criterion
+
+
+def efficiency_below(threshold, relative=False):
+    """Return stop criterion met once the efficiency drops below threshold.
+
+    If relative is true, the threshold is a fraction of the initial efficiency.
+    """
+
+    def criterion(step, initial):
+        if relative:
+            return step.eff < threshold * initial.eff
+        return step.eff < threshold
+
+    return criterion
 
 
 def plot_attack_results(
@@ -23,18 +85,49 @@ def plot_attack_results(
     attack_labels=["targeted", "random"],
     filename=None,
     dpi=300,
+    rasterized=False,
+    max_markers=MAX_MARKERS,
+    metric="eff",
 ):
-    """Function for plotting attack results."""
+    """Function for plotting attack results.
+
+    E_target may also be the checkpoint directory or results file of a
+    targeted attack, in which case the given metric ("lcc", "slcc" or "eff")
+    is read from it; ylabel is only the axis label. Partial runs are plotted
+    over the steps completed so far. Long attacks are drawn with at most
+    max_markers markers per curve, and rasterized if rasterized is true.
+    """
+    if isinstance(E_target, (str, os.PathLike)):
+        if metric not in ("lcc", "slcc", "eff"):
+            raise ValueError("unknown metric: {}".format(metric))
+        E_target = read_attack_results(E_target)[metric]
+
     _, ax = plt.subplots()
 
-    ax.plot(nattacks, E_target, "-bo", label=attack_labels[0])
-    ax.plot(nattacks, E_random_avg, "--r^", label=attack_labels[1])
+    markevery = max(1, -(-len(nattacks) // max_markers))
+    ax.plot(
+        nattacks[: len(E_target)],
+        E_target,
+        "-bo",
+        label=attack_labels[0],
+        markevery=markevery,
+        rasterized=rasterized,
+    )
+    ax.plot(
+        nattacks,
+        E_random_avg,
+        "--r^",
+        label=attack_labels[1],
+        markevery=markevery,
+        rasterized=rasterized,
+    )
     ax.fill_between(
         nattacks,
         E_random_avg - E_random_std,
         np.clip(E_random_avg + E_random_std, a_min=0.0, a_max=1.0),
         alpha=0.2,
         color="gray",
+        rasterized=rasterized,
     )
     plt.xlabel(xlabel)
     plt.ylabel(ylabel)
@@ -52,15 +145,112 @@ def plot_attack_results(
 
 
 class NetworkDismantling:
-    """Class for carrying out network dismantling."""
+    """Class for carrying out network dismantling.
+
+    Every attack is available as a generator (iter_*) yielding one AttackStep
+    record per step, starting with the intact network at step 0, and as a
+    method returning the complete lists. Both accept stop criteria, e.g.
+    stop=lcc_fraction_below(0.1), that end the attack early.
+    """
     def __init__(self, G):
         self.graph = G
+        self.__index = None
+
+    def get_graph(self, weight=None, profiler=None):
+        """Return a removal-mask view of the graph to be attacked."""
+        with profiled(profiler, "get_graph"):
+            return MaskedGraph(self.graph, weight)
+
+    def spatial_index(self):
+        """Return the SpatialIndex of the graph, built on first use."""
+        if self.__index is None:
+            self.__index = SpatialIndex(self.graph)
+        return self.__index
+
+    def iter_node_iterative_centrality_attack(
+        self,
+        nattacks=1,
+        weight=None,
+        centrality_method=network.betweenness_centrality,
+        backend="networkx",
+        centrality_kwargs=None,
+        stable_top=None,
+        incremental=False,
+        batch_size=1,
+        recompute_every=1,
+        stop=None,
+        checkpoint=None,
+        graph_attacked=None,
+        profiler=None,
+    ):
+        """Yield the steps of an iterative targeted attack on nodes.
+
+        See node_iterative_centrality_attack for the arguments. The attack is
+        carried out on graph_attacked (a MaskedGraph) if given.
+        """
+        if nattacks < 1:
+            nattacks = 1
+        if nattacks > len(self.graph.nodes):
+            nattacks = len(self.graph.nodes)
 
-    def get_graph(self):
-        return copy.deepcopy(self.graph)
+        if graph_attacked is None:
+            graph_attacked = self.get_graph(weight, profiler)
+        if centrality_kwargs is None:
+            centrality_kwargs = {}
+        if incremental and centrality_kwargs:
+            raise ValueError("centrality_kwargs is not supported with incremental")
+        checkpoint, state = _resume(
+            checkpoint,
+            "node_iterative_centrality_attack",
+            ranking=_Ranking(stable_top, batch_size),
+        )
+        _replay(state, graph_attacked.remove_node)
+
+        cache = None
+        if incremental:
+            cache = ComponentCache(
+                graph_attacked, weight, centrality_method, False, backend
+            )
+            rank = cache.centrality
+            remove = cache.remove_node
+        else:
+            rank = functools.partial(
+                centrality_method, graph_attacked.graph, weight, **centrality_kwargs
+            )
+            remove = graph_attacked.remove_node
+
+        targets = _ranked_targets(state["ranking"], rank)
+        yield from _attack_steps(
+            graph_attacked,
+            nattacks,
+            targets,
+            remove,
+            weight,
+            backend,
+            stop,
+            cache,
+            checkpoint=checkpoint,
+            profiler=profiler,
+            state=state,
+            recompute_every=recompute_every,
+        )
 
     def node_iterative_centrality_attack(
-        self, nattacks=1, weight=None, centrality_method=network.betweenness_centrality
+        self,
+        nattacks=1,
+        weight=None,
+        centrality_method=network.betweenness_centrality,
+        backend="networkx",
+        centrality_kwargs=None,
+        stable_top=None,
+        incremental=False,
+        batch_size=1,
+        recompute_every=1,
+        materialize=False,
+        stop=None,
+        checkpoint=None,
+        profiler=None,
+        return_interpolated=False,
     ):
         """Carry out iterative targeted attack on nodes.
 
@@ -68,41 +258,162 @@ class NetworkDismantling:
             nattacks: Number of attacks to be carried out
             weight: If weight is not none, use weighted centrality and efficiency measures
             centrality_method: Measure used for assessing the centrality of the nodes
+            backend: Backend used for global efficiency ("networkx", "csr",
+                "sampled" or an analysis.SampledEfficiency estimator)
+            centrality_kwargs: Extra keyword arguments for centrality_method, e.g.
+                dict(k=200, seed=1) with approximate_betweenness_centrality
+            stable_top: If given, reuse the ranking for the next stable_top - 1
+                attacks whenever the top stable_top entries agree with those of
+                the previous ranking (useful with sampled centralities)
+            incremental: If true, cache centrality and efficiency per connected
+                component and only recompute the component touched by each
+                attack (undirected graphs, see components.LOCAL_CENTRALITY)
+            batch_size: Number of top-ranked elements removed before the
+                centrality is recomputed
+            recompute_every: Compute lcc, slcc and eff only every
+                recompute_every attacks (and after the last one), interpolating
+                linearly in between; the interpolated steps are marked in the
+                records of the iter_* generator and in the checkpoint results
+            materialize: If true, return the attacked graph as a new graph instead
+                of a read-only view of the original network
+            stop: Stop criterion, or list of criteria, ending the attack early
+            checkpoint: Checkpoint directory or AttackCheckpoint; the attack is
+                resumed from it if it exists and saved to it periodically
+            profiler: AttackProfiler recording the time of each phase of each
+                step, the graph size and the memory use (see profiling)
+            return_interpolated: If true, also return the list of the
+                interpolated flags of the steps (see recompute_every)
 
         Reference:
             Petter Holme, Beom Jun Kim, Chang No Yoon, and Seung Kee Han
             Phys. Rev. E 65, 056109. https://arxiv.org/abs/cond-mat/0202410v1
         """
+        # removal masks on the network
+        graph_attacked = self.get_graph(weight, profiler)
+        steps = self.iter_node_iterative_centrality_attack(
+            nattacks,
+            weight,
+            centrality_method,
+            backend,
+            centrality_kwargs,
+            stable_top,
+            incremental,
+            batch_size,
+            recompute_every,
+            stop,
+            checkpoint,
+            graph_attacked,
+            profiler,
+        )
+        interpolated = []
+        nodes_attacked, lcc, slcc, eff, centrality = _collect(steps, interpolated)
+        graph_attacked = _attacked_graph(graph_attacked, materialize)
+        if return_interpolated:
+            return (
+                graph_attacked,
+                nodes_attacked,
+                lcc,
+                slcc,
+                eff,
+                centrality,
+                interpolated,
+            )
+        return graph_attacked, nodes_attacked, lcc, slcc, eff, centrality
+
+    def iter_edge_iterative_centrality_attack(
+        self,
+        nattacks=1,
+        weight=None,
+        centrality_method=network.edge_betweenness_centrality,
+        backend="networkx",
+        centrality_kwargs=None,
+        stable_top=None,
+        incremental=False,
+        batch_size=1,
+        recompute_every=1,
+        stop=None,
+        checkpoint=None,
+        graph_attacked=None,
+        profiler=None,
+    ):
+        """Yield the steps of an iterative targeted attack on edges.
+
+        See edge_iterative_centrality_attack for the arguments. The attack is
+        carried out on graph_attacked (a MaskedGraph) if given.
+        """
         if nattacks < 1:
             nattacks = 1
         if nattacks > len(self.graph.edges):
             nattacks = len(self.graph.edges)
 
-        graph_attacked = self.get_graph()  # work on a local copy of the network
-        nodes_attacked = [0]  # list with coordinates of attacked nodes
-        centrality = [0]  # list with centralities of attacked nodes
+        if graph_attacked is None:
+            graph_attacked = self.get_graph(weight, profiler)
+        if centrality_kwargs is None:
+            centrality_kwargs = {}
+        if incremental and centrality_kwargs:
+            raise ValueError("centrality_kwargs is not supported with incremental")
+        checkpoint, state = _resume(
+            checkpoint,
+            "edge_iterative_centrality_attack",
+            ranking=_Ranking(stable_top, batch_size),
+        )
 
-        lcc = [network.largest_connected_component(graph_attacked)]
-        slcc = [network.second_largest_connected_component(graph_attacked)]
-        eff = [network.global_efficiency(graph_attacked, weight)]
+        def remove_edge(edge):
+            if incremental:
+                graph_attacked.remove_edge(*edge)
+            else:
+                graph_attacked.remove_edge(edge[0], edge[1])
 
-        for _ in range(nattacks):
-            bc = centrality_method(graph_attacked, weight)
-            node = list(bc.keys())[0]
-            graph_attacked.remove_node(node)
-            nodes_attacked.append(node)
-            lcc.append(network.largest_connected_component(graph_attacked))
-            slcc.append(network.second_largest_connected_component(graph_attacked))
-            eff.append(network.global_efficiency(graph_attacked, weight))
-            centrality.append(list(bc.values())[0])
+        _replay(state, remove_edge)
 
-        return graph_attacked, nodes_attacked, lcc, slcc, eff, centrality
+        cache = None
+        if incremental:
+            cache = ComponentCache(
+                graph_attacked, weight, centrality_method, True, backend
+            )
+            rank = cache.centrality
+
+            def remove(edge):
+                cache.remove_edge(*edge)
+
+        else:
+            rank = functools.partial(
+                centrality_method, graph_attacked.graph, weight, **centrality_kwargs
+            )
+            remove = remove_edge
+
+        targets = _ranked_targets(state["ranking"], rank)
+        yield from _attack_steps(
+            graph_attacked,
+            nattacks,
+            targets,
+            remove,
+            weight,
+            backend,
+            stop,
+            cache,
+            checkpoint=checkpoint,
+            profiler=profiler,
+            state=state,
+            recompute_every=recompute_every,
+        )
 
     def edge_iterative_centrality_attack(
         self,
         nattacks=1,
         weight=None,
         centrality_method=network.edge_betweenness_centrality,
+        backend="networkx",
+        centrality_kwargs=None,
+        stable_top=None,
+        incremental=False,
+        batch_size=1,
+        recompute_every=1,
+        materialize=False,
+        stop=None,
+        checkpoint=None,
+        profiler=None,
+        return_interpolated=False,
     ):
         """Carry out iterative targeted attack on edges.
 
@@ -110,124 +421,1289 @@ class NetworkDismantling:
             nattacks: Number of attacks to be carried out
             weight: If weight is not none, use weighted centrality and efficiency measures
             centrality_method: Measure used for assessing the centrality of the nodes
+            backend: Backend used for global efficiency ("networkx", "csr",
+                "sampled" or an analysis.SampledEfficiency estimator)
+            centrality_kwargs: Extra keyword arguments for centrality_method, e.g.
+                dict(k=200, seed=1) with approximate_betweenness_centrality
+            stable_top: If given, reuse the ranking for the next stable_top - 1
+                attacks whenever the top stable_top entries agree with those of
+                the previous ranking (useful with sampled centralities)
+            incremental: If true, cache centrality and efficiency per connected
+                component and only recompute the component touched by each
+                attack (undirected graphs, see components.LOCAL_CENTRALITY)
+            batch_size: Number of top-ranked elements removed before the
+                centrality is recomputed
+            recompute_every: Compute lcc, slcc and eff only every
+                recompute_every attacks (and after the last one), interpolating
+                linearly in between; the interpolated steps are marked in the
+                records of the iter_* generator and in the checkpoint results
+            materialize: If true, return the attacked graph as a new graph instead
+                of a read-only view of the original network
+            stop: Stop criterion, or list of criteria, ending the attack early
+            checkpoint: Checkpoint directory or AttackCheckpoint; the attack is
+                resumed from it if it exists and saved to it periodically
+            profiler: AttackProfiler recording the time of each phase of each
+                step, the graph size and the memory use (see profiling)
+            return_interpolated: If true, also return the list of the
+                interpolated flags of the steps (see recompute_every)
 
         Reference:
             Bellingeri, M., Bevacqua, D., Scotognella, F. et al. A comparative analysis of
             link removal strategies in real complex weighted networks.
             Sci Rep 10, 3911 (2020). https://doi.org/10.1038/s41598-020-60298-7
         """
+        # removal masks on the network
+        graph_attacked = self.get_graph(weight, profiler)
+        steps = self.iter_edge_iterative_centrality_attack(
+            nattacks,
+            weight,
+            centrality_method,
+            backend,
+            centrality_kwargs,
+            stable_top,
+            incremental,
+            batch_size,
+            recompute_every,
+            stop,
+            checkpoint,
+            graph_attacked,
+            profiler,
+        )
+        interpolated = []
+        edges_attacked, lcc, slcc, eff, centrality = _collect(steps, interpolated)
+        graph_attacked = _attacked_graph(graph_attacked, materialize)
+        if return_interpolated:
+            return (
+                graph_attacked,
+                edges_attacked,
+                lcc,
+                slcc,
+                eff,
+                centrality,
+                interpolated,
+            )
+        return graph_attacked, edges_attacked, lcc, slcc, eff, centrality
+
+    def iter_edge_initial_centrality_attack(
+        self,
+        nattacks=1,
+        weight=None,
+        centrality_method=network.edge_betweenness_centrality,
+        backend="networkx",
+        centrality_kwargs=None,
+        percolation=False,
+        reverse_efficiency=False,
+        stop=None,
+        checkpoint=None,
+        graph_attacked=None,
+        profiler=None,
+    ):
+        """Yield the steps of a targeted attack on edges by initial ranking.
+
+        See edge_initial_centrality_attack for the arguments. The attack is
+        carried out on graph_attacked (a MaskedGraph) if given.
+        """
         if nattacks < 1:
             nattacks = 1
         if nattacks > len(self.graph.edges):
             nattacks = len(self.graph.edges)
 
-        graph_attacked = self.get_graph()  # work on a local copy of the topology
-        edges_attacked = [0]  # list with coordinates of attacked edges
-        centrality = [0]  # list with centralities of attacked nodes
+        if graph_attacked is None:
+            graph_attacked = self.get_graph(weight, profiler)
+        if centrality_kwargs is None:
+            centrality_kwargs = {}
+        checkpoint, state = _resume(checkpoint, "edge_initial_centrality_attack")
+
+        # rank the edges once, before any of them is removed
+        with profiled(profiler, "order"):
+            ranking = centrality_method(
+                graph_attacked.graph, weight, **centrality_kwargs
+            )
+            order = list(itertools.islice(ranking.items(), nattacks))
+
+        def remove(edge):
+            graph_attacked.remove_edge(*edge)
 
-        lcc = [network.largest_connected_component(graph_attacked)]
-        slcc = [network.second_largest_connected_component(graph_attacked)]
-        eff = [network.global_efficiency(graph_attacked, weight)]
+        _replay(state, remove)
+        done = max(0, len(state["records"]) - 1)
 
-        for _ in range(nattacks):
-            bc = centrality_method(graph_attacked, weight)
-            edge = list(bc.keys())[0]
-            graph_attacked.remove_edge(edge[0], edge[1])
-            edges_attacked.append(edge)
-            lcc.append(network.largest_connected_component(graph_attacked))
-            slcc.append(network.second_largest_connected_component(graph_attacked))
-            eff.append(network.global_efficiency(graph_attacked, weight))
-            centrality.append(list(bc.values())[0])
+        edges = [edge for edge, _ in order]
+        curves = None
+        if percolation:
+            with profiled(profiler, "percolation"):
+                curves = edge_percolation(self.graph, edges)
+                if reverse_efficiency:
+                    eff = edge_percolation_efficiency(self.graph, edges, weight)
+                    curves = curves + (eff,)
+        yield from _attack_steps(
+            graph_attacked,
+            len(order),
+            iter(order[done:]),
+            remove,
+            weight,
+            backend,
+            stop,
+            curves=curves,
+            checkpoint=checkpoint,
+            profiler=profiler,
+            state=state,
+        )
 
+    def edge_initial_centrality_attack(
+        self,
+        nattacks=1,
+        weight=None,
+        centrality_method=network.edge_betweenness_centrality,
+        backend="networkx",
+        centrality_kwargs=None,
+        percolation=False,
+        reverse_efficiency=False,
+        materialize=False,
+        stop=None,
+        checkpoint=None,
+        profiler=None,
+    ):
+        """Carry out targeted attack on edges in the order of their initial ranking.
+
+        The centrality is computed once for the intact network and the edges
+        are removed in decreasing order of it, so the removal order is known
+        up front and the lcc, slcc and efficiency curves can be obtained by
+        reverse percolation instead of after every removal.
+
+        Arguments:
+            nattacks: Number of attacks to be carried out
+            weight: If weight is not none, use weighted centrality and
+                efficiency measures
+            centrality_method: Measure used for ranking the edges
+            backend: Backend used for global efficiency ("networkx", "csr",
+                "sampled" or an analysis.SampledEfficiency estimator)
+            centrality_kwargs: Extra keyword arguments for centrality_method
+            percolation: If true, track lcc and slcc by reverse union-find percolation
+            reverse_efficiency: If true (with percolation), compute the efficiency
+                by adding the removed edges back in reverse order while updating
+                all shortest path lengths (exact, needs 8 N^2 bytes, see
+                percolation.edge_percolation_efficiency)
+            materialize: If true, return the attacked graph as a new graph instead
+                of a read-only view of the original network
+            stop: Stop criterion, or list of criteria, ending the attack early
+            checkpoint: Checkpoint directory or AttackCheckpoint; the attack is
+                resumed from it if it exists and saved to it periodically
+            profiler: AttackProfiler recording the time of each phase of each
+                step, the graph size and the memory use (see profiling)
+
+        Reference:
+            Bellingeri, M., Bevacqua, D., Scotognella, F. et al. A comparative
+            analysis of link removal strategies in real complex weighted networks.
+            Sci Rep 10, 3911 (2020). https://doi.org/10.1038/s41598-020-60298-7
+        """
+        # removal masks on the network
+        graph_attacked = self.get_graph(weight, profiler)
+        steps = self.iter_edge_initial_centrality_attack(
+            nattacks,
+            weight,
+            centrality_method,
+            backend,
+            centrality_kwargs,
+            percolation,
+            reverse_efficiency,
+            stop,
+            checkpoint,
+            graph_attacked,
+            profiler,
+        )
+        edges_attacked, lcc, slcc, eff, centrality = _collect(steps)
+        graph_attacked = _attacked_graph(graph_attacked, materialize)
         return graph_attacked, edges_attacked, lcc, slcc, eff, centrality
 
-    def articulation_point_targeted_attack(self, nattacks=1, weight=None):
+    def iter_articulation_point_targeted_attack(
+        self,
+        nattacks=1,
+        weight=None,
+        backend="networkx",
+        percolation=False,
+        adaptive=False,
+        efficiency=True,
+        stop=None,
+        checkpoint=None,
+        graph_attacked=None,
+        profiler=None,
+    ):
+        """Yield the steps of an articulation point-targeted attack.
+
+        See articulation_point_targeted_attack for the arguments. The attack
+        is carried out on graph_attacked (a MaskedGraph) if given.
+        """
+        if graph_attacked is None:
+            graph_attacked = self.get_graph(weight, profiler)
+        G = graph_attacked.graph
+
+        if nattacks < 1:
+            nattacks = 1
+        if nattacks > len(G.nodes):
+            nattacks = len(G.nodes)
+
+        if adaptive:
+            checkpoint, state = _resume(
+                checkpoint, "adaptive_articulation_point_targeted_attack"
+            )
+            _replay(state, graph_attacked.remove_node)
+            queue = ArticulationPointQueue(graph_attacked)
+            yield from _attack_steps(
+                graph_attacked,
+                nattacks,
+                _queued_targets(queue),
+                queue.remove_node,
+                weight,
+                backend,
+                stop,
+                components=queue,
+                checkpoint=checkpoint,
+                profiler=profiler,
+                state=state,
+                efficiency=efficiency,
+            )
+            return
+
+        ap = network.articulation_points(G)
+        order = ap[:nattacks]
+        curves = None
+        if percolation:
+            with profiled(profiler, "percolation"):
+                curves = node_percolation(self.graph, order)
+        checkpoint, state = _resume(checkpoint, "articulation_point_targeted_attack")
+        _replay(state, graph_attacked.remove_node)
+        done = max(0, len(state["records"]) - 1)
+        yield from _attack_steps(
+            graph_attacked,
+            nattacks,
+            ((node, None) for node in order[done:]),
+            graph_attacked.remove_node,
+            weight,
+            backend,
+            stop,
+            curves=curves,
+            checkpoint=checkpoint,
+            profiler=profiler,
+            state=state,
+            efficiency=efficiency,
+        )
+
+    def articulation_point_targeted_attack(
+        self,
+        nattacks=1,
+        weight=None,
+        backend="networkx",
+        percolation=False,
+        adaptive=False,
+        efficiency=True,
+        materialize=False,
+        stop=None,
+        checkpoint=None,
+        profiler=None,
+    ):
         """Carry out brute-force articulation point-targeted attack.
 
+        By default the articulation points of the intact network are removed
+        in a static order. In adaptive mode, the articulation point of the
+        current network that separates the most nodes from the largest
+        remaining part of its component is removed at each step, and only
+        the component that was attacked is searched again (the attack ends
+        when no articulation points are left).
+
         Arguments:
             nattacks: Number of attacks to be carried out
+            backend: Backend used for global efficiency ("networkx", "csr",
+                "sampled" or an analysis.SampledEfficiency estimator)
+            percolation: If true, track lcc and slcc by reverse union-find percolation
+                (not needed in adaptive mode, which tracks the components)
+            adaptive: If true, choose each articulation point by its damage
+            efficiency: If false, skip the global efficiency (reported as NaN),
+                which dominates the cost of attacks on large networks
+            materialize: If true, return the attacked graph as a new graph instead
+                of a read-only view of the original network
+            stop: Stop criterion, or list of criteria, ending the attack early
+            checkpoint: Checkpoint directory or AttackCheckpoint; the attack is
+                resumed from it if it exists and saved to it periodically
+            profiler: AttackProfiler recording the time of each phase of each
+                step, the graph size and the memory use (see profiling)
 
         Reference:
             Tian, L., Bashan, A., Shi, DN. et al. Articulation points in complex networks.
             Nat Commun 8, 14223 (2017). https://doi.org/10.1038/ncomms14223
         """
-        graph_attacked = self.get_graph()
-        nodes_attacked = []  # list with coordinates of attacked nodes
+        # removal masks on the network
+        graph_attacked = self.get_graph(weight, profiler)
+        steps = self.iter_articulation_point_targeted_attack(
+            nattacks,
+            weight,
+            backend,
+            percolation,
+            adaptive,
+            efficiency,
+            stop,
+            checkpoint,
+            graph_attacked,
+            profiler,
+        )
+        nodes_attacked, lcc, slcc, eff, _ = _collect(steps)
+        graph_attacked = _attacked_graph(graph_attacked, materialize)
+        return graph_attacked, nodes_attacked[1:], lcc, slcc, eff
 
-        ap = network.articulation_points(graph_attacked)
+    def iter_random_attack(
+        self,
+        nattacks=1,
+        weight=None,
+        backend="networkx",
+        percolation=False,
+        seed=None,
+        stop=None,
+        checkpoint=None,
+        graph_attacked=None,
+        profiler=None,
+    ):
+        """Yield the steps of a random attack on nodes.
 
+        See random_attack for the arguments. The attack is carried out on
+        graph_attacked (a MaskedGraph) if given.
+        """
         if nattacks < 1:
             nattacks = 1
-        if nattacks > len(graph_attacked.nodes):
-            nattacks = len(graph_attacked.nodes, weight)
+        if nattacks > len(self.graph.nodes):
+            nattacks = len(self.graph.nodes)
 
-        lcc = [network.largest_connected_component(graph_attacked)]
-        slcc = [network.second_largest_connected_component(graph_attacked)]
-        eff = [network.global_efficiency(graph_attacked)]
+        if graph_attacked is None:
+            graph_attacked = self.get_graph(weight, profiler)
 
-        for i in range(nattacks):
-            graph_attacked.remove_node(ap[i])
-            nodes_attacked.append(ap[i])
-            lcc.append(network.largest_connected_component(graph_attacked))
-            slcc.append(network.second_largest_connected_component(graph_attacked))
-            eff.append(network.global_efficiency(graph_attacked, weight))
+        # draw the whole removal order up front from a private RNG stream
+        rng = np.random.default_rng(seed)
+        checkpoint, state = _resume(
+            checkpoint, "random_attack", rng=rng.bit_generator.state
+        )
+        rng.bit_generator.state = state["rng"]
+        nodes = graph_attacked.node_list
+        order = [nodes[i] for i in rng.permutation(len(nodes))[:nattacks]]
+        _replay(state, graph_attacked.remove_node)
+        done = max(0, len(state["records"]) - 1)
 
-        return graph_attacked, nodes_attacked, lcc, slcc, eff
+        curves = None
+        if percolation:
+            with profiled(profiler, "percolation"):
+                curves = node_percolation(self.graph, order)
+        yield from _attack_steps(
+            graph_attacked,
+            nattacks,
+            ((node, None) for node in order[done:]),
+            graph_attacked.remove_node,
+            weight,
+            backend,
+            stop,
+            curves=curves,
+            checkpoint=checkpoint,
+            profiler=profiler,
+            state=state,
+        )
 
-    def random_attack(self, nattacks=1, weight=None):
+    def random_attack(
+        self,
+        nattacks=1,
+        weight=None,
+        backend="networkx",
+        percolation=False,
+        seed=None,
+        materialize=False,
+        stop=None,
+        checkpoint=None,
+        profiler=None,
+    ):
         """Carry out random attack on nodes.
 
         Arguments:
             nattacks: Number of attacks to be carried out
             weighted: If weighted is not none, use weighted efficiency measure
+            backend: Backend used for global efficiency ("networkx", "csr",
+                "sampled" or an analysis.SampledEfficiency estimator)
+            percolation: If true, track lcc and slcc by reverse union-find percolation
+            seed: Seed or numpy.random.Generator for the removal order
+            materialize: If true, return the attacked graph as a new graph instead
+                of a read-only view of the original network
+            stop: Stop criterion, or list of criteria, ending the attack early
+            checkpoint: Checkpoint directory or AttackCheckpoint; the attack is
+                resumed from it if it exists and saved to it periodically
+            profiler: AttackProfiler recording the time of each phase of each
+                step, the graph size and the memory use (see profiling)
+        """
+        # removal masks on the network
+        graph_attacked = self.get_graph(weight, profiler)
+        steps = self.iter_random_attack(
+            nattacks,
+            weight,
+            backend,
+            percolation,
+            seed,
+            stop,
+            checkpoint,
+            graph_attacked,
+            profiler,
+        )
+        nodes_attacked, lcc, slcc, eff, _ = _collect(steps)
+        graph_attacked = _attacked_graph(graph_attacked, materialize)
+        return graph_attacked, nodes_attacked, lcc, slcc, eff
+
+    def iter_edge_random_attack(
+        self,
+        nattacks=1,
+        weight=None,
+        backend="networkx",
+        percolation=False,
+        seed=None,
+        stop=None,
+        checkpoint=None,
+        graph_attacked=None,
+        profiler=None,
+        reverse_efficiency=False,
+    ):
+        """Yield the steps of a random attack on edges.
+
+        See edge_random_attack for the arguments. The attack is carried out on
+        graph_attacked (a MaskedGraph) if given.
         """
         if nattacks < 1:
             nattacks = 1
         if nattacks > len(self.graph.edges):
             nattacks = len(self.graph.edges)
 
-        graph_attacked = self.get_graph()  # work on a local copy of the topology
-        nodes_attacked = [0]  # list with coordinates of attacked nodes
+        if graph_attacked is None:
+            graph_attacked = self.get_graph(weight, profiler)
 
-        lcc = [network.largest_connected_component(graph_attacked)]
-        slcc = [network.second_largest_connected_component(graph_attacked)]
-        eff = [network.global_efficiency(graph_attacked, weight)]
+        # draw the whole removal order up front from a private RNG stream
+        rng = np.random.default_rng(seed)
+        checkpoint, state = _resume(
+            checkpoint, "edge_random_attack", rng=rng.bit_generator.state
+        )
+        rng.bit_generator.state = state["rng"]
+        edges = graph_attacked.edge_list
+        order = [edges[i] for i in rng.permutation(len(edges))[:nattacks]]
 
-        for _ in range(nattacks):
-            node = rd.sample(list(graph_attacked.nodes), 1)
-            graph_attacked.remove_node(node[0])
-            nodes_attacked.append(node[0])
-            lcc.append(network.largest_connected_component(graph_attacked))
-            slcc.append(network.second_largest_connected_component(graph_attacked))
-            eff.append(network.global_efficiency(graph_attacked, weight))
+        def remove(edge):
+            graph_attacked.remove_edge(*edge)
 
-        return graph_attacked, nodes_attacked, lcc, slcc, eff
+        _replay(state, remove)
+        done = max(0, len(state["records"]) - 1)
+
+        curves = None
+        if percolation:
+            with profiled(profiler, "percolation"):
+                curves = edge_percolation(self.graph, order)
+                if reverse_efficiency:
+                    eff = edge_percolation_efficiency(self.graph, order, weight)
+                    curves = curves + (eff,)
+        yield from _attack_steps(
+            graph_attacked,
+            nattacks,
+            ((edge, None) for edge in order[done:]),
+            remove,
+            weight,
+            backend,
+            stop,
+            curves=curves,
+            checkpoint=checkpoint,
+            profiler=profiler,
+            state=state,
+        )
 
-    def edge_random_attack(self, nattacks=1, weight=None):
+    def edge_random_attack(
+        self,
+        nattacks=1,
+        weight=None,
+        backend="networkx",
+        percolation=False,
+        seed=None,
+        materialize=False,
+        stop=None,
+        checkpoint=None,
+        profiler=None,
+        reverse_efficiency=False,
+    ):
         """Carry out random attack on edges.
 
+        The removal order is a random permutation of the edges drawn up front.
+
         Arguments:
             nattacks: Number of attacks to be carried out
             weighted: If weighted is not none, use weighted efficiency measure
+            backend: Backend used for global efficiency ("networkx", "csr",
+                "sampled" or an analysis.SampledEfficiency estimator)
+            percolation: If true, track lcc and slcc by reverse union-find percolation
+            seed: Seed or numpy.random.Generator for the removal order
+            materialize: If true, return the attacked graph as a new graph instead
+                of a read-only view of the original network
+            stop: Stop criterion, or list of criteria, ending the attack early
+            checkpoint: Checkpoint directory or AttackCheckpoint; the attack is
+                resumed from it if it exists and saved to it periodically
+            profiler: AttackProfiler recording the time of each phase of each
+                step, the graph size and the memory use (see profiling)
+            reverse_efficiency: If true (with percolation), compute the efficiency
+                by adding the removed edges back in reverse order while updating
+                all shortest path lengths (exact, needs 8 N^2 bytes, see
+                percolation.edge_percolation_efficiency)
+        """
+        # removal masks on the network
+        graph_attacked = self.get_graph(weight, profiler)
+        steps = self.iter_edge_random_attack(
+            nattacks,
+            weight,
+            backend,
+            percolation,
+            seed,
+            stop,
+            checkpoint,
+            graph_attacked,
+            profiler,
+            reverse_efficiency,
+        )
+        edges_attacked, lcc, slcc, eff, _ = _collect(steps)
+        graph_attacked = _attacked_graph(graph_attacked, materialize)
+        return graph_attacked, edges_attacked, lcc, slcc, eff
+
+    def iter_adaptive_degree_attack(
+        self,
+        nattacks=1,
+        weight=None,
+        backend="networkx",
+        percolation=False,
+        efficiency=True,
+        stop=None,
+        checkpoint=None,
+        graph_attacked=None,
+        profiler=None,
+    ):
+        """Yield the steps of an adaptive degree attack on nodes.
+
+        See adaptive_degree_attack for the arguments. The attack is carried
+        out on graph_attacked (a MaskedGraph) if given.
         """
         if nattacks < 1:
             nattacks = 1
-        if nattacks > len(self.graph.edges):
-            nattacks = len(self.graph.edges)
+        if nattacks > len(self.graph.nodes):
+            nattacks = len(self.graph.nodes)
 
-        graph_attacked = self.get_graph()  # work on a local copy of the topology
-        edges_attacked = [0]  # list with coordinates of attacked edges
+        with profiled(profiler, "order"):
+            order = adaptive_degree_order(self.graph, nattacks)
+        yield from self.__ordered_node_attack(
+            "adaptive_degree_attack",
+            order,
+            weight,
+            backend,
+            percolation,
+            efficiency,
+            stop,
+            checkpoint,
+            graph_attacked,
+            profiler,
+        )
 
-        lcc = [network.largest_connected_component(graph_attacked)]
-        slcc = [network.second_largest_connected_component(graph_attacked)]
-        eff = [network.global_efficiency(graph_attacked, weight)]
+    def adaptive_degree_attack(
+        self,
+        nattacks=1,
+        weight=None,
+        backend="networkx",
+        percolation=False,
+        efficiency=True,
+        materialize=False,
+        stop=None,
+        checkpoint=None,
+        profiler=None,
+    ):
+        """Carry out adaptive (recalculated) degree attack on nodes.
 
-        for _ in range(nattacks):
-            edge = rd.sample(list(graph_attacked.edges), 1)
-            graph_attacked.remove_edge(edge[0][0], edge[0][1])
-            edges_attacked.append(edge[0])
-            lcc.append(network.largest_connected_component(graph_attacked))
-            slcc.append(network.second_largest_connected_component(graph_attacked))
-            eff.append(network.global_efficiency(graph_attacked, weight))
+        Gives the same removal order as node_iterative_centrality_attack with
+        degree_centrality, but the degrees are kept in an indexed priority
+        queue and only the neighbours of each removed node are updated.
 
-        return graph_attacked, edges_attacked, lcc, slcc, eff
+        Arguments:
+            nattacks: Number of attacks to be carried out
+            weight: If weight is not none, use weighted efficiency measure
+            backend: Backend used for global efficiency ("networkx", "csr",
+                "sampled" or an analysis.SampledEfficiency estimator)
+            percolation: If true, track lcc and slcc by reverse union-find percolation
+            efficiency: If false, skip the global efficiency (reported as NaN),
+                which dominates the cost of attacks on large networks
+            materialize: If true, return the attacked graph as a new graph instead
+                of a read-only view of the original network
+            stop: Stop criterion, or list of criteria, ending the attack early
+            checkpoint: Checkpoint directory or AttackCheckpoint; the attack is
+                resumed from it if it exists and saved to it periodically
+            profiler: AttackProfiler recording the time of each phase of each
+                step, the graph size and the memory use (see profiling)
+
+        Returns:
+            graph_attacked, nodes_attacked, lcc, slcc, eff and the degree of
+            each node when removed, as for node_iterative_centrality_attack
+        """
+        # removal masks on the network
+        graph_attacked = self.get_graph(weight, profiler)
+        steps = self.iter_adaptive_degree_attack(
+            nattacks,
+            weight,
+            backend,
+            percolation,
+            efficiency,
+            stop,
+            checkpoint,
+            graph_attacked,
+            profiler,
+        )
+        nodes_attacked, lcc, slcc, eff, centrality = _collect(steps)
+        graph_attacked = _attacked_graph(graph_attacked, materialize)
+        return graph_attacked, nodes_attacked, lcc, slcc, eff, centrality
+
+    def iter_collective_influence_attack(
+        self,
+        nattacks=1,
+        radius=2,
+        weight=None,
+        backend="networkx",
+        percolation=False,
+        efficiency=True,
+        stop=None,
+        checkpoint=None,
+        graph_attacked=None,
+        profiler=None,
+    ):
+        """Yield the steps of an adaptive collective influence attack on nodes.
+
+        See collective_influence_attack for the arguments. The attack is
+        carried out on graph_attacked (a MaskedGraph) if given.
+        """
+        if nattacks < 1:
+            nattacks = 1
+        if nattacks > len(self.graph.nodes):
+            nattacks = len(self.graph.nodes)
+
+        with profiled(profiler, "order"):
+            order = collective_influence_order(self.graph, nattacks, radius)
+        yield from self.__ordered_node_attack(
+            "collective_influence_attack",
+            order,
+            weight,
+            backend,
+            percolation,
+            efficiency,
+            stop,
+            checkpoint,
+            graph_attacked,
+            profiler,
+        )
+
+    def collective_influence_attack(
+        self,
+        nattacks=1,
+        radius=2,
+        weight=None,
+        backend="networkx",
+        percolation=False,
+        efficiency=True,
+        materialize=False,
+        stop=None,
+        checkpoint=None,
+        profiler=None,
+    ):
+        """Carry out adaptive collective influence (CI) attack on nodes.
+
+        The node of highest CI in the remaining network is removed at each
+        step. The CI values are kept in an indexed priority queue and only
+        those within distance radius + 1 of each removed node are updated.
+
+        Arguments:
+            nattacks: Number of attacks to be carried out
+            radius: Radius of the ball used for the collective influence
+            weight: If weight is not none, use weighted efficiency measure
+            backend: Backend used for global efficiency ("networkx", "csr",
+                "sampled" or an analysis.SampledEfficiency estimator)
+            percolation: If true, track lcc and slcc by reverse union-find percolation
+            efficiency: If false, skip the global efficiency (reported as NaN),
+                which dominates the cost of attacks on large networks
+            materialize: If true, return the attacked graph as a new graph instead
+                of a read-only view of the original network
+            stop: Stop criterion, or list of criteria, ending the attack early
+            checkpoint: Checkpoint directory or AttackCheckpoint; the attack is
+                resumed from it if it exists and saved to it periodically
+            profiler: AttackProfiler recording the time of each phase of each
+                step, the graph size and the memory use (see profiling)
+
+        Returns:
+            graph_attacked, nodes_attacked, lcc, slcc, eff and the CI of each
+            node when removed, as for node_iterative_centrality_attack
+
+        Reference:
+            Morone, F., Makse, H. Influence maximization in complex networks
+            through optimal percolation. Nature 524, 65-68 (2015).
+            https://doi.org/10.1038/nature14604
+        """
+        # removal masks on the network
+        graph_attacked = self.get_graph(weight, profiler)
+        steps = self.iter_collective_influence_attack(
+            nattacks,
+            radius,
+            weight,
+            backend,
+            percolation,
+            efficiency,
+            stop,
+            checkpoint,
+            graph_attacked,
+            profiler,
+        )
+        nodes_attacked, lcc, slcc, eff, centrality = _collect(steps)
+        graph_attacked = _attacked_graph(graph_attacked, materialize)
+        return graph_attacked, nodes_attacked, lcc, slcc, eff, centrality
+
+    def iter_hazard_attack(
+        self,
+        hazards,
+        radius=None,
+        weight=None,
+        backend="networkx",
+        efficiency=True,
+        stop=None,
+        checkpoint=None,
+        graph_attacked=None,
+        profiler=None,
+    ):
+        """Yield the steps of a spatially localized hazard attack.
+
+        See hazard_attack for the arguments. The attack is carried out on
+        graph_attacked (a MaskedGraph) if given.
+        """
+        if graph_attacked is None:
+            graph_attacked = self.get_graph(weight, profiler)
+        index = self.spatial_index()
+        hazards = np.atleast_1d(np.asarray(hazards, dtype=object))
+        (hn, node_hits), (he, edge_hits) = index.query(hazards, radius)
+        node_hits = np.split(node_hits, np.searchsorted(hn, np.arange(1, len(hazards))))
+        edge_hits = np.split(edge_hits, np.searchsorted(he, np.arange(1, len(hazards))))
+        G = graph_attacked.graph
+
+        def remove(i):
+            for e in edge_hits[i]:
+                if G.has_edge(*index.edges[e]):
+                    graph_attacked.remove_edge(*index.edges[e])
+            for v in node_hits[i]:
+                if index.nodes[v] in G:
+                    graph_attacked.remove_node(index.nodes[v])
+
+        checkpoint, state = _resume(checkpoint, "hazard_attack")
+        _replay(state, remove)
+        done = max(0, len(state["records"]) - 1)
+        yield from _attack_steps(
+            graph_attacked,
+            len(hazards),
+            ((i, None) for i in range(done, len(hazards))),
+            remove,
+            weight,
+            backend,
+            stop,
+            checkpoint=checkpoint,
+            profiler=profiler,
+            state=state,
+            efficiency=efficiency,
+        )
+
+    def hazard_attack(
+        self,
+        hazards,
+        radius=None,
+        weight=None,
+        backend="networkx",
+        efficiency=True,
+        materialize=False,
+        stop=None,
+        checkpoint=None,
+        profiler=None,
+    ):
+        """Carry out an attack by a sequence of spatially localized hazards.
+
+        The hazards strike one after another, e.g. a growing flood zone or a
+        series of blasts, each removing the nodes inside it and the edges
+        crossing it. The nodes and edges are found with the spatial index of
+        the graph, whose nodes must be coordinates (see hazard.SpatialIndex).
+
+        Arguments:
+            hazards: Sequence of hazard geometries (e.g. polygons, or points
+                with a radius)
+            radius: If given, each hazard hits everything within radius of it
+            weight: If weight is not none, use weighted efficiency measure
+            backend: Backend used for global efficiency ("networkx", "csr",
+                "sampled" or an analysis.SampledEfficiency estimator)
+            efficiency: If false, skip the global efficiency (reported as NaN)
+            materialize: If true, return the attacked graph as a new graph instead
+                of a read-only view of the original network
+            stop: Stop criterion, or list of criteria, ending the attack early
+            checkpoint: Checkpoint directory or AttackCheckpoint; the attack is
+                resumed from it if it exists and saved to it periodically
+            profiler: AttackProfiler recording the time of each phase of each
+                step, the graph size and the memory use (see profiling)
+
+        Returns:
+            graph_attacked, the indices of the hazards applied, lcc, slcc and eff
+        """
+        # removal masks on the network
+        graph_attacked = self.get_graph(weight, profiler)
+        steps = self.iter_hazard_attack(
+            hazards,
+            radius,
+            weight,
+            backend,
+            efficiency,
+            stop,
+            checkpoint,
+            graph_attacked,
+            profiler,
+        )
+        hazards_applied, lcc, slcc, eff, _ = _collect(steps)
+        graph_attacked = _attacked_graph(graph_attacked, materialize)
+        return graph_attacked, hazards_applied[1:], lcc, slcc, eff
+
+    def hazard_sweep(
+        self, hazards, radius=None, weight=None, backend="csr", efficiency=True
+    ):
+        """Evaluate many independent hazards, each striking the intact network.
+
+        Arguments:
+            hazards: Array of hazard geometries, e.g. hazard.disks(centers)
+                with a radius for blasts around many centers
+            radius: If given, each hazard hits everything within radius of it
+            weight: If weight is not none, use weighted efficiency measure
+            backend: Backend used for global efficiency ("csr", "sampled" or an
+                analysis.SampledEfficiency estimator)
+            efficiency: If false, skip the global efficiency (reported as NaN)
+
+        Returns:
+            DataFrame with the nodes and edges removed, lcc, slcc and eff of
+            each hazard (see hazard.hazard_sweep)
+        """
+        return hazard_sweep(
+            self.graph,
+            self.spatial_index(),
+            hazards,
+            radius,
+            weight,
+            backend,
+            efficiency,
+        )
+
+    def __ordered_node_attack(
+        self,
+        method,
+        order,
+        weight,
+        backend,
+        percolation,
+        efficiency,
+        stop,
+        checkpoint,
+        graph_attacked,
+        profiler,
+    ):
+        """Yield the steps of an attack removing (node, score) pairs in order."""
+        if graph_attacked is None:
+            graph_attacked = self.get_graph(weight, profiler)
+        checkpoint, state = _resume(checkpoint, method)
+        _replay(state, graph_attacked.remove_node)
+        done = max(0, len(state["records"]) - 1)
+
+        nodes = [node for node, _ in order]
+        curves = None
+        if percolation:
+            with profiled(profiler, "percolation"):
+                curves = node_percolation(self.graph, nodes)
+        yield from _attack_steps(
+            graph_attacked,
+            len(order),
+            iter(order[done:]),
+            graph_attacked.remove_node,
+            weight,
+            backend,
+            stop,
+            curves=curves,
+            checkpoint=checkpoint,
+            profiler=profiler,
+            state=state,
+            efficiency=efficiency,
+        )
+
+    def random_attack_ensemble(
+        self,
+        nrealizations=100,
+        nattacks=1,
+        weight=None,
+        edges=False,
+        seed=None,
+        nworkers=None,
+        quantiles=None,
+        backend="networkx",
+        percolation=False,
+    ):
+        """Carry out an ensemble of independent random attacks.
+
+        Each realization draws its removal order from its own RNG stream,
+        spawned from the master seed, and the realizations are distributed
+        over a process pool. The graph is sent to each worker once. Results
+        are reduced in realization order, so they are bit-reproducible for a
+        given seed regardless of the number of workers.
+
+        Arguments:
+            nrealizations: Number of independent realizations
+            nattacks: Number of attacks to be carried out in each realization
+            weight: If weight is not none, use weighted efficiency measure
+            edges: If true, attack edges instead of nodes
+            seed: Master seed for the realizations
+            nworkers: Number of worker processes (default: number of CPUs)
+            quantiles: Optional sequence of quantiles in [0, 1] to compute
+            backend: Backend used for global efficiency ("networkx", "csr",
+                "sampled" or an analysis.SampledEfficiency estimator)
+            percolation: If true, track lcc and slcc by reverse union-find percolation
+
+        Returns:
+            Dictionary with the attack steps ("nattacks") and, for each of
+            "lcc", "slcc" and "eff", per-step arrays "<metric>_avg",
+            "<metric>_std" and, if requested, "<metric>_quantiles" with shape
+            (len(quantiles), nattacks + 1).
+        """
+        seeds = np.random.SeedSequence(seed).spawn(nrealizations)
+        method = "edge_random_attack" if edges else "random_attack"
+        kwargs = {
+            "nattacks": nattacks,
+            "weight": weight,
+            "backend": backend,
+            "percolation": percolation,
+        }
+        tasks = [(method, kwargs, s) for s in seeds]
+
+        if nworkers is None:
+            nworkers = os.cpu_count() or 1
+        nworkers = max(1, min(nworkers, nrealizations))
+        if nworkers == 1:
+            runs = [_random_attack_curves(self, *task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=nworkers,
+                initializer=_init_ensemble_worker,
+                initargs=(self.graph,),
+            ) as pool:
+                chunksize = max(1, nrealizations // (4 * nworkers))
+                runs = list(pool.map(_run_random_attack, tasks, chunksize=chunksize))
+
+        results = {"nattacks": np.arange(len(runs[0][0]))}
+        for i, metric in enumerate(["lcc", "slcc", "eff"]):
+            values = np.array([run[i] for run in runs], dtype=float)
+            results[metric + "_avg"] = values.mean(axis=0)
+            results[metric + "_std"] = values.std(axis=0)
+            if quantiles is not None:
+                results[metric + "_quantiles"] = np.quantile(values, quantiles, axis=0)
+        return results
+
+
+def _queued_targets(queue):
+    """Yield (element, score) pairs popped lazily from a priority queue."""
+    while queue:
+        yield queue.pop()
+
+
+def _ranked_targets(ranking, rank):
+    """Yield (element, centrality) pairs, re-ranking lazily when needed."""
+    while True:
+        if not ranking:
+            ranking.update(rank())
+            if not ranking:
+                return  # nothing left to attack
+        yield ranking.pop()
+
+
+def _attack_steps(
+    graph_attacked,
+    nattacks,
+    targets,
+    remove,
+    weight,
+    backend,
+    stop=None,
+    cache=None,
+    curves=None,
+    components=None,
+    checkpoint=None,
+    state=None,
+    efficiency=True,
+    recompute_every=1,
+    profiler=None,
+):
+    """Carry out an attack and yield an AttackStep record per step.
+
+    Arguments:
+        graph_attacked: MaskedGraph under attack
+        nattacks: Maximum number of attacks
+        targets: Iterator over (element, centrality) pairs, advanced lazily
+            so that rankings can see the result of the previous removal
+        remove: Function removing an element from the attacked graph
+        stop: Stop criterion, or list of criteria, called as
+            criterion(step, initial) with the current and the step 0 records
+        cache: ComponentCache providing lcc, slcc and efficiency, if any
+        curves: Precomputed (lcc, slcc) or (lcc, slcc, eff) lists, e.g. from
+            reverse percolation
+        components: Object tracking the connected components, providing lcc
+            and slcc (default: cache)
+        checkpoint: AttackCheckpoint that state is saved to periodically
+        state: Attack state; the records of the steps already carried out
+            (of a resumed attack) are yielded first and new ones appended
+        efficiency: If false, the global efficiency is not computed (NaN)
+        recompute_every: Compute lcc, slcc and eff only every recompute_every
+            steps (and at the last step) and interpolate them linearly in
+            between; stop criteria are only checked at computed steps
+        profiler: AttackProfiler timing the phases of the steps carried out
+    """
+    if stop is None:
+        stop = []
+    elif callable(stop):
+        stop = [stop]
+    if state is None:
+        state = {"records": []}
+    recompute_every = max(1, recompute_every)
+    records = state["records"]
+    yield from records
+    if records and any(criterion(records[-1], records[0]) for criterion in stop):
+        return
+
+    if components is None:
+        components = cache
+    G = graph_attacked.graph
+    start = time.perf_counter() - (records[-1].elapsed if records else 0.0)
+    initial = records[0] if records else None
+
+    def measure(step, removed, value):
+        if components is not None:
+            with profiled(profiler, "lcc"):
+                lcc = components.largest_connected_component()
+            with profiled(profiler, "slcc"):
+                slcc = components.second_largest_connected_component()
+        elif curves is not None:
+            lcc, slcc = curves[0][step], curves[1][step]
+        else:
+            with profiled(profiler, "lcc"):
+                lcc = network.largest_connected_component(G)
+            with profiled(profiler, "slcc"):
+                slcc = network.second_largest_connected_component(G)
+        if not efficiency:
+            eff = np.nan
+        elif curves is not None and len(curves) > 2:
+            eff = curves[2][step]
+        elif cache is not None:
+            with profiled(profiler, "efficiency"):
+                eff = cache.global_efficiency()
+        else:
+            with profiled(profiler, "efficiency"):
+                eff = graph_attacked.global_efficiency(weight, backend)
+        return AttackStep(
+            step,
+            removed,
+            value,
+            lcc,
+            slcc,
+            eff,
+            graph_attacked.number_of_nodes(),
+            graph_attacked.number_of_edges(),
+            time.perf_counter() - start,
+        )
+
+    if profiler is not None:
+        profiler.begin_attack(state.get("method"))
+    pending = []  # records of the steps since the last computed one
+    computed = []  # records of the last steps, yielded after profiling ends
+    try:
+        for step in range(len(records), nattacks + 1):
+            if profiler is not None:
+                profiler.begin_step(step)
+            removed = value = None
+            if step > 0:
+                with profiled(profiler, "centrality"):
+                    target = next(targets, None)
+                if target is None:
+                    break
+                removed, value = target
+                with profiled(profiler, "remove"):
+                    remove(removed)
+            if step % recompute_every and step < nattacks:
+                pending.append(
+                    AttackStep(
+                        step,
+                        removed,
+                        value,
+                        None,
+                        None,
+                        None,
+                        graph_attacked.number_of_nodes(),
+                        graph_attacked.number_of_edges(),
+                        time.perf_counter() - start,
+                        True,
+                    )
+                )
+                if profiler is not None:
+                    profiler.end_step(
+                        step, pending[-1].number_of_nodes, pending[-1].number_of_edges
+                    )
+                continue
+            previous = records[-1] if records else None
+            record = measure(step, removed, value)
+            steps = _interpolate(previous, pending, record) + [record]
+            pending = []
+            records.extend(steps)
+            if initial is None:
+                initial = record
+            stopped = any(criterion(record, initial) for criterion in stop)
+            if checkpoint is not None and not stopped and (
+                previous is None
+                or step // checkpoint.every > previous.step // checkpoint.every
+            ):
+                with profiled(profiler, "checkpoint"):
+                    checkpoint.save(state)
+            # the row of the step is complete before its record is yielded, so
+            # that consumers stopping at any record leave no step unprofiled
+            if profiler is not None:
+                profiler.end_step(step, record.number_of_nodes, record.number_of_edges)
+            yield from steps
+            if stopped:
+                break
+        if pending:
+            # the targets ran out: the graph is in the state of the last pending step
+            last = pending.pop()
+            if profiler is not None:
+                profiler.begin_step(last.step)
+            record = measure(last.step, last.removed, last.centrality)
+            computed = _interpolate(records[-1], pending, record) + [record]
+            records.extend(computed)
+        if checkpoint is not None:
+            with profiled(profiler, "checkpoint"):
+                checkpoint.save(state)
+    finally:
+        if profiler is not None:
+            profiler.end_attack()
+    yield from computed
+
+
+def _interpolate(first, pending, last):
+    """Return pending records with lcc, slcc and eff interpolated linearly."""
+    interpolated = []
+    for record in pending:
+        t = (record.step - first.step) / (last.step - first.step)
+        interpolated.append(
+            record._replace(
+                lcc=int(round(first.lcc + t * (last.lcc - first.lcc))),
+                slcc=int(round(first.slcc + t * (last.slcc - first.slcc))),
+                eff=first.eff + t * (last.eff - first.eff),
+            )
+        )
+    return interpolated
+
+
+def _resume(checkpoint, method, **initial):
+    """Return checkpoint and the attack state loaded from it, or a new one."""
+    checkpoint = as_checkpoint(checkpoint)
+    state = None
+    if checkpoint is not None:
+        state = checkpoint.load(method)
+    if state is None:
+        state = dict(method=method, records=[], **initial)
+    return checkpoint, state
+
+
+def _replay(state, remove):
+    """Carry out the removals of the steps already recorded in state."""
+    for record in state["records"][1:]:
+        remove(record.removed)
+
+
+def _collect(steps, interpolated=None):
+    """Return removed elements, lcc, slcc, eff and centrality lists.
+
+    If a list interpolated is given, the interpolated flags of the steps are
+    appended to it.
+    """
+    removed = [0]  # placeholder for the intact network
+    centrality = [0]
+    lcc = []
+    slcc = []
+    eff = []
+    for record in steps:
+        if record.step > 0:
+            removed.append(record.removed)
+            centrality.append(record.centrality)
+        lcc.append(record.lcc)
+        slcc.append(record.slcc)
+        eff.append(record.eff)
+        if interpolated is not None:
+            interpolated.append(record.interpolated)
+    return removed, lcc, slcc, eff, centrality
+
+
+def _attacked_graph(graph_attacked, materialize=False):
+    if materialize:
+        return graph_attacked.materialize()
+    return graph_attacked.view()
+
+
+class _Ranking:
+    """Centrality ranking that may be reused across attack steps while stable.
+
+    Without stable_top, a new ranking must be supplied after every
+    batch_size attacks, the top batch_size entries of each ranking being
+    attacked. With stable_top = m, the top m entries of each new ranking are
+    compared with the m entries that followed the attacked head of the
+    previous ranking. If they agree, the ranking is considered stable and
+    its next max(m, batch_size) entries are handed out without recomputing
+    the centrality.
+    """
+    def __init__(self, stable_top=None, batch_size=1):
+        self.stable_top = stable_top
+        self.batch_size = max(1, batch_size)
+        self.__queue = []
+        self.__previous = None
+
+    def __bool__(self):
+        return len(self.__queue) > 0
+
+    def update(self, centrality):
+        ranked = list(centrality.items())
+        k = self.batch_size
+        m = self.stable_top
+        if m is None or m < 2:
+            self.__queue = ranked[:k]
+            return
+        top = [key for key, _ in ranked[:m]]
+        if top == self.__previous:
+            self.__queue = ranked[: max(m, k)]
+            self.__previous = None  # require two fresh rankings to agree again
+        else:
+            self.__queue = ranked[:k]
+            self.__previous = [key for key, _ in ranked[k : k + m]]
+
+    def pop(self):
+        """Return the next (element, centrality) pair to be attacked."""
+        return self.__queue.pop(0)
+
+
+# Graph shared by the ensemble workers, set once per process by the initializer
+_ensemble_dismantling = None
+
+
+def _init_ensemble_worker(G):
+    global _ensemble_dismantling
+    _ensemble_dismantling = NetworkDismantling(G)
+
+
+def _run_random_attack(task):
+    return _random_attack_curves(_ensemble_dismantling, *task)
+
+
+def _random_attack_curves(dismantling, method, kwargs, seed):
+    """Run one random attack realization and return its lcc, slcc and eff."""
+    _, _, lcc, slcc, eff = getattr(dismantling, method)(seed=seed, **kwargs)
+    return lcc, slcc, eff
@@ -6,6 +6,8 @@
 
 """Provides methods for handling networks with geographic data."""
 
+import hashlib
+import os
 import numpy as np
 import networkx as nx
 import pandas as pd
@@ -13,9 +15,15 @@ import geopandas as gpd
 import contextily as ctx
 import momepy
 import pathlib
-import copy
+import shapely
 import matplotlib.pyplot as plt
-from shapely import wkt
+import network_analysis.rendering as rendering
+
+# Version of the cache file format, part of the cache key
+CACHE_VERSION = 1
+
+# GeoNetwork methods that can be used in cleaning pipelines
+CLEANING_OPERATIONS = ["remove_false_nodes", "close_gaps", "extend_lines"]
 
 
 def plot_grid(
@@ -42,20 +50,238 @@ def plot_grid(
     return ax
 
 
-def plot_grid_topology(graph, filename=None, figsize=(12, 12), node_size=5, dpi=300):
-    """Plot network grid topology."""
-    pos = {n: [n[0], n[1]] for n in list(graph.nodes)}
-    _, _ = plt.subplots(figsize=figsize)
-    nx.draw(graph, pos, node_size=node_size)
+def plot_grid_topology(
+    graph,
+    filename=None,
+    figsize=(12, 12),
+    node_size=5,
+    dpi=300,
+    lod=True,
+    rasterized=True,
+    node_alive=None,
+    edge_alive=None,
+):
+    """Plot network grid topology.
+
+    The edges are drawn as one path collection, thinned to the output
+    resolution if lod is true (see rendering.draw_network). An attacked
+    network is plotted from the alive masks of the nodes and edges, e.g.
+    from rendering.removal_masks or a MaskedGraph.
+    """
+    ax = rendering.draw_network(
+        graph,
+        node_alive=node_alive,
+        edge_alive=edge_alive,
+        node_size=node_size,
+        figsize=figsize,
+        dpi=dpi,
+        lod=lod,
+        rasterized=rasterized,
+    )
     plt.tight_layout()
     if filename:
         plt.savefig(filename, dpi=dpi)
+    return ax
+
+
+def close_gaps(grid, tolerance):
+    """Close gaps in LineString geometry where it should be contiguous.
+
+    Snaps both lines to a centroid of a gap in between, as momepy.close_gaps,
+    but only the lines within tolerance of a gap or of the end of another
+    line are snapped. The other lines are left exactly as they are, while
+    momepy snaps every line, moving its end points by rounding errors only.
+
+    Returns:
+        GeoSeries with the new geometry
+    """
+    geometry = grid.geometry.values
+    ends = np.concatenate(
+        (shapely.get_point(geometry, 0), shapely.get_point(geometry, -1))
+    )
+    coords, end_point = np.unique(
+        shapely.get_coordinates(ends), axis=0, return_inverse=True
+    )
+    end_point = end_point.reshape(2, -1)  # point ids of the start and end of lines
+    points = shapely.points(coords)
+    parts = shapely.get_parts(shapely.union_all(shapely.buffer(points, tolerance / 2)))
+    centroids = shapely.centroid(parts)
+    p, k = shapely.STRtree(parts).query(points, predicate="intersects")
+    size = np.bincount(k, minlength=len(parts))
+    lonely = np.full(len(parts), -1)  # point id of single point gaps
+    lonely[k[size[k] == 1]] = p[size[k] == 1]
+
+    k, g = shapely.STRtree(geometry).query(
+        centroids, predicate="dwithin", distance=tolerance
+    )
+    # a single end point does not move its own line
+    own = (lonely[k] == end_point[0][g]) | (lonely[k] == end_point[1][g])
+    k, g = k[~own], g[~own]
+
+    # snapping is iterative, so the lines near a gap are snapped to all centroids
+    lines = np.unique(g)
+    snapped = np.array(geometry, dtype=object)
+    snapped[lines] = shapely.snap(
+        geometry[lines], shapely.union_all(centroids), tolerance
+    )
+    return gpd.GeoSeries(snapped, index=grid.index, crs=grid.crs)
+
+
+def _cache_files(filename, cache_dir, *options):
+    """Return the grid and graph cache files of a source file and load options.
+
+    The cache key covers the path, size and modification time of the source
+    file, so that the cache is not used once the file has changed.
+    """
+    path = pathlib.Path(filename).resolve()
+    stat = path.stat()
+    key = repr((str(path), stat.st_size, stat.st_mtime_ns, options, CACHE_VERSION))
+    digest = hashlib.blake2b(key.encode(), digest_size=10).hexdigest()
+    base = pathlib.Path(cache_dir) / "{}-{}".format(path.stem, digest)
+    return base.with_suffix(".parquet"), base.with_suffix(".graph.npz")
+
+
+def _graph_arrays(grid, multigraph=False):
+    """Return the structure of the momepy primal graph of a grid as arrays.
+
+    The edges are given in the order momepy.gdf_to_nx inserts them, each
+    with the position of the grid row holding its attributes (the last row
+    between the same nodes in a simple graph).
+
+    Returns:
+        nodes (coordinates), src, dst and rows arrays, or None if the grid
+        is not made of LineStrings of the same dimension
+    """
+    geometry = grid.geometry.values
+    if len(grid) == 0 or not (shapely.get_type_id(geometry) == 1).all():
+        return None
+    has_z = shapely.has_z(geometry)
+    if has_z.any() and not has_z.all():
+        return None
+    include_z = bool(has_z[0])
+    ends = np.stack(
+        [
+            shapely.get_coordinates(shapely.get_point(geometry, 0), include_z),
+            shapely.get_coordinates(shapely.get_point(geometry, -1), include_z),
+        ],
+        axis=1,
+    )
+    nodes, ids = np.unique(ends.reshape(-1, ends.shape[2]), axis=0, return_inverse=True)
+    ids = ids.reshape(-1, 2)
+    # node ids in order of first appearance, as added by momepy
+    first = np.full(len(nodes), len(ids) * 2)
+    np.minimum.at(first, ids.ravel(), np.arange(len(ids) * 2))
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    ids = rank[ids]
+    nodes = nodes[order]
+
+    rows = np.arange(len(ids))
+    if not multigraph:
+        pairs = {}  # node pair -> [position of first row, last row]
+        for i, (u, v) in enumerate(ids.tolist()):
+            pair = (u, v) if u <= v else (v, u)
+            if pair in pairs:
+                pairs[pair][1] = i
+            else:
+                pairs[pair] = [i, i]
+        first, last = np.array(list(pairs.values()), dtype=np.int64).reshape(-1, 2).T
+        ids = ids[first]
+        rows = last
+    return nodes, ids[:, 0], ids[:, 1], rows
+
+
+def _write_cache(cache, grid, multigraph=False):
+    """Write processed grid and the structure of its graph to the cache files."""
+    cache[0].parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache[0].with_name(cache[0].name + ".tmp")
+    grid.to_parquet(tmp)
+    os.replace(tmp, cache[0])
+    arrays = _graph_arrays(grid, multigraph)
+    if arrays is not None:
+        nodes, src, dst, rows = arrays
+        tmp = cache[1].with_name(cache[1].name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, nodes=nodes, src=src, dst=dst, rows=rows)
+        os.replace(tmp, cache[1])
+
+
+def _read_graph(filename, grid, multigraph=False, compact=False):
+    """Return the momepy primal graph of grid from its cached structure."""
+    with np.load(filename) as data:
+        arrays = data["nodes"], data["src"], data["dst"], data["rows"]
+    return _build_graph(arrays, grid, multigraph, compact)
+
+
+def _build_graph(arrays, grid, multigraph=False, compact=False):
+    """Return the momepy primal graph of grid from the arrays of its structure.
+
+    If compact is true, the nodes are labelled 0, ..., N - 1 without
+    attributes, and their coordinates are kept in the "coordinates" graph
+    attribute (see compact_graph).
+    """
+    nodes, src, dst, rows = arrays
+    grid = grid.copy()
+    if "key" in grid.columns:
+        grid = grid.rename(columns={"key": "__key"})
+    grid["mm_len"] = grid.geometry.length
+    names = list(grid.columns)
+    records = [dict(zip(names, row)) for row in zip(*(grid[c].tolist() for c in names))]
+
+    G = nx.MultiGraph() if multigraph else nx.Graph()
+    G.graph["crs"] = grid.crs
+    G.graph["approach"] = "primal"
+    if grid.index.name is not None:
+        G.graph["index_name"] = grid.index.name
+    if compact:
+        G.graph["coordinates"] = np.asarray(nodes, dtype=np.float64)
+        G.add_nodes_from(range(len(nodes)))
+        labels = range(len(nodes))
+    else:
+        labels = [tuple(node) for node in nodes.tolist()]
+        G.add_nodes_from((node, {"x": node[0], "y": node[1]}) for node in labels)
+    G.add_edges_from(
+        (labels[u], labels[v], records[row])
+        for u, v, row in zip(src.tolist(), dst.tolist(), rows.tolist())
+    )
+    return G
+
+
+def compact_graph(G):
+    """Return copy of a coordinate-keyed graph with integer node labels.
+
+    The nodes are labelled 0, ..., N - 1 in the order of G and carry no
+    attributes. Their coordinates are kept in a float64 (N, 2) array in the
+    "coordinates" graph attribute, so that node i of the copy is the node
+    with coordinates tuple(G.graph["coordinates"][i]). Edge attributes are
+    shared with G.
+    """
+    index = {n: i for i, n in enumerate(G)}
+    H = G.__class__()
+    H.graph.update(G.graph)
+    H.graph["coordinates"] = rendering.node_coordinates(G)
+    H.add_nodes_from(range(len(index)))
+    if G.is_multigraph():
+        H.add_edges_from(
+            (index[u], index[v], k, d) for u, v, k, d in G.edges(keys=True, data=True)
+        )
+    else:
+        H.add_edges_from((index[u], index[v], d) for u, v, d in G.edges(data=True))
+    return H
 
 
 class GeoNetwork:
     """Class for representing networks with geographic data."""
     def __init__(
-        self, filename, multigraph=False, explode=False, capacity=None, epsg=None
+        self,
+        filename,
+        multigraph=False,
+        explode=False,
+        capacity=None,
+        epsg=None,
+        cache_dir=None,
+        compact=False,
     ):
         """Initialise network.
 
@@ -65,66 +291,176 @@ class GeoNetwork:
             explode: true if multilinestrings should be expanded
             epsg: transform to EPSG code
             capacity: string specifying the attribute with capacities for the edges
+            cache_dir: directory for caching the processed grid and graph (see load)
+            compact: true if the nodes of the graph should be labelled by
+                integers, with their coordinates in an array (see coordinates)
         """
-        self.graph = None
-        self.grid = None
+        self.__graph = None
+        self.__graph_file = None  # cached graph structure of the current grid
+        self.__grid = None
         self.__multigraph = multigraph
-        self.load(filename, multigraph, explode, capacity, epsg)
+        self.__compact = compact
+        self.load(filename, multigraph, explode, capacity, epsg, cache_dir)
+
+    @property
+    def grid(self):
+        """GeoDataFrame with the geodata of the network."""
+        return self.__grid
+
+    @grid.setter
+    def grid(self, grid):
+        self.__grid = grid
+        self.__graph = None  # rebuilt from the new grid when next accessed
+        self.__graph_file = None
+
+    @property
+    def graph(self):
+        """NetworkX graph of the network, built from the grid on first access.
+
+        Replacing or cleaning the grid marks the graph as dirty, so that a
+        chain of changes builds it only once. The nodes are coordinate tuples,
+        or integers if the network is compact.
+        """
+        if self.__graph is None and self.__grid is not None:
+            arrays = None
+            if self.__compact and self.__graph_file is None:
+                arrays = _graph_arrays(self.__grid, self.__multigraph)
+            if self.__graph_file is not None:
+                self.__graph = _read_graph(
+                    self.__graph_file, self.__grid, self.__multigraph, self.__compact
+                )
+            elif arrays is not None:
+                self.__graph = _build_graph(
+                    arrays, self.__grid, self.__multigraph, self.__compact
+                )
+            else:
+                self.__graph = momepy.gdf_to_nx(
+                    self.__grid, multigraph=self.__multigraph, directed=False
+                )
+                if self.__compact:
+                    self.__graph = compact_graph(self.__graph)
+        return self.__graph
+
+    @graph.setter
+    def graph(self, graph):
+        self.__graph = graph
+
+    @property
+    def coordinates(self):
+        """Array of the coordinates of the nodes of the graph, in node order."""
+        return rendering.node_coordinates(self.graph)
+
+    def original_nodes(self, nodes):
+        """Return the coordinate tuples of nodes of a compact graph."""
+        coordinates = self.graph.graph["coordinates"]
+        return [tuple(coordinates[n].tolist()) for n in nodes]
+
+    def compact_nodes(self, nodes):
+        """Return the integer labels of nodes given by their coordinate tuples."""
+        index = {c: i for i, c in enumerate(self.original_nodes(self.graph))}
+        return [index[tuple(n)] for n in nodes]
+
+    def load(
+        self,
+        filename,
+        multigraph=False,
+        explode=False,
+        capacity=None,
+        epsg=None,
+        cache_dir=None,
+    ):
+        """Load geodata for network from file (e.g. GEOJSON format).
+
+        If cache_dir is given, the processed grid is stored there as GeoParquet
+        and the structure of the graph in a binary file. Later loads of the
+        same, unchanged file with the same arguments read both from the cache
+        instead of parsing the file and building the graph. The grid cache
+        requires pyarrow.
+        """
+        self.__multigraph = multigraph
+        cache = None
+        if cache_dir is not None:
+            cache = _cache_files(
+                filename, cache_dir, multigraph, explode, capacity, epsg
+            )
+            if cache[0].exists():
+                self.grid = gpd.read_parquet(cache[0])
+                if cache[1].exists():
+                    self.__graph_file = cache[1]
+                return
 
-    def load(self, filename, multigraph=False, explode=False, capacity=None, epsg=None):
-        """Load geodata for network from file (e.g. GEOJSON format)."""
         if pathlib.Path(filename).suffix == ".csv":
             df = pd.read_csv(filename)
-            df["geometry"] = df["geometry"].apply(wkt.loads)
-            self.grid = gpd.GeoDataFrame(df, crs=epsg)
+            geometry = gpd.GeoSeries.from_wkt(df.pop("geometry"))
+            grid = gpd.GeoDataFrame(df, geometry=geometry, crs=epsg)
         else:  # assume it is a format geopandas can read directly
-            self.grid = gpd.read_file(filename)
+            grid = gpd.read_file(filename)
             if epsg:
-                self.grid.to_crs(epsg)
-        self.__multigraph = multigraph
+                grid = grid.to_crs(epsg)
         if explode:
-            self.grid = self.grid.explode()
+            grid = grid.explode()
         if capacity:
             # avoid division by zero, NaN or Inf
-            self.grid[capacity] = self.grid[capacity].replace(
+            grid[capacity] = grid[capacity].replace(
                 to_replace=np.inf, value=np.finfo(float).max
             )
-            self.grid[capacity] = self.grid[capacity].replace(
+            grid[capacity] = grid[capacity].replace(
                 to_replace=np.nan, value=np.finfo(float).eps
             )
-            self.grid[capacity] = self.grid[capacity].replace(
+            grid[capacity] = grid[capacity].replace(
                 to_replace=0.0, value=np.finfo(float).eps
             )
             # shortest path weights are calculated as the resiprocal of the capacity
-            self.grid["weight"] = 1.0 / self.grid[capacity]
-        self.graph = momepy.gdf_to_nx(self.grid, multigraph=multigraph, directed=False)
+            grid["weight"] = 1.0 / grid[capacity]
+        self.grid = grid
+        if cache is not None:
+            _write_cache(cache, grid, multigraph)
+            if cache[1].exists():
+                self.__graph_file = cache[1]
 
     def get_graph(self):
-        """Return a deep copy of the graph."""
-        return copy.deepcopy(self.graph)
+        """Return a copy of the graph.
+
+        Node and edge attribute dictionaries are copied, while their values,
+        such as the (immutable) edge geometries, are shared with the original.
+        """
+        return self.graph.copy()
+
+    def clean(self, operations):
+        """Apply a sequence of topology-cleaning operations to the grid.
+
+        The graph is only rebuilt once, when it is next accessed.
+
+        Arguments:
+            operations: Sequence of operation names ("remove_false_nodes",
+                "close_gaps" or "extend_lines") or (name, tolerance) pairs,
+                e.g. [("close_gaps", 0.5), ("extend_lines", 2.0),
+                "remove_false_nodes"]
+        """
+        for operation in operations:
+            if isinstance(operation, str):
+                name, args = operation, ()
+            else:
+                name, *args = operation
+            if name not in CLEANING_OPERATIONS:
+                raise ValueError("unknown cleaning operation: {}".format(name))
+            getattr(self, name)(*args)
 
     def remove_false_nodes(self):
         """Clean topology of existing LineString geometry by removal of nodes of degree 2."""
         self.grid = momepy.remove_false_nodes(self.grid)
-        self.graph = momepy.gdf_to_nx(
-            self.grid, multigraph=self.__multigraph, directed=False
-        )
 
     def close_gaps(self, tolerance):
         """Close gaps in LineString geometry where it should be contiguous.
         Snaps both lines to a centroid of a gap in between."""
-        self.grid.geometry = momepy.close_gaps(self.grid, tolerance)
-        self.graph = momepy.gdf_to_nx(
-            self.grid, multigraph=self.__multigraph, directed=False
-        )
+        grid = self.grid.copy()
+        grid.geometry = close_gaps(grid, tolerance)
+        self.grid = grid
 
     def extend_lines(self, tolerance):
         """Extends unjoined ends of LineString segments to join with other segments within
         a set tolerance."""
         self.grid = momepy.extend_lines(self.grid, tolerance)
-        self.graph = momepy.gdf_to_nx(
-            self.grid, multigraph=self.__multigraph, directed=False
-        )
 
     def plot(
         self,
@@ -0,0 +1,219 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Provides removal-mask views of networks under attack."""
+
+import numpy as np
+import networkx as nx
+import network_analysis.analysis as network
+import network_analysis.csr as csr
+
+
+def _working_copy(G):
+    """Return a copy of the adjacency of G sharing its attribute dictionaries.
+
+    Only the dicts making up the adjacency are copied, in the order of G,
+    which decides ties in traversals. The node, edge and graph attribute
+    dictionaries are those of G, so no attribute, e.g. a geometry, is copied.
+    Multiedge key dictionaries are copied once and shared between the two
+    directions, as in G.
+    """
+    H = G.__class__()
+    H.graph = G.graph
+    H._node = dict(G._node)
+    if G.is_multigraph():
+        keydicts = {}  # id of key dict of G -> its copy
+
+        def copy_keydict(d):
+            if id(d) not in keydicts:
+                keydicts[id(d)] = dict(d)
+            return keydicts[id(d)]
+
+        succ = {
+            u: {v: copy_keydict(d) for v, d in nbrs.items()}
+            for u, nbrs in G._adj.items()
+        }
+        if G.is_directed():
+            pred = {
+                u: {v: copy_keydict(d) for v, d in nbrs.items()}
+                for u, nbrs in G._pred.items()
+            }
+    else:
+        succ = {u: dict(nbrs) for u, nbrs in G._adj.items()}
+        if G.is_directed():
+            pred = {u: dict(nbrs) for u, nbrs in G._pred.items()}
+    H._adj = succ
+    if G.is_directed():
+        H._succ = succ
+        H._pred = pred
+    return H
+
+
+class MaskedGraph:
+    """Class for representing a network under attack by removal masks.
+
+    The original graph is never modified. Algorithms run on a working copy
+    of its adjacency (see _working_copy), which shares the attribute
+    dictionaries of the original graph and must not be used to change them.
+    NetworkX filtered views of the original graph are not used for this,
+    since they are 3 to 8 times slower to traverse. The removed nodes and
+    edges are recorded, from which the alive masks over the nodes and edges
+    of the original graph, used for CSR forms and drawings, and the index
+    dicts behind them are built on first use. The attacked graph with all
+    its attributes is only materialized on request.
+    """
+    def __init__(self, G, weight=None):
+        """Initialise view.
+
+        Arguments:
+            G: NetworkX graph to be attacked (not modified)
+            weight: Edge attribute used by the attack, if any
+        """
+        self.base = G
+        self.weight = weight
+        self.graph = _working_copy(G)
+        self.__nedges = G.number_of_edges()
+        self.__removed_nodes = []
+        self.__removed_edges = []
+        self.__node_index = None
+        self.__edge_index = None
+        self.__node_alive = None
+        self.__edge_alive = None
+        self.__synced = (0, 0)  # removals applied to the masks
+        self.__edges = {}  # weight -> csr.EdgeSet for CSR conversion
+
+    def __len__(self):
+        return self.graph.number_of_nodes()
+
+    def __contains__(self, n):
+        return n in self.graph
+
+    @property
+    def node_list(self):
+        """List of the nodes of the original graph."""
+        return list(self.base)
+
+    @property
+    def edge_list(self):
+        """List of the edges of the original graph (with keys if multigraph)."""
+        if self.base.is_multigraph():
+            return list(self.base.edges(keys=True))
+        return list(self.base.edges())
+
+    @property
+    def node_index(self):
+        """Dict mapping the nodes of the original graph to their positions."""
+        if self.__node_index is None:
+            self.__node_index = {n: i for i, n in enumerate(self.base)}
+        return self.__node_index
+
+    @property
+    def edge_index(self):
+        """Dict mapping the edges of the original graph to their positions."""
+        if self.__edge_index is None:
+            directed = self.base.is_directed()
+            self.__edge_index = {}
+            for i, edge in enumerate(self.edge_list):
+                self.__edge_index[edge] = i
+                if not directed:
+                    self.__edge_index[(edge[1], edge[0]) + edge[2:]] = i
+        return self.__edge_index
+
+    @property
+    def node_alive(self):
+        """Boolean mask of the nodes of the original graph left."""
+        self.__sync_masks()
+        return self.__node_alive
+
+    @property
+    def edge_alive(self):
+        """Boolean mask of the edges of the original graph not removed.
+
+        Edges removed with their nodes are only excluded by node_alive.
+        """
+        self.__sync_masks()
+        return self.__edge_alive
+
+    def number_of_nodes(self):
+        return self.graph.number_of_nodes()
+
+    def number_of_edges(self):
+        """Return the number of edges left (O(1), unlike Graph.number_of_edges)."""
+        return self.__nedges
+
+    def remove_node(self, n):
+        """Remove node n and its edges."""
+        G = self.graph
+        if G.is_directed():
+            incident = len(G.out_edges(n)) + len(G.in_edges(n))
+            incident -= G.number_of_edges(n, n)  # self-loops counted twice
+        else:
+            incident = len(G.edges(n))
+        G.remove_node(n)
+        self.__nedges -= incident
+        self.__removed_nodes.append(n)
+
+    def remove_edge(self, u, v, key=None):
+        """Remove edge (u, v), or the most recently added one of a multiedge."""
+        if self.graph.is_multigraph() and key is None:
+            if not self.graph.has_edge(u, v):
+                raise nx.NetworkXError(
+                    "The edge {}-{} is not in the graph".format(u, v)
+                )
+            key = list(self.graph[u][v])[-1]
+        if key is None:
+            self.graph.remove_edge(u, v)
+            self.__removed_edges.append((u, v))
+        else:
+            self.graph.remove_edge(u, v, key)
+            self.__removed_edges.append((u, v, key))
+        self.__nedges -= 1
+
+    def view(self):
+        """Return a read-only view of the attacked graph with all attributes."""
+        return nx.restricted_view(
+            self.base, self.__removed_nodes, self.__removed_edges
+        )
+
+    def materialize(self):
+        """Return the attacked graph as a new graph with all attributes."""
+        return self.view().copy()
+
+    def to_csr(self, weight=None):
+        """Return CSR form of the attacked graph, built from the masks."""
+        if weight not in self.__edges:
+            nodes, src, dst, wgt = csr.edge_arrays(self.base, weight)
+            self.__edges[weight] = (
+                csr.EdgeSet(len(nodes), src, dst, wgt, self.base.is_directed()),
+                nodes,
+            )
+        edges, nodes = self.__edges[weight]
+        return edges.subgraph(self.node_alive, self.edge_alive, nodes)
+
+    def global_efficiency(self, weight=None, backend="networkx"):
+        """Return global efficiency of the attacked graph."""
+        if backend == "csr":
+            return csr.global_efficiency(self.to_csr(weight))
+        estimator = network.efficiency_estimator(backend)
+        if estimator is not None:
+            return estimator(self.to_csr(weight))
+        return network.global_efficiency(self.graph, weight, backend)
+
+    def __sync_masks(self):
+        """Apply the removals made since the last call to the alive masks."""
+        if self.__node_alive is None:
+            self.__node_alive = np.ones(self.base.number_of_nodes(), dtype=bool)
+            self.__edge_alive = np.ones(self.base.number_of_edges(), dtype=bool)
+        nodes, edges = self.__synced
+        if nodes < len(self.__removed_nodes):
+            index = self.node_index
+            for n in self.__removed_nodes[nodes:]:
+                self.__node_alive[index[n]] = False
+        if edges < len(self.__removed_edges):
+            index = self.edge_index
+            for edge in self.__removed_edges[edges:]:
+                self.__edge_alive[index[edge]] = False
+        self.__synced = (len(self.__removed_nodes), len(self.__removed_edges))
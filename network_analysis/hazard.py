@@ -0,0 +1,175 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Provides spatially localized hazards for geographic networks.
+
+A hazard is a geometry, e.g. a flood zone polygon or a point with a blast
+radius, that removes every node inside it and every edge crossing it. The
+nodes (by their coordinates) and edges (by their geometry, or the straight
+line between their end nodes) are indexed in STR-trees, so that the
+footprints of many hazards are found in one batched query. Networks built
+by GeoNetwork (momepy primal graphs) have coordinate tuples as nodes and
+LineString geometries on their edges.
+"""
+
+import numpy as np
+import pandas as pd
+import shapely
+from scipy.sparse import csgraph
+import network_analysis.analysis as network
+import network_analysis.csr as csr
+from network_analysis.rendering import node_coordinates
+
+
+class SpatialIndex:
+    """Class for finding the nodes and edges hit by hazards."""
+    def __init__(self, G, geometry="geometry"):
+        """Initialise index.
+
+        Arguments:
+            G: NetworkX graph with coordinates as node labels (or x and y
+                node attributes)
+            geometry: Edge attribute holding the edge geometry; edges without
+                it are taken as straight lines between their end nodes
+        """
+        self.nodes = list(G)
+        index = {n: i for i, n in enumerate(self.nodes)}
+        coords = node_coordinates(G)
+        if G.is_multigraph():
+            self.edges = list(G.edges(keys=True))
+        else:
+            self.edges = list(G.edges())
+        lines = np.empty(len(self.edges), dtype=object)
+        for i, (*edge, data) in enumerate(G.edges(data=geometry)):
+            if data is None:
+                ends = [coords[index[edge[0]]], coords[index[edge[1]]]]
+                data = shapely.linestrings(ends)
+            lines[i] = data
+        self.points = shapely.points(coords)
+        self.lines = lines
+        self.node_tree = shapely.STRtree(self.points)
+        self.edge_tree = shapely.STRtree(self.lines)
+
+    def query(self, hazards, radius=None):
+        """Return the nodes and edges hit by each hazard.
+
+        Arguments:
+            hazards: Geometry or array of geometries
+            radius: If given, the hazards hit everything within radius of
+                their geometry (e.g. disks around points)
+
+        Returns:
+            (hazard ids, node ids) and (hazard ids, edge ids) arrays of the
+            hits, node and edge ids being positions in nodes and edges
+        """
+        hazards = np.atleast_1d(np.asarray(hazards, dtype=object))
+        if radius is None:
+            kwargs = {"predicate": "intersects"}
+        else:
+            kwargs = {"predicate": "dwithin", "distance": radius}
+        hits = []
+        for tree in [self.node_tree, self.edge_tree]:
+            h, i = tree.query(hazards, **kwargs)
+            order = np.lexsort((i, h))
+            hits.append((h[order], i[order]))
+        return tuple(hits)
+
+    def footprint(self, hazard, radius=None):
+        """Return lists of the nodes and edges hit by a hazard."""
+        (_, nodes), (_, edges) = self.query([hazard], radius)
+        nodes = [self.nodes[i] for i in np.sort(nodes)]
+        edges = [self.edges[i] for i in np.sort(edges)]
+        return nodes, edges
+
+
+def disks(centers):
+    """Return array of points for (x, y) hazard centers, to be used with a radius."""
+    return shapely.points(np.asarray(centers, dtype=float))
+
+
+def hazard_sweep(
+    G, index, hazards, radius=None, weight=None, backend="csr", efficiency=True
+):
+    """Return the damage of independent hazards, each hitting the intact network.
+
+    The footprints of all hazards are found in one batched query, and the
+    network left by each hazard is evaluated on CSR arrays built from alive
+    masks, so the graph itself is never copied or modified.
+
+    Arguments:
+        G: NetworkX graph
+        index: SpatialIndex of G
+        hazards: Array of hazard geometries
+        radius: If given, the hazards hit everything within radius of them
+        weight: If weight is not none, use weighted efficiency measure
+        backend: "csr", "sampled" or an analysis.SampledEfficiency estimator
+        efficiency: If false, skip the global efficiency (reported as NaN)
+
+    Returns:
+        DataFrame with one row per hazard and columns hazard, nodes_removed,
+        edges_removed, lcc, slcc, eff, number_of_nodes and number_of_edges.
+    """
+    estimator = network.efficiency_estimator(backend)
+    if estimator is None and backend != "csr":
+        raise ValueError("unknown backend: {}".format(backend))
+    nodes, src, dst, wgt = csr.edge_arrays(G, weight)
+    n, m = len(nodes), len(src)
+    edges = csr.EdgeSet(n, src, dst, wgt, G.is_directed())
+    (hn, node_hits), (he, edge_hits) = index.query(hazards, radius)
+    nhazards = len(np.atleast_1d(np.asarray(hazards, dtype=object)))
+    node_starts = np.searchsorted(hn, np.arange(nhazards + 1))
+    edge_starts = np.searchsorted(he, np.arange(nhazards + 1))
+
+    rows = []
+    for h in range(nhazards):
+        node_alive = np.ones(n, dtype=bool)
+        node_alive[node_hits[node_starts[h] : node_starts[h + 1]]] = False
+        edge_alive = node_alive[src] & node_alive[dst]
+        edge_alive[edge_hits[edge_starts[h] : edge_starts[h + 1]]] = False
+        graph = edges.subgraph(node_alive, edge_alive)
+        lcc, slcc = _largest_components(graph)
+        if not efficiency:
+            eff = np.nan
+        elif estimator is not None:
+            eff = estimator(graph)
+        else:
+            eff = csr.global_efficiency(graph)
+        rows.append(
+            (
+                h,
+                n - graph.number_of_nodes(),
+                m - int(edge_alive.sum()),
+                lcc,
+                slcc,
+                eff,
+                graph.number_of_nodes(),
+                int(edge_alive.sum()),
+            )
+        )
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "hazard",
+            "nodes_removed",
+            "edges_removed",
+            "lcc",
+            "slcc",
+            "eff",
+            "number_of_nodes",
+            "number_of_edges",
+        ],
+    )
+
+
+def _largest_components(graph):
+    """Return sizes of the largest and second-largest (weakly) connected components."""
+    if graph.number_of_nodes() == 0:
+        return 0, 0
+    _, labels = csgraph.connected_components(
+        graph.to_scipy(), directed=graph.directed, connection="weak"
+    )
+    sizes = np.sort(np.bincount(labels))[::-1]
+    return int(sizes[0]), int(sizes[1]) if len(sizes) > 1 else 0
@@ -0,0 +1,275 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Provides reverse percolation for tracking connected components.
+
+When the removal order of an attack is known in advance, the sizes of the
+largest and second-largest connected components after every removal can be
+obtained by adding the removed nodes or edges back in reverse order while
+tracking component sizes with a union-find structure. For edge removals,
+the global efficiency is obtained the same way by keeping the matrix of
+all shortest path lengths up to date as the edges are added back.
+
+References:
+    - Newman, M. E. J., and Ziff, R. M. (2000). Efficient Monte Carlo
+      algorithm and high-precision results for percolation. Phys. Rev. Lett.
+      85, 4104. https://doi.org/10.1103/PhysRevLett.85.4104
+    - Ausiello, G., Italiano, G. F., Marchetti Spaccamela, A., and Nanni, U.
+      (1991). Incremental algorithms for minimal length paths. J. Algorithms
+      12, 615-638.
+"""
+
+import heapq
+import itertools
+from collections import Counter
+import numpy as np
+from scipy.sparse import csgraph
+import network_analysis.csr as csr
+
+
+class UnionFind:
+    """Union-find with component sizes and largest/second-largest tracking."""
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+        self.__heap = []  # (-size, order, root), stale entries are skipped
+        self.__order = itertools.count()
+
+    def __contains__(self, x):
+        return x in self.parent
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add(self, x):
+        """Add x as a singleton component."""
+        if x not in self.parent:
+            self.parent[x] = x
+            self.size[x] = 1
+            self.__push(x)
+
+    def find(self, x):
+        """Return the root of the component containing x."""
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[x] != root:  # path compression
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, x, y):
+        """Merge the components containing x and y."""
+        rx = self.find(x)
+        ry = self.find(y)
+        if rx == ry:
+            return rx
+        if self.size[rx] < self.size[ry]:
+            rx, ry = ry, rx
+        self.parent[ry] = rx
+        self.size[rx] += self.size.pop(ry)
+        self.__push(rx)
+        return rx
+
+    def largest(self):
+        """Return sizes of the largest and second-largest components."""
+        first = self.__pop_valid()
+        if first is None:
+            return 0, 0
+        second = self.__pop_valid()
+        heapq.heappush(self.__heap, first)
+        if second is None:
+            return -first[0], 0
+        heapq.heappush(self.__heap, second)
+        return -first[0], -second[0]
+
+    def __push(self, root):
+        heapq.heappush(self.__heap, (-self.size[root], next(self.__order), root))
+
+    def __pop_valid(self):
+        heap = self.__heap
+        while heap:
+            entry = heapq.heappop(heap)
+            size, _, root = entry
+            if self.parent[root] == root and self.size[root] == -size:
+                return entry
+        return None
+
+
+def node_percolation(G, nodes_removed):
+    """Return lcc and slcc after each node removal in the given order.
+
+    Arguments:
+        G: NetworkX graph before the attack
+        nodes_removed: sequence of nodes in the order they are removed
+
+    Returns:
+        lcc, slcc: lists of length len(nodes_removed) + 1 where index 0 refers
+            to the intact network
+    """
+    removed = set(nodes_removed)
+    uf = UnionFind()
+    for node in G:
+        if node not in removed:
+            uf.add(node)
+    for u, v in G.edges():
+        if u in uf and v in uf:
+            uf.union(u, v)
+
+    lcc = []
+    slcc = []
+    for node in reversed(nodes_removed):
+        first, second = uf.largest()
+        lcc.append(first)
+        slcc.append(second)
+        uf.add(node)
+        for nbr in G.adj[node]:
+            if nbr in uf:
+                uf.union(node, nbr)
+        if G.is_directed():
+            for nbr in G.pred[node]:
+                if nbr in uf:
+                    uf.union(node, nbr)
+    first, second = uf.largest()
+    lcc.append(first)
+    slcc.append(second)
+    lcc.reverse()
+    slcc.reverse()
+    return lcc, slcc
+
+
+def edge_percolation(G, edges_removed):
+    """Return lcc and slcc after each edge removal in the given order.
+
+    Arguments:
+        G: NetworkX graph before the attack
+        edges_removed: sequence of edges (u, v) in the order they are removed
+
+    Returns:
+        lcc, slcc: lists of length len(edges_removed) + 1 where index 0 refers
+            to the intact network
+    """
+    # count removals per edge so that parallel edges are handled correctly
+    pending = Counter((e[0], e[1]) for e in edges_removed)
+    uf = UnionFind()
+    for node in G:
+        uf.add(node)
+    for u, v in G.edges():
+        if pending[(u, v)] > 0:
+            pending[(u, v)] -= 1
+        elif pending[(v, u)] > 0:
+            pending[(v, u)] -= 1
+        else:
+            uf.union(u, v)
+
+    lcc = []
+    slcc = []
+    for edge in reversed(edges_removed):
+        first, second = uf.largest()
+        lcc.append(first)
+        slcc.append(second)
+        uf.union(edge[0], edge[1])
+    first, second = uf.largest()
+    lcc.append(first)
+    slcc.append(second)
+    lcc.reverse()
+    slcc.reverse()
+    return lcc, slcc
+
+
+def edge_percolation_efficiency(G, edges_removed, weight=None):
+    """Return global efficiency after each edge removal in the given order.
+
+    The shortest path lengths of the network left after all removals are
+    computed once, and each removed edge (u, v) is then added back in
+    reverse order, improving only the pairs (i, j) with d(i, u) + w(u, v) <
+    d(i, v) and w(u, v) + d(v, j) < d(u, j), whose new shortest paths use the
+    edge. The efficiency sum is updated with the improved pairs. The
+    distance matrix takes 8 N^2 bytes, so this is for networks with up to a
+    few ten thousand nodes, but the number of edges removed is not limited.
+
+    Arguments:
+        G: NetworkX graph before the attack
+        edges_removed: sequence of edges (u, v), or (u, v, key) for
+            multigraphs, in the order they are removed; as in
+            graphview.MaskedGraph, (u, v) of a multiedge removes the most
+            recently added of the parallel edges left
+        weight: If weight is not none, use weighted shortest path lengths
+
+    Returns:
+        eff: list of length len(edges_removed) + 1 where index 0 refers to
+            the intact network
+    """
+    nodes, src, dst, wgt = csr.edge_arrays(G, weight)
+    n = len(nodes)
+    if wgt is None:
+        wgt = np.ones(len(src), dtype=float)
+    removed = _edge_ids(G, edges_removed)
+    alive = np.ones(len(src), dtype=bool)
+    alive[removed] = False
+    remaining = csr.CSRGraph.from_edges(
+        nodes, src[alive], dst[alive], wgt[alive], G.is_directed()
+    )
+    dist = csgraph.shortest_path(
+        remaining.to_scipy(), directed=G.is_directed(), unweighted=weight is None
+    )
+    total = 0.0
+    rows = max(1, csr.BLOCK_ELEMENTS // max(1, n))
+    for start in range(0, n, rows):
+        block = dist[start : start + rows]
+        total += np.sum(1.0 / block[block > 0])
+
+    norm = max(1, n * (n - 1))
+    eff = []
+    for i in reversed(removed):
+        eff.append(float(total / norm))
+        total += _insert_edge(dist, src[i], dst[i], wgt[i], G.is_directed())
+    eff.append(float(total / norm))
+    eff.reverse()
+    return eff
+
+
+def _edge_ids(G, edges):
+    """Return positions in G.edges() of edges removed one after another."""
+    index = {}
+    for i, edge in enumerate(G.edges(keys=True) if G.is_multigraph() else G.edges):
+        keys = {edge, edge[:2]}
+        if not G.is_directed():
+            keys |= {(e[1], e[0]) + e[2:] for e in keys}
+        for e in keys:
+            index.setdefault(e, []).append(i)
+    ids = []
+    taken = set()
+    for edge in edges:
+        alive = [i for i in index[tuple(edge)] if i not in taken]
+        ids.append(alive[-1])
+        taken.add(alive[-1])
+    return ids
+
+
+def _insert_edge(dist, u, v, w, directed):
+    """Add edge (u, v) of weight w to distance matrix, return efficiency sum gain."""
+    if u == v or dist[u, v] <= w:
+        return 0.0
+    # rows are contiguous, so symmetric (undirected) distances are read by row
+    to_u = (dist[:, u] if directed else dist[u]).copy()
+    from_v = dist[v].copy()
+    to_v = dist[:, v] if directed else from_v
+    rows = np.flatnonzero(to_u + w < to_v)
+    cols = np.flatnonzero(w + from_v < dist[u])
+    block = dist[np.ix_(rows, cols)]
+    new = to_u[rows, None] + w + from_v[None, cols]
+    better = new < block
+    i, j = np.nonzero(better)
+    new = new[i, j]
+    old = block[i, j]
+    # zero distances are excluded from the efficiency sum, as in efficiency_sum
+    gain = np.sum(1.0 / new[new > 0]) - np.sum(1.0 / old[old > 0])
+    i, j = rows[i], cols[j]
+    dist[i, j] = new
+    if directed:
+        return float(gain)
+    dist[j, i] = new
+    return 2.0 * float(gain)
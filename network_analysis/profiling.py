@@ -0,0 +1,191 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Provides per-step profiling of network attacks.
+
+An AttackProfiler passed to a NetworkDismantling attack records the
+wall-clock and CPU time of each phase of each step (see PHASES), the size
+of the attacked graph after each step and, optionally, the peak memory
+traced by tracemalloc. The time of the work done before the first step,
+such as building the removal masks or a precomputed removal order, is
+counted in step 0, and that of the work done after the last step, such as
+a ranking finding no target left or the final checkpoint, in the last
+step, so that there is one row per step of the attack. The results are
+exported as tables, and callbacks are called with the row of each step as
+soon as it is complete.
+
+Example:
+    profiler = AttackProfiler()
+    dismantling.node_iterative_centrality_attack(10, profiler=profiler)
+    print(profiler.summary())
+"""
+
+import contextlib
+import time
+import tracemalloc
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Phases of an attack step
+PHASES = [
+    "get_graph",  # building the removal masks of the graph to be attacked
+    "order",  # precomputing the removal order (adaptive and ordered attacks)
+    "percolation",  # precomputing lcc and slcc by reverse percolation
+    "centrality",  # ranking and selecting the next target
+    "remove",  # removing the target from the graph
+    "lcc",  # size of the largest connected component
+    "slcc",  # size of the second-largest connected component
+    "efficiency",  # global efficiency
+    "checkpoint",  # saving the attack state
+]
+
+
+class AttackProfiler:
+    """Class for collecting per-step timings of the phases of attacks."""
+    def __init__(self, memory=False, callbacks=()):
+        """Initialise profiler.
+
+        Arguments:
+            memory: If true, trace the peak memory of each step with
+                tracemalloc (which slows Python code down)
+            callbacks: Functions called as callback(row) with the row of the
+                step table (see steps) of each completed step
+        """
+        self.memory = memory
+        self.callbacks = list(callbacks)
+        self.timings = []  # (attack, step, phase, wall, cpu)
+        self.rows = []  # rows of the step table
+        self.__attack = None
+        self.__step = 0
+        self.__tracing = False
+        self.__counted = 0  # number of timings counted in the rows
+
+    def begin_attack(self, attack):
+        """Start profiling an attack (called before its step 0).
+
+        The phases timed since the previous attack, e.g. building the graph
+        to be attacked, are counted in step 0 of this attack.
+        """
+        i = len(self.timings)
+        while i > 0 and self.timings[i - 1][0] is None:
+            i -= 1
+            self.timings[i] = (attack, 0) + self.timings[i][2:]
+        self.__attack = attack
+        self.__step = 0
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__tracing = True
+
+    def end_attack(self):
+        """Stop profiling the current attack.
+
+        The phases timed since the last step of the attack are counted in it.
+        """
+        if self.rows and self.rows[-1]["attack"] == self.__attack:
+            row = self.rows[-1]
+            for i in range(self.__counted, len(self.timings)):
+                attack, _, phase, wall, cpu = self.timings[i]
+                if attack != self.__attack:
+                    continue
+                self.timings[i] = (attack, row["step"], phase, wall, cpu)
+                row[phase + "_wall"] = row.get(phase + "_wall", 0.0) + wall
+                row[phase + "_cpu"] = row.get(phase + "_cpu", 0.0) + cpu
+            self.__counted = len(self.timings)
+        self.__attack = None
+        self.__step = 0
+        if self.__tracing:
+            tracemalloc.stop()
+            self.__tracing = False
+
+    def begin_step(self, step):
+        """Start timing a step; the phases are counted in it until the next."""
+        self.__step = step
+        if self.memory and tracemalloc.is_tracing() and self.rows:
+            tracemalloc.reset_peak()
+
+    def end_step(self, step, number_of_nodes, number_of_edges):
+        """Record the size of the graph after a step and call the callbacks."""
+        row = {
+            "attack": self.__attack,
+            "step": step,
+            "number_of_nodes": number_of_nodes,
+            "number_of_edges": number_of_edges,
+            "peak_memory": None,
+            "max_rss": None,
+        }
+        if self.memory and tracemalloc.is_tracing():
+            row["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        if resource is not None:
+            row["max_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        for attack, _, phase, wall, cpu in self.timings[self.__counted :]:
+            if attack != self.__attack:
+                continue
+            row[phase + "_wall"] = row.get(phase + "_wall", 0.0) + wall
+            row[phase + "_cpu"] = row.get(phase + "_cpu", 0.0) + cpu
+        self.__counted = len(self.timings)
+        self.rows.append(row)
+        for callback in self.callbacks:
+            callback(row)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Context manager timing a phase of the current step."""
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            self.timings.append(
+                (
+                    self.__attack,
+                    self.__step,
+                    name,
+                    time.perf_counter() - wall,
+                    time.process_time() - cpu,
+                )
+            )
+
+    def phases(self):
+        """Return table of the wall-clock and CPU time of every timed phase."""
+        return pd.DataFrame(
+            self.timings, columns=["attack", "step", "phase", "wall", "cpu"]
+        )
+
+    def steps(self):
+        """Return table with one row per step.
+
+        The columns are attack, step, number_of_nodes, number_of_edges,
+        peak_memory (bytes traced, if memory is true), max_rss (maximum
+        resident set size of the process so far, in kilobytes on Linux) and
+        <phase>_wall and <phase>_cpu for the phases timed in the step.
+        """
+        table = pd.DataFrame(self.rows)
+        columns = [
+            "{}_{}".format(phase, clock)
+            for phase in PHASES
+            for clock in ["wall", "cpu"]
+            if "{}_{}".format(phase, clock) in table.columns
+        ]
+        other = [c for c in table.columns if c not in columns]
+        return table[other + columns].fillna({c: 0.0 for c in columns})
+
+    def summary(self):
+        """Return table of the total time of each phase and its share."""
+        table = self.phases().groupby("phase")[["wall", "cpu"]].sum()
+        table = table.reindex([p for p in PHASES if p in table.index])
+        table["share"] = table["wall"] / table["wall"].sum()
+        return table
+
+
+def profiled(profiler, name):
+    """Return context timing phase name with profiler, or a null context."""
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.phase(name)
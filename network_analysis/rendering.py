@@ -0,0 +1,247 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Provides fast rendering of large networks.
+
+The edges are drawn as one compound path built from coordinate arrays and
+the nodes as one scatter plot, instead of one artist per element as with
+nx.draw. At the level of detail of the output, the end points are snapped
+to the centers of the pixels they fall in, so that edges shorter than a
+pixel collapse and are dropped and edges with the same pixels are drawn
+once; chains of short edges stay connected, and nothing moves by more than
+half a pixel. Attacked networks are drawn from alive masks over the nodes
+and edges of the original graph (in the order of G and G.edges(), as in
+graphview.MaskedGraph), so the graph is never copied.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.collections import PathCollection
+from matplotlib.path import Path
+import network_analysis.csr as csr
+
+
+def node_coordinates(G):
+    """Return array of node coordinates, from x and y attributes or labels.
+
+    For compact graphs (see geonetwork.compact_graph), node i has the
+    coordinates in row i of the "coordinates" graph attribute.
+    """
+    if "coordinates" in G.graph:
+        coordinates = np.asarray(G.graph["coordinates"], dtype=np.float64)
+        return coordinates[np.fromiter(G, dtype=np.int64, count=len(G)), :2]
+    coords = np.empty((G.number_of_nodes(), 2))
+    for i, (n, data) in enumerate(G.nodes(data=True)):
+        if "x" in data and "y" in data:
+            coords[i] = data["x"], data["y"]
+        else:
+            coords[i] = n[0], n[1]
+    return coords
+
+
+def node_positions(G, pos=None):
+    """Return array of node positions in the order of G.
+
+    Arguments:
+        G: NetworkX graph
+        pos: Dictionary of positions keyed by node; if None, the positions
+            are the x and y node attributes or the node labels (coordinates)
+    """
+    if pos is None:
+        return node_coordinates(G)
+    return np.array([pos[n] for n in G], dtype=float).reshape(-1, 2)
+
+
+def removal_masks(G, removed, edges=False):
+    """Return node and edge alive masks of G after removing nodes or edges.
+
+    Arguments:
+        G: NetworkX graph
+        removed: Nodes (or edges) removed, e.g. the removed fields of the
+            AttackStep records of an attack up to the step of interest
+        edges: True if the removed elements are edges
+
+    Returns:
+        Boolean arrays over the nodes of G and over G.edges() (with keys for
+        multigraphs). As in MaskedGraph, removing a multiedge without key
+        removes the most recently added of the parallel edges left.
+    """
+    nodes, src, dst, _ = csr.edge_arrays(G)
+    node_alive = np.ones(len(nodes), dtype=bool)
+    edge_alive = np.ones(len(src), dtype=bool)
+    if edges:
+        index = {}
+        elist = G.edges(keys=True) if G.is_multigraph() else G.edges()
+        for i, edge in enumerate(elist):
+            keys = {edge[:2], edge}
+            if not G.is_directed():
+                keys |= {(e[1], e[0]) + e[2:] for e in keys}
+            for e in keys:
+                index.setdefault(e, []).append(i)
+        for edge in removed:
+            alive = [i for i in index[tuple(edge)] if edge_alive[i]]
+            if alive:
+                edge_alive[alive[-1]] = False
+    else:
+        node_index = {n: i for i, n in enumerate(nodes)}
+        node_alive[[node_index[n] for n in removed]] = False
+    return node_alive, edge_alive
+
+
+def pixel_size(xy, figsize=(12, 12), dpi=300):
+    """Return size in data units of one output pixel when xy fills the figure."""
+    if len(xy) == 0:
+        return 1.0
+    extent = np.ptp(xy, axis=0)
+    size = max(extent[0] / (figsize[0] * dpi), extent[1] / (figsize[1] * dpi))
+    return size if size > 0 else 1.0
+
+
+def level_of_detail(xy, src, dst, pixel, nodes=None):
+    """Return edge segments and node points thinned to a pixel size.
+
+    Arguments:
+        xy: Array of node positions
+        src, dst: Arrays of end node ids of the edges
+        pixel: Size of a pixel in data units
+        nodes: Ids (or boolean mask) of the nodes to be drawn (default: all)
+
+    Returns:
+        Array of segments (m x 2 x 2) and array of points, both with end
+        points snapped to pixel centers and duplicates removed
+    """
+    origin = xy.min(axis=0) if len(xy) else np.zeros(2)
+    cells = np.floor((xy - origin) / pixel).astype(np.int64)
+    ncols = cells[:, 1].max() + 1 if len(xy) else 1
+    _, keys, inverse = np.unique(
+        cells[:, 0] * ncols + cells[:, 1], return_index=True, return_inverse=True
+    )
+    centers = origin + (cells[keys] + 0.5) * pixel
+    a, b = inverse[src], inverse[dst]
+    a, b = np.minimum(a, b), np.maximum(a, b)
+    keep = a != b
+    pairs = np.unique(a[keep] * len(keys) + b[keep])
+    segments = np.stack(
+        (centers[pairs // len(keys)], centers[pairs % len(keys)]), axis=1
+    )
+    if nodes is None:
+        return segments, centers
+    return segments, centers[np.unique(inverse[nodes])]
+
+
+def segment_collection(segments, color="k", linewidth=0.5, **kwargs):
+    """Return collection drawing line segments as one compound path.
+
+    A LineCollection creates one Path object per segment, which dominates
+    the drawing time of large networks, while the single path is built
+    from the vertex array directly.
+
+    Arguments:
+        segments: Array of segments (m x 2 x 2)
+        kwargs: Options passed to PathCollection, e.g. rasterized=True
+    """
+    codes = np.tile([Path.MOVETO, Path.LINETO], len(segments)).astype(Path.code_type)
+    path = Path(np.reshape(segments, (-1, 2)), codes)
+    return PathCollection(
+        [path],
+        facecolors="none",
+        edgecolors=color,
+        linewidths=linewidth,
+        zorder=1,
+        **kwargs
+    )
+
+
+def draw_network(
+    G,
+    pos=None,
+    ax=None,
+    node_alive=None,
+    edge_alive=None,
+    node_size=5,
+    node_color="C0",
+    edge_color="k",
+    linewidth=0.5,
+    figsize=(12, 12),
+    dpi=300,
+    lod=True,
+    rasterized=True,
+):
+    """Draw network edges as one path collection and nodes as one scatter plot.
+
+    Arguments:
+        G: NetworkX graph
+        pos: Dictionary of node positions (default: node coordinates)
+        ax: Axes to draw on (default: new figure of size figsize)
+        node_alive, edge_alive: Alive masks over the nodes of G and over
+            G.edges(), e.g. from removal_masks or a MaskedGraph, for drawing
+            an attacked network
+        node_size: Size of the node markers (0 to skip the nodes)
+        lod: If true, thin the edges and nodes to the pixel size of the
+            output (figsize and dpi)
+        rasterized: If true, rasterize the edges and nodes in vector output
+
+    Returns:
+        The axes drawn on
+    """
+    if ax is None:
+        _, ax = plt.subplots(figsize=figsize)
+    xy = node_positions(G, pos)
+    _, src, dst, _ = csr.edge_arrays(G)
+    alive = np.ones(len(src), dtype=bool) if edge_alive is None else edge_alive
+    if node_alive is not None:
+        alive = alive & node_alive[src] & node_alive[dst]
+        points = xy[node_alive]
+    else:
+        points = xy
+    src, dst = src[alive], dst[alive]
+    if lod:
+        pixel = pixel_size(xy, figsize, dpi)
+        segments, points = level_of_detail(xy, src, dst, pixel, node_alive)
+    else:
+        segments = np.stack((xy[src], xy[dst]), axis=1)
+    ax.add_collection(
+        segment_collection(segments, edge_color, linewidth, rasterized=rasterized)
+    )
+    if node_size > 0 and len(points) > 0:
+        ax.scatter(
+            points[:, 0],
+            points[:, 1],
+            s=node_size,
+            c=node_color,
+            zorder=2,
+            rasterized=rasterized,
+        )
+    if len(xy) > 0:
+        ax.update_datalim(xy)
+        ax.autoscale_view()
+    ax.set_aspect("equal", adjustable="datalim")
+    ax.set_axis_off()
+    return ax
+
+
+def plot_attack_snapshot(
+    G, steps, step, edges=False, pos=None, filename=None, dpi=300, **kwargs
+):
+    """Plot the network attacked by the first step removals of an attack.
+
+    Arguments:
+        G: NetworkX graph that was attacked
+        steps: AttackStep records of a node or edge attack (e.g. from an
+            iter_* method of NetworkDismantling), step 0 being the intact network
+        step: Number of attacks carried out in the snapshot
+        edges: True for edge attacks
+        kwargs: Options passed to draw_network
+    """
+    removed = [record.removed for record in steps if 0 < record.step <= step]
+    node_alive, edge_alive = removal_masks(G, removed, edges)
+    ax = draw_network(
+        G, pos, node_alive=node_alive, edge_alive=edge_alive, dpi=dpi, **kwargs
+    )
+    plt.tight_layout()
+    if filename:
+        plt.savefig(filename, dpi=dpi)
+    return ax
@@ -0,0 +1,473 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Provides a long-lived service answering what-if resilience queries.
+
+A query removes a set of nodes and edges from a network and asks for the
+global efficiency, the efficiency loss and the largest components of what
+is left. The network is loaded once. Its CSR edge set, component labels
+and the efficiency sum of every connected component are kept in memory. A
+query only recomputes the components it touches, since the efficiency sum
+of a network is the sum over its components.
+
+The service runs on asyncio with a small HTTP API on a TCP port or a Unix
+socket. Queries arriving within a short window are collected into a batch,
+duplicates are evaluated once, and batches are evaluated on a process pool,
+so the event loop never blocks. Recent results are cached.
+
+Endpoints:
+    GET /health: Network size and baseline
+    POST /query: {"nodes": [...], "edges": [[u, v], ...]} -> result
+    POST /batch: {"queries": [query, ...]} -> {"results": [result, ...]}
+
+Example:
+    network-service grid.graphml --port 8080
+    curl -d '{"nodes": [[10.5, 59.9]]}' http://127.0.0.1:8080/query
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy.sparse import csgraph
+import network_analysis.csr as csr
+import network_analysis.storage as storage
+
+# Seconds to wait for more queries before a batch is evaluated
+BATCH_WINDOW = 0.005
+
+# Maximum number of queries evaluated in one batch
+MAX_BATCH = 64
+
+# Number of query results kept in memory
+CACHE_SIZE = 1024
+
+# Maximum size in bytes of a request body
+MAX_BODY = 2**24
+
+# Port of the HTTP API
+DEFAULT_PORT = 8080
+
+# Reason phrases of the HTTP status codes sent
+STATUS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class ResilienceModel:
+    """Class for evaluating node and edge removals on a network in memory.
+
+    Connected components are weakly connected for directed graphs.
+    """
+    def __init__(self, G, weight=None):
+        """Initialise model.
+
+        Arguments:
+            G: NetworkX graph (not kept)
+            weight: If weight is not none, use weighted shortest path lengths
+        """
+        self.nodes, self.src, self.dst, wgt = csr.edge_arrays(G, weight)
+        self.weight = weight
+        self.directed = G.is_directed()
+        self.node_index = {n: i for i, n in enumerate(self.nodes)}
+        # (u, v) maps to all parallel edges, (u, v, key) to one multiedge
+        self.edge_index = {}
+        edges = G.edges(keys=True) if G.is_multigraph() else G.edges()
+        for i, edge in enumerate(edges):
+            keys = {edge, edge[:2]}
+            if not self.directed:
+                keys |= {(e[1], e[0]) + e[2:] for e in keys}
+            for e in keys:
+                self.edge_index.setdefault(e, []).append(i)
+        self.edges = csr.EdgeSet(
+            len(self.nodes), self.src, self.dst, wgt, self.directed
+        )
+
+        full = self.edges.subgraph(np.ones(len(self.nodes), dtype=bool))
+        ncomponents, self.labels = csgraph.connected_components(
+            full.to_scipy(), directed=self.directed, connection="weak"
+        )
+        self.component_sizes = np.bincount(self.labels, minlength=ncomponents)
+        self.component_sums = np.bincount(
+            self.labels, csr.nodal_efficiency_sums(full), minlength=ncomponents
+        )
+        self.efficiency_sum = float(self.component_sums.sum())
+        n = len(self.nodes)
+        self.eff = self.efficiency_sum / (n * (n - 1)) if n > 1 else 0.0
+        self.baseline = self.evaluate((), ())
+
+    def resolve(self, nodes=(), edges=()):
+        """Return sorted tuples of the ids of nodes and edges.
+
+        Node labels given as lists (e.g. coordinates from JSON) are read as
+        tuples. An edge (u, v) stands for all edges between u and v.
+        """
+        node_ids = set()
+        for node in nodes:
+            node = _label(node)
+            if node not in self.node_index:
+                raise ValueError("unknown node: {}".format(node))
+            node_ids.add(self.node_index[node])
+        edge_ids = set()
+        for edge in edges:
+            edge = tuple(_label(e) for e in edge)
+            if edge not in self.edge_index:
+                raise ValueError("unknown edge: {}".format(edge))
+            edge_ids.update(self.edge_index[edge])
+        return tuple(sorted(node_ids)), tuple(sorted(edge_ids))
+
+    def evaluate(self, node_ids, edge_ids):
+        """Return result of removing nodes and edges given by ids.
+
+        Returns:
+            Dictionary with the global efficiency "eff", the loss "eff_loss"
+            and relative loss "relative_loss" of efficiency, "lcc", "slcc",
+            "ncomponents", "nodes_removed" and "edges_removed"
+        """
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        edge_ids = np.asarray(edge_ids, dtype=np.int64)
+        affected = np.unique(
+            np.concatenate((self.labels[node_ids], self.labels[self.src[edge_ids]]))
+        )
+        node_alive = np.isin(self.labels, affected)
+        node_alive[node_ids] = False
+        edge_alive = None
+        if len(edge_ids) > 0:
+            edge_alive = np.ones(len(self.src), dtype=bool)
+            edge_alive[edge_ids] = False
+        sub = self.edges.subgraph(node_alive, edge_alive)
+
+        total = self.efficiency_sum - self.component_sums[affected].sum()
+        total += csr.efficiency_sum(sub)
+        _, labels = csgraph.connected_components(
+            sub.to_scipy(), directed=self.directed, connection="weak"
+        )
+        unaffected = np.ones(len(self.component_sizes), dtype=bool)
+        unaffected[affected] = False
+        sizes = np.concatenate((self.component_sizes[unaffected], np.bincount(labels)))
+        sizes = np.sort(sizes[sizes > 0])
+
+        n = len(self.nodes) - len(node_ids)
+        eff = total / (n * (n - 1)) if n > 1 else 0.0
+        loss = self.eff - eff
+        return {
+            "eff": float(eff),
+            "eff_loss": float(loss),
+            "relative_loss": float(loss / self.eff) if self.eff > 0 else 0.0,
+            "lcc": int(sizes[-1]) if len(sizes) > 0 else 0,
+            "slcc": int(sizes[-2]) if len(sizes) > 1 else 0,
+            "ncomponents": len(sizes),
+            "nodes_removed": len(node_ids),
+            "edges_removed": len(edge_ids),
+        }
+
+
+def _label(value):
+    """Return JSON value as a node label, with lists converted to tuples."""
+    if isinstance(value, list):
+        return tuple(_label(v) for v in value)
+    return value
+
+
+# Model of the service workers, sent once per process
+_service_model = None
+
+
+def _init_service_worker(model):
+    global _service_model
+    _service_model = model
+
+
+def _worker_ready():
+    return os.getpid()
+
+
+def _evaluate_batch(keys):
+    return [_service_model.evaluate(*key) for key in keys]
+
+
+class ResilienceService:
+    """Class for answering what-if queries concurrently with micro-batching.
+
+    Example:
+        async with ResilienceService(model) as service:
+            result = await service.query(nodes=[node])
+    """
+    def __init__(
+        self,
+        model,
+        nworkers=None,
+        batch_window=BATCH_WINDOW,
+        max_batch=MAX_BATCH,
+        cache_size=CACHE_SIZE,
+    ):
+        """Initialise service.
+
+        Arguments:
+            model: ResilienceModel of the network
+            nworkers: Number of worker processes (default: number of CPUs)
+            batch_window: Seconds to wait for more queries before a batch is
+                evaluated
+            max_batch: Maximum number of queries evaluated in one batch
+            cache_size: Number of query results kept in memory
+        """
+        self.model = model
+        self.nworkers = max(1, nworkers or os.cpu_count() or 1)
+        self.batch_window = batch_window
+        self.max_batch = max(1, max_batch)
+        self.cache_size = cache_size
+        self.__cache = OrderedDict()
+        self.__queue = None
+        self.__slots = None
+        self.__pool = None
+        self.__batcher = None
+        self.__running = set()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        """Start the worker pool and the batching task (before serving)."""
+        if self.__pool is not None:
+            return
+        self.__queue = asyncio.Queue()
+        self.__slots = asyncio.Semaphore(self.nworkers)
+        self.__pool = ProcessPoolExecutor(
+            max_workers=self.nworkers,
+            initializer=_init_service_worker,
+            initargs=(self.model,),
+        )
+        # start the workers now, since workers started during a request would
+        # inherit its open connection and keep it from being closed
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(self.__pool, _worker_ready)
+                for _ in range(self.nworkers)
+            )
+        )
+        self.__batcher = asyncio.create_task(self.__batch_loop())
+
+    async def close(self):
+        """Stop the batching task after the running batches and the pool."""
+        if self.__pool is None:
+            return
+        self.__batcher.cancel()
+        try:
+            await self.__batcher
+        except asyncio.CancelledError:
+            pass
+        if self.__running:
+            await asyncio.gather(*self.__running, return_exceptions=True)
+        self.__pool.shutdown()
+        self.__pool = None
+
+    async def query(self, nodes=(), edges=()):
+        """Return result of removing nodes and edges (see ResilienceModel)."""
+        key = self.model.resolve(nodes, edges)
+        if key in self.__cache:
+            self.__cache.move_to_end(key)
+            return self.__cache[key]
+        future = asyncio.get_running_loop().create_future()
+        await self.__queue.put((key, future))
+        return await future
+
+    async def __batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.__queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.__queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self.__slots.acquire()
+            task = asyncio.create_task(self.__evaluate(batch))
+            self.__running.add(task)
+            task.add_done_callback(self.__running.discard)
+
+    async def __evaluate(self, batch):
+        waiting = {}
+        for key, future in batch:
+            waiting.setdefault(key, []).append(future)
+        try:
+            keys = list(waiting)
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.__pool, _evaluate_batch, keys
+            )
+            for key, result in zip(keys, results):
+                self.__remember(key, result)
+                for future in waiting[key]:
+                    if not future.done():
+                        future.set_result(result)
+        except Exception as error:
+            for futures in waiting.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(error)
+        finally:
+            self.__slots.release()
+
+    def __remember(self, key, result):
+        if self.cache_size <= 0:
+            return
+        self.__cache[key] = result
+        self.__cache.move_to_end(key)
+        while len(self.__cache) > self.cache_size:
+            self.__cache.popitem(last=False)
+
+    async def respond(self, method, target, body):
+        """Return HTTP status and JSON payload of a request to the API."""
+        path = target.split("?", 1)[0]
+        routes = {"/health": "GET", "/query": "POST", "/batch": "POST"}
+        if path not in routes:
+            return 404, {"error": "not found: {}".format(path)}
+        if method != routes[path]:
+            return 405, {"error": "use {} for {}".format(routes[path], path)}
+        if path == "/health":
+            return 200, {
+                "status": "ok",
+                "number_of_nodes": len(self.model.nodes),
+                "number_of_edges": len(self.model.src),
+                "baseline": self.model.baseline,
+            }
+        try:
+            request = json.loads(body or b"{}")
+            if path == "/query":
+                queries = [request]
+            else:
+                queries = request["queries"]
+            results = await asyncio.gather(
+                *(self.query(q.get("nodes", ()), q.get("edges", ())) for q in queries)
+            )
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            return 400, {"error": str(error)}
+        if path == "/query":
+            return 200, results[0]
+        return 200, {"results": results}
+
+    async def handle(self, reader, writer):
+        """Serve the HTTP/1.1 requests of a connection."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                method, target, version = line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    status, payload = 413, {"error": "request body too large"}
+                    body = None
+                else:
+                    body = await reader.readexactly(length)
+                    try:
+                        status, payload = await self.respond(method, target, body)
+                    except Exception as error:
+                        status, payload = 500, {"error": str(error)}
+                keep_alive = (
+                    body is not None
+                    and version == "HTTP/1.1"
+                    and headers.get("connection", "").lower() != "close"
+                )
+                data = json.dumps(payload).encode()
+                head = [
+                    "HTTP/1.1 {} {}".format(status, STATUS[status]),
+                    "Content-Type: application/json",
+                    "Content-Length: {}".format(len(data)),
+                    "Connection: {}".format("keep-alive" if keep_alive else "close"),
+                ]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT, path=None):
+        """Serve the HTTP API on host and port, or on a Unix socket at path."""
+        async with self:
+            if path is not None:
+                server = await asyncio.start_unix_server(self.handle, path=path)
+            else:
+                server = await asyncio.start_server(self.handle, host, port)
+            async with server:
+                await server.serve_forever()
+
+
+def read_network(filename, compact=False):
+    """Read a network from binary storage, GraphML, GML or geodata.
+
+    Arguments:
+        filename: Directory written by storage.write_binary, GraphML or GML
+            file, or file with geodata for GeoNetwork
+        compact: If true, label the nodes of a GeoNetwork by integers
+    """
+    path = pathlib.Path(filename)
+    if path.is_dir():
+        return storage.to_networkx(storage.read_binary(path))
+    if path.suffix in (".graphml", ".gml"):
+        from network_analysis.campaign import read_network as read_graph
+
+        return read_graph(filename)
+    from network_analysis.geonetwork import GeoNetwork
+
+    return GeoNetwork(filename, compact=compact).graph
+
+
+def main(argv=None):
+    """Serve what-if resilience queries on a network."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("network", help="binary storage, GraphML, GML or geodata")
+    parser.add_argument("--weight", default=None, help="edge weight attribute")
+    parser.add_argument("--compact", action="store_true", help="integer node labels")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default=None, help="Unix socket path to serve on")
+    parser.add_argument("--nworkers", type=int, default=None)
+    parser.add_argument("--batch-window", type=float, default=BATCH_WINDOW)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    args = parser.parse_args(argv)
+
+    model = ResilienceModel(read_network(args.network, args.compact), args.weight)
+    service = ResilienceService(model, args.nworkers, args.batch_window, args.max_batch)
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
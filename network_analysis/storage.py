@@ -0,0 +1,209 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Provides binary storage of networks and reading of large adjacency files.
+
+A network is stored in a directory as NumPy arrays in CSR layout: the
+edges grouped by source node in the order of G.edges(), with offsets
+(indptr.npy), target node ids (indices.npy) and one array per stored weight
+attribute, and the node labels and graph type on the side. The arrays are
+memory-mapped on reading, so a network opens in milliseconds and processes
+reading the same files share their pages instead of copying them.
+Adjacency matrices in CSV files are read in chunks of rows, keeping only
+the nonzero entries.
+"""
+
+import json
+import pathlib
+import pickle
+from collections import namedtuple
+import numpy as np
+import networkx as nx
+import pandas as pd
+import network_analysis.csr as csr
+
+# Version of the binary storage format
+FORMAT_VERSION = 1
+
+# Network read from binary storage; arrays maps "indptr", "indices" and
+# "weight:<attribute>" to (memory-mapped) arrays
+BinaryGraph = namedtuple("BinaryGraph", ["nodes", "arrays", "directed", "multigraph"])
+
+# Number of matrix entries read at a time from adjacency files
+CHUNK_ENTRIES = 2**22
+
+# Python types of the weights read from adjacency matrices, by NumPy kind
+PYTHON_TYPES = {"f": float, "i": int, "u": int, "b": bool, "c": complex}
+
+
+def graph_arrays(G, weights=()):
+    """Return nodes and dictionary of the CSR arrays of G.
+
+    Arguments:
+        G: NetworkX graph (edge keys and attributes other than the weights
+            are not kept)
+        weights: Edge weight attributes to be kept (missing weights are 1)
+    """
+    nodes, src, dst, _ = csr.edge_arrays(G)
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=len(nodes)), out=indptr[1:])
+    arrays = {"indptr": indptr, "indices": dst}
+    for weight in weights:
+        if weight is not None:
+            arrays["weight:" + weight] = csr.edge_arrays(G, weight)[3]
+    return nodes, arrays
+
+
+def graph_from_arrays(nodes, arrays, directed=False, multigraph=False):
+    """Return the NetworkX graph of nodes and CSR arrays from graph_arrays."""
+    if multigraph:
+        G = nx.MultiDiGraph() if directed else nx.MultiGraph()
+    else:
+        G = nx.DiGraph() if directed else nx.Graph()
+    G.add_nodes_from(nodes)
+    src = np.repeat(np.arange(len(nodes)), np.diff(arrays["indptr"]))
+    edges = zip(
+        [nodes[u] for u in src.tolist()],
+        [nodes[v] for v in np.asarray(arrays["indices"]).tolist()],
+    )
+    weights = {
+        key.split(":", 1)[1]: np.asarray(values).tolist()
+        for key, values in arrays.items()
+        if key.startswith("weight:")
+    }
+    if weights:
+        data = (dict(zip(weights, values)) for values in zip(*weights.values()))
+        edges = ((u, v, d) for (u, v), d in zip(edges, data))
+    # one add_edges_from call, since add_edge clears the graph cache every time
+    G.add_edges_from(edges)
+    return G
+
+
+def write_binary(G, path, weights=()):
+    """Write network to a directory in binary CSR format.
+
+    Arguments:
+        G: NetworkX graph; node labels must be picklable, and edge keys and
+            attributes other than the weights are not stored
+        path: Directory (created if missing)
+        weights: Edge weight attributes to be stored
+    """
+    path = pathlib.Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    nodes, arrays = graph_arrays(G, weights)
+    files = {}
+    for i, (key, array) in enumerate(arrays.items()):
+        files[key] = key if ":" not in key else "weight{}".format(i)
+        np.save(path / (files[key] + ".npy"), array)
+    with open(path / "nodes.pkl", "wb") as f:
+        pickle.dump(nodes, f)
+    meta = {
+        "version": FORMAT_VERSION,
+        "directed": G.is_directed(),
+        "multigraph": G.is_multigraph(),
+        "files": files,
+    }
+    with open(path / "meta.json", "w") as f:
+        json.dump(meta, f, indent=1)
+
+
+def read_binary(path, mmap_mode="r"):
+    """Read network from a directory in binary CSR format.
+
+    Arguments:
+        path: Directory written by write_binary
+        mmap_mode: Memory-map mode of the arrays (None to read them into memory)
+
+    Returns:
+        BinaryGraph; see to_networkx and to_csr for converting it
+    """
+    path = pathlib.Path(path)
+    with open(path / "meta.json", "r") as f:
+        meta = json.load(f)
+    if meta["version"] != FORMAT_VERSION:
+        raise ValueError("unsupported format version: {}".format(meta["version"]))
+    with open(path / "nodes.pkl", "rb") as f:
+        nodes = pickle.load(f)
+    arrays = {
+        key: np.load(path / (name + ".npy"), mmap_mode=mmap_mode)
+        for key, name in meta["files"].items()
+    }
+    return BinaryGraph(nodes, arrays, meta["directed"], meta["multigraph"])
+
+
+def to_networkx(graph):
+    """Return the NetworkX graph of a BinaryGraph."""
+    return graph_from_arrays(
+        graph.nodes, graph.arrays, graph.directed, graph.multigraph
+    )
+
+
+def to_csr(graph, weight=None):
+    """Return the csr.CSRGraph of a BinaryGraph, for analysis without NetworkX."""
+    indptr = graph.arrays["indptr"]
+    src = np.repeat(np.arange(len(graph.nodes)), np.diff(indptr))
+    wgt = None if weight is None else graph.arrays["weight:" + weight]
+    edges = csr.EdgeSet(
+        len(graph.nodes), src, graph.arrays["indices"], wgt, graph.directed
+    )
+    return edges.subgraph(np.ones(len(graph.nodes), dtype=bool), nodes=graph.nodes)
+
+
+def read_adjacency_csv(filename, index_col=0, create_using=nx.Graph, chunksize=None):
+    """Read network from CSV file with an adjacency (interdependency) matrix.
+
+    Entry (i, j) gives an edge j --> i weighted by the entry, and the graph
+    is identical to nx.from_pandas_adjacency(df.transpose()) of the whole
+    matrix, but the file is read chunksize rows at a time and only the
+    nonzero entries are kept, so neither the dense matrix nor its transpose
+    is ever created. By default, a chunk holds about CHUNK_ENTRIES entries.
+    """
+    if chunksize is None:
+        ncols = len(pd.read_csv(filename, index_col=index_col, nrows=0).columns)
+        chunksize = max(1, CHUNK_ENTRIES // max(1, ncols))
+    labels = None
+    rows, cols, values = [], [], []
+    index = []
+    for chunk in pd.read_csv(filename, index_col=index_col, chunksize=chunksize):
+        if labels is None:
+            labels = list(chunk.columns)
+            position = {label: i for i, label in enumerate(labels)}
+        missing = [label for label in chunk.index if label not in position]
+        if missing:
+            msg = "{} not in columns".format(missing)
+            raise nx.NetworkXError("Columns must match Indices.", msg)
+        matrix = chunk.to_numpy()
+        r, c = np.nonzero(matrix)
+        rows.append(np.array([position[label] for label in chunk.index])[r])
+        cols.append(c)
+        values.append(matrix[r, c])
+        index.extend(chunk.index)
+    if labels is None:
+        raise nx.NetworkXError("Adjacency matrix is empty")
+    if len(index) != len(labels):
+        raise nx.NetworkXError(
+            "Adjacency matrix not square: nx,ny={}".format((len(labels), len(index)))
+        )
+    dtype = np.result_type(*(v.dtype for v in values))
+    if dtype.kind not in PYTHON_TYPES:
+        raise TypeError("Unknown numpy data type: {}".format(dtype))
+    python_type = PYTHON_TYPES[dtype.kind]
+    src = np.concatenate(cols)
+    dst = np.concatenate(rows)
+    weights = np.concatenate(values).astype(dtype)
+    # edges in row-major order of the transposed matrix, as from_numpy_array
+    order = np.lexsort((dst, src))
+    src, dst, weights = src[order].tolist(), dst[order].tolist(), weights[order]
+
+    G = nx.empty_graph(0, create_using)
+    G.add_nodes_from(labels)
+    triples = (
+        (labels[u], labels[v], {"weight": python_type(w)})
+        for u, v, w in zip(src, dst, weights.tolist())
+        if not G.is_multigraph() or G.is_directed() or u <= v
+    )
+    G.add_edges_from(triples)
+    return G
@@ -25,6 +25,12 @@ setuptools.setup(
     url="https://github.com/stigrs/network_analysis.git",
     packages=setuptools.find_packages(),
     install_requires=[req for req in requirements if req[:2] != "# "],
+    entry_points={
+        "console_scripts": [
+            "network-campaign=network_analysis.campaign:main",
+            "network-service=network_analysis.service:main",
+        ],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -0,0 +1,41 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Tests of caching of analysis results."""
+
+import networkx as nx
+import network_analysis.analysis as network
+from network_analysis.analysis import NetworkAnalysis
+
+
+def test_cached_result_is_isolated():
+    analysis = NetworkAnalysis(nx.path_graph(5), cache=True)
+    first = analysis.betweenness_centrality()
+    first[0] = 99.0
+    assert analysis.betweenness_centrality()[0] == 0.0
+    assert analysis.cache.hits == 1
+
+
+def test_cache_follows_graph_changes():
+    G = nx.path_graph(5)
+    nx.set_edge_attributes(G, 1.0, "w")
+    analysis = NetworkAnalysis(G, cache=True)
+    analysis.global_efficiency()
+    G.add_edge(4, 5)  # new node
+    assert analysis.global_efficiency() == network.global_efficiency(G)
+    G.add_edge(0, 2)  # new edge between existing nodes
+    assert analysis.global_efficiency() == network.global_efficiency(G)
+    G.remove_edge(0, 2)
+    G.add_edge(1, 3)  # same numbers of nodes and edges
+    assert analysis.global_efficiency() == network.global_efficiency(G)
+    analysis.global_efficiency("w")
+    G[0][1]["w"] = 5.0  # weight changed in place
+    assert analysis.global_efficiency("w") == network.global_efficiency(G, "w")
+    analysis.graph = nx.complete_graph(6)
+    assert analysis.global_efficiency() == 1.0
+    assert analysis.cache.hits == 0
+    assert analysis.global_efficiency() == 1.0
+    assert analysis.cache.hits == 1
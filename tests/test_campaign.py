@@ -0,0 +1,44 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Tests of campaigns of attack scenarios."""
+
+import networkx as nx
+import pandas as pd
+import pytest
+from network_analysis.campaign import (
+    SharedGraph,
+    attach_graph,
+    run_campaign,
+    scenario_matrix,
+)
+
+
+@pytest.mark.parametrize("create_using", [nx.Graph, nx.MultiDiGraph])
+def test_attach_graph(create_using):
+    G = create_using(nx.gnm_random_graph(20, 40, seed=1))
+    for i, (*_, d) in enumerate(G.edges(data=True)):
+        d["w"] = float(i)
+    shared = SharedGraph(G, ["w"])
+    try:
+        assert nx.utils.graphs_equal(attach_graph(shared.spec), G)
+    finally:
+        shared.close()
+
+
+def test_run_campaign_on_workers():
+    G = nx.barabasi_albert_graph(40, 2, seed=1)
+    nx.set_edge_attributes(G, 2.0, "w")
+    scenarios = scenario_matrix(
+        ["ba"],
+        ["random_attack", "node_iterative_centrality_attack"],
+        weights=[None, "w"],
+        seeds=[1, 2],
+        nattacks=5,
+    )
+    serial = run_campaign({"ba": G}, scenarios, nworkers=1)
+    parallel = run_campaign({"ba": G}, scenarios, nworkers=2)
+    pd.testing.assert_frame_equal(serial, parallel)
@@ -0,0 +1,130 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Tests of network dismantling."""
+
+import networkx as nx
+import numpy as np
+import pytest
+from network_analysis.dismantling import (
+    NetworkDismantling,
+    lcc_fraction_below,
+    plot_attack_results,
+)
+from network_analysis.profiling import AttackProfiler
+
+
+def test_random_attack_removing_all_nodes():
+    dismantling = NetworkDismantling(nx.path_graph(6))
+    _, nodes, lcc, slcc, _ = dismantling.random_attack(10, seed=1)
+    assert len(nodes) == 7  # with the placeholder of the intact network
+    assert lcc[-1] == 0 and slcc[-1] == 0
+    _, _, lcc_p, slcc_p, _ = dismantling.random_attack(10, seed=1, percolation=True)
+    assert lcc == lcc_p and slcc == slcc_p
+
+
+@pytest.mark.parametrize(
+    "method", ["adaptive_degree_attack", "collective_influence_attack"]
+)
+def test_adaptive_attack_removing_all_nodes(method):
+    dismantling = NetworkDismantling(nx.path_graph(6))
+    _, _, lcc, slcc, *_ = getattr(dismantling, method)(10)
+    assert lcc[-1] == 0 and slcc[-1] == 0
+    _, _, lcc_p, slcc_p, *_ = getattr(dismantling, method)(10, percolation=True)
+    assert lcc == lcc_p and slcc == slcc_p
+
+
+@pytest.mark.parametrize(
+    "method",
+    ["node_iterative_centrality_attack", "edge_iterative_centrality_attack"],
+)
+def test_iterative_attack_returns_interpolated_flags(method):
+    dismantling = NetworkDismantling(nx.path_graph(10))
+    attack = getattr(dismantling, method)
+    assert len(attack(5, recompute_every=3)) == 6
+    result = attack(5, recompute_every=3, return_interpolated=True)
+    lcc, interpolated = result[2], result[6]
+    assert len(interpolated) == len(lcc)
+    assert any(interpolated) and not interpolated[-1]
+
+
+def test_plot_attack_results_metric(tmp_path):
+    matplotlib = pytest.importorskip("matplotlib")
+    matplotlib.use("Agg")
+    dismantling = NetworkDismantling(nx.path_graph(6))
+    _, _, lcc, *_ = dismantling.node_iterative_centrality_attack(
+        3, checkpoint=tmp_path
+    )
+    nattacks = np.arange(4)
+    random = np.zeros(4)
+    plot_attack_results(nattacks, tmp_path, random, random, "n", "size", metric="lcc")
+    line = matplotlib.pyplot.gca().get_lines()[0]
+    assert list(line.get_ydata()) == lcc
+    matplotlib.pyplot.close("all")
+    with pytest.raises(ValueError):
+        plot_attack_results(nattacks, tmp_path, random, random, "n", "lcc", metric="x")
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+@pytest.mark.parametrize(
+    "method, size, lcc",
+    [
+        ("node_iterative_centrality_attack", 5, 0),
+        ("edge_iterative_centrality_attack", 10, 1),
+    ],
+)
+def test_iterative_attack_removing_all_elements(method, size, lcc, incremental):
+    dismantling = NetworkDismantling(nx.complete_graph(5))
+    attack = getattr(dismantling, method)
+    _, attacked, lcc_attacked, *_ = attack(20, incremental=incremental)
+    assert len(attacked) == size + 1  # with the placeholder of the intact network
+    assert len(set(attacked[1:])) == size
+    assert lcc_attacked[-1] == lcc
+
+
+def _positive_degree(G, weight=None):
+    return {n: d for n, d in G.degree() if d > 0}
+
+
+def test_iterative_attack_stops_when_ranking_is_empty():
+    dismantling = NetworkDismantling(nx.complete_graph(5))
+    _, nodes, lcc, *_ = dismantling.node_iterative_centrality_attack(
+        5, centrality_method=_positive_degree
+    )
+    assert len(nodes) == 5 and lcc[-1] == 1
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(nattacks=4),
+        dict(nattacks=10, recompute_every=3),
+        dict(nattacks=10, stop=lcc_fraction_below(0.5)),
+        dict(nattacks=10, centrality_method=_positive_degree),
+        dict(nattacks=10, centrality_method=_positive_degree, recompute_every=4),
+    ],
+)
+def test_profiler_row_per_step(kwargs):
+    dismantling = NetworkDismantling(nx.complete_graph(6))
+    profiler = AttackProfiler()
+    _, _, lcc, *_ = dismantling.node_iterative_centrality_attack(
+        profiler=profiler, **kwargs
+    )
+    table = profiler.steps()
+    assert list(table["step"]) == list(range(len(lcc)))
+    assert set(profiler.phases()["step"]) <= set(table["step"])
+    assert table["lcc_wall"].iloc[-1] > 0.0
+
+
+def test_profiler_row_of_last_step_read():
+    dismantling = NetworkDismantling(nx.complete_graph(6))
+    profiler = AttackProfiler()
+    for record in dismantling.iter_node_iterative_centrality_attack(
+        3, profiler=profiler
+    ):
+        if record.step == 3:
+            break
+    assert list(profiler.steps()["step"]) == [0, 1, 2, 3]
@@ -0,0 +1,54 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Tests of removal-mask views of networks under attack."""
+
+import networkx as nx
+import numpy as np
+import pytest
+from network_analysis.analysis import global_efficiency
+from network_analysis.graphview import MaskedGraph
+
+
+def _graph(create_using):
+    G = nx.gnm_random_graph(30, 90, seed=1, directed=create_using().is_directed())
+    G = create_using(G)
+    if G.is_multigraph():
+        G.add_edges_from([(0, 1), (0, 1), (2, 3)])
+    for i, (*_, d) in enumerate(G.edges(data=True)):
+        d["w"] = float(i)
+    return G
+
+
+@pytest.mark.parametrize(
+    "create_using", [nx.Graph, nx.DiGraph, nx.MultiGraph, nx.MultiDiGraph]
+)
+def test_masked_graph_follows_removals(create_using):
+    G = _graph(create_using)
+    expected = G.copy()
+    masked = MaskedGraph(G, "w")
+    for n in [5, 7, 11]:
+        masked.remove_node(n)
+        expected.remove_node(n)
+    for u, v in list(expected.edges())[:10]:
+        masked.remove_edge(u, v)
+        expected.remove_edge(u, v)
+    for H in (masked.graph, masked.view(), masked.materialize()):
+        assert nx.utils.graphs_equal(H, expected)
+    assert masked.number_of_edges() == expected.number_of_edges()
+    if G.is_directed():
+        assert dict(masked.graph.in_degree()) == dict(expected.in_degree())
+    eff = masked.global_efficiency("w", backend="csr")
+    assert abs(eff - global_efficiency(expected, "w")) < 1e-12
+    assert np.sum(masked.node_alive) == len(expected)
+    assert nx.utils.graphs_equal(G, _graph(create_using))  # original unchanged
+    u, v = next(iter(masked.graph.edges()))
+    assert G.get_edge_data(u, v) is not None
+    if G.is_multigraph():
+        assert G[u][v] is not masked.graph[u][v]  # key dicts are copied
+        assert G[u][v][0] is masked.graph[u][v][0]
+    else:
+        assert G[u][v] is masked.graph[u][v]  # attributes are shared
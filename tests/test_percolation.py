@@ -0,0 +1,62 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Tests of reverse percolation against stepwise removal."""
+
+import random
+import networkx as nx
+import numpy as np
+import pytest
+from network_analysis.analysis import global_efficiency
+from network_analysis.percolation import edge_percolation_efficiency
+
+# Largest difference allowed from the efficiency of the stepwise removals
+TOLERANCE = 1e-14
+
+
+def _graph(kind):
+    if kind == "directed":
+        return nx.gnm_random_graph(50, 200, seed=2, directed=True)
+    if kind == "multigraph":
+        G = nx.MultiGraph(nx.gnm_random_graph(40, 80, seed=3))
+        G.add_edges_from([(0, 1), (0, 1), (2, 3)])
+        return G
+    return nx.gnm_random_graph(60, 150, seed=1)
+
+
+def _stepwise(G, edges, weight):
+    H = G.copy()
+    eff = [global_efficiency(H, weight)]
+    for edge in edges:
+        H.remove_edge(*edge)
+        eff.append(global_efficiency(H, weight))
+    return eff
+
+
+@pytest.mark.parametrize("kind", ["graph", "directed", "multigraph"])
+@pytest.mark.parametrize("weight", [None, "w", "zero"])
+def test_edge_percolation_efficiency(kind, weight):
+    G = _graph(kind)
+    rng = random.Random(1)
+    for _, _, data in G.edges(data=True):
+        data["w"] = rng.uniform(0.5, 3.0)
+        data["zero"] = rng.choice([0.0, 1.0, 2.0])
+    if G.is_multigraph():
+        edges = [e[:2] for e in G.edges(keys=True)]
+    else:
+        edges = list(G.edges())
+    rng.shuffle(edges)
+    eff = edge_percolation_efficiency(G, edges, weight)
+    expected = _stepwise(G, edges, weight)
+    assert np.max(np.abs(np.array(eff) - expected)) < TOLERANCE
+
+
+def test_edge_percolation_efficiency_zero_weight_edge():
+    G = nx.path_graph(4)
+    nx.set_edge_attributes(G, 1.0, "w")
+    G[1][2]["w"] = 0.0
+    eff = edge_percolation_efficiency(G, [(1, 2)], "w")
+    assert eff == pytest.approx([0.75, 1 / 3])
@@ -0,0 +1,41 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Tests of the resilience query service."""
+
+import asyncio
+import json
+import networkx as nx
+from network_analysis.analysis import global_efficiency
+from network_analysis.service import ResilienceModel, ResilienceService
+
+
+async def _query_until_close(service, nodes):
+    server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        body = json.dumps({"nodes": nodes}).encode()
+        head = "POST /query HTTP/1.1\r\nConnection: close\r\nContent-Length: {}\r\n\r\n"
+        writer.write(head.format(len(body)).encode() + body)
+        # reading until the server closes the connection must not hang
+        data = await asyncio.wait_for(reader.read(), 10)
+        writer.close()
+        await writer.wait_closed()
+    return json.loads(data.partition(b"\r\n\r\n")[2])
+
+
+def test_first_query_connection_is_closed():
+    G = nx.path_graph(20)
+
+    async def run():
+        async with ResilienceService(ResilienceModel(G), nworkers=2) as service:
+            return await _query_until_close(service, [3])
+
+    result = asyncio.run(run())
+    G.remove_node(3)
+    assert abs(result["eff"] - global_efficiency(G)) < 1e-12
+    assert result["lcc"] == 16 and result["slcc"] == 3
@@ -0,0 +1,31 @@
+# Copyright (c) 2024 Stig Rune Sellevag
+#
+# This file is distributed under the MIT License. See the accompanying file
+# LICENSE.txt or http://www.opensource.org/licenses/mit-license.php for terms
+# and conditions.
+
+"""Tests of the binary CSR storage format."""
+
+import networkx as nx
+import numpy as np
+from network_analysis.analysis import NetworkAnalysis, global_efficiency
+
+
+def test_read_binary_analyses_csr_form(tmp_path):
+    G = nx.gnm_random_graph(30, 60, seed=1)
+    nx.set_edge_attributes(G, 2.0, "w")
+    NetworkAnalysis(G).write_binary(tmp_path, weights=["w"])
+    analysis = NetworkAnalysis()
+    analysis.read_binary(tmp_path)
+    assert isinstance(analysis.binary.arrays["indices"], np.memmap)
+    eff = analysis.global_efficiency("w", backend="csr")
+    assert abs(eff - global_efficiency(G, "w")) < 1e-12
+    estimate = analysis.approximate_global_efficiency(seed=1)
+    assert estimate == NetworkAnalysis(G).approximate_global_efficiency(seed=1)
+    assert analysis.binary is not None  # no NetworkX graph built so far
+    assert nx.utils.graphs_equal(analysis.graph, G)
+    analysis.graph = nx.path_graph(3)
+    assert analysis.binary is None
+    assert analysis.global_efficiency(backend="csr") == global_efficiency(
+        nx.path_graph(3)
+    )